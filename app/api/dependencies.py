@@ -0,0 +1,22 @@
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.config import settings
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Returns whether `token` grants admin access: it matches the configured admin token (none does without one)."""
+    if settings.admin_token is None:
+        return False
+    return token is not None and secrets.compare_digest(token, settings.admin_token)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Rejects the request with 403 unless it carries the configured admin token, and always if none is configured."""
+    if settings.admin_token is None:
+        raise HTTPException(status_code=403,
+                            detail="Admin endpoints are disabled: set ML_SERVICE_ADMIN_TOKEN to enable them")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+import numpy as np
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from app import startup
+from app.api.endpoints import predict
+from app.config import settings
+from app.db_control import session
+from app.models.registry import WARMUP_INPUTS
+from app.schemas.response_schemas import CheckResponse, LivenessResponse, ReadinessResponse
+
+router = APIRouter()
+
+
+async def check_database():
+    """Runs a round trip to the database on a connection checked out of the pool."""
+    async with session.engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def check_model():
+    """Scores the warm-up inputs as one batch with the active model version, on its executor."""
+    predictions = await predict.registry.get().predict_rows(WARMUP_INPUTS)
+    if not np.isfinite(predictions).all():
+        raise ValueError("The model returned non-finite predictions")
+
+
+async def run_check(check: Callable[[], Awaitable[None]], timeout_seconds: float) -> CheckResponse:
+    """Runs a readiness check, failing it if it raises or takes longer than `timeout_seconds`."""
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(check(), timeout_seconds)
+    except asyncio.TimeoutError:
+        return CheckResponse(ok=False, seconds=time.perf_counter() - start,
+                             error=f"Timed out after {timeout_seconds}s")
+    except Exception as error:
+        return CheckResponse(ok=False, seconds=time.perf_counter() - start, error=f"{type(error).__name__}: {error}")
+    return CheckResponse(ok=True, seconds=time.perf_counter() - start)
+
+
+@router.get("/live", response_model=LivenessResponse, summary="Liveness Probe")
+async def liveness():
+    """
+    Reports that the process is up and its event loop responsive, whether or not it is ready to take traffic.
+    """
+    return LivenessResponse(status="alive", uptime_seconds=time.perf_counter() - startup.state.started_at)
+
+
+@router.get("/ready", response_model=ReadinessResponse, responses={503: {"model": ReadinessResponse}},
+            summary="Readiness Probe")
+async def readiness():
+    """
+    Reports whether the process can take traffic: `200` once its start-up is done and its checks pass, `503`
+    otherwise. Once started, every call checks that:
+
+    - **database**: a pooled connection to the database answers a query.
+    - **model**: the active model version scores the warm-up batch on its executor.
+
+    Each check fails after `ML_SERVICE_READINESS_CHECK_TIMEOUT_SECONDS`.
+    """
+    state = startup.state
+    content = ReadinessResponse(ready=False, status=state.status, error=state.error, steps=state.steps,
+                                ready_seconds=state.ready_seconds)
+    if state.ready:
+        loaded = predict.registry.get()
+        content.model_version, content.model_load_seconds = loaded.version, loaded.load_seconds
+        database, model = await asyncio.gather(run_check(check_database, settings.readiness_check_timeout_seconds),
+                                               run_check(check_model, settings.readiness_check_timeout_seconds))
+        content.checks = {"database": database, "model": model}
+        content.ready = database.ok and model.ok
+
+    if content.ready:
+        return content
+    return JSONResponse(content.model_dump(), status_code=503)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app import metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="Prometheus Metrics", tags=["Monitoring"])
+async def get_metrics():
+    """
+    Serves the service's metrics in the Prometheus text exposition format:
+
+    - **ml_service_http_request_duration_seconds**: Latency histogram of HTTP requests per method, route and status.
+    - **ml_service_http_requests_in_flight**: HTTP requests being processed.
+    - **ml_service_prediction_stage_duration_seconds**: Time spent per prediction stage (`validation`, `transform`,
+      `predict`).
+    - **ml_service_db_query_duration_seconds**: Time spent in database queries per user operation.
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.dependencies import require_admin
+from app.api.endpoints.predict import registry
+from app.config import settings
+from app.models.registry import LoadedModel, VersionExistsError
+from app.schemas.request_schemas import ModelRegisterRequest
+from app.schemas.response_schemas import ModelRegistryResponse, ModelVersionResponse
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+def _version_response(loaded: LoadedModel) -> ModelVersionResponse:
+    return ModelVersionResponse(
+        version=loaded.version,
+        source=loaded.source,
+        loaded_at=loaded.loaded_at,
+        load_seconds=loaded.load_seconds,
+        active=loaded.version == registry.active_version,
+    )
+
+
+def _registry_response() -> ModelRegistryResponse:
+    return ModelRegistryResponse(
+        active_version=registry.active_version,
+        versions=[_version_response(loaded) for loaded in registry.versions()],
+    )
+
+
+@router.get("", response_model=ModelRegistryResponse, summary="List Model Versions")
+async def list_model_versions():
+    """
+    Lists the registered model versions and which one is active.
+    """
+    return _registry_response()
+
+
+@router.post("", response_model=ModelVersionResponse, status_code=201, summary="Register Model Version")
+async def register_model_version(data: ModelRegisterRequest):
+    """
+    Loads a model version from artifacts on the server and warms it up, without interrupting traffic.
+
+    - **version**: Name of the new version.
+    - **model_path** / **transformer_path**: Paths of the pickled model and polynomial features transformer.
+    - **activate**: Make the version active once it is ready.
+    """
+    try:
+        loaded = await registry.register(data.version, data.model_path, data.transformer_path,
+                                         activate=data.activate)
+    except VersionExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not load model version {data.version}: {e}")
+    return _version_response(loaded)
+
+
+@router.post("/scan", response_model=ModelRegistryResponse, summary="Scan Model Directory")
+async def scan_model_directory():
+    """
+    Registers the versions added to the model registry directory since the last scan and activates the newest,
+    by modification time of their artifacts.
+    """
+    if settings.model_registry_dir is None:
+        raise HTTPException(status_code=400, detail="No model registry directory is configured")
+    await registry.scan(settings.model_registry_dir)
+    return _registry_response()
+
+
+@router.post("/{version}/activate", response_model=ModelVersionResponse, summary="Activate Model Version")
+async def activate_model_version(version: str):
+    """
+    Makes a registered version the one used by requests without a `model_version`.
+    Requests already running finish on the version they started with.
+    """
+    try:
+        loaded = registry.activate(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found")
+    return _version_response(loaded)
+
+
+@router.delete("/{version}", status_code=204, summary="Remove Model Version")
+async def delete_model_version(version: str):
+    """
+    Removes a version that is not active and releases its workers.
+    """
+    try:
+        await registry.unregister(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"detail": "Model version removed successfully"}
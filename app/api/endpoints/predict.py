@@ -1,15 +1,94 @@
-from fastapi import APIRouter
+import time
+from typing import Optional
 
-from app.models.model_loader import load_model_and_transformer, predict_insurance_charges
-from app.schemas.request_schemas import PredictRequest
-from app.schemas.response_schemas import PredictResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+from app.api.serialization import ModelJSONResponse, json_body, json_body_openapi
+from app.cache import LRUCache
+from app.config import settings
+from app.models.batching import MicroBatcher
+from app.models.executor import InferenceExecutor
+from app.models.prediction_cache import PredictionCache
+from app.models.model_loader import (
+    load_model_and_transformer,
+    DEFAULT_MODEL_PATH,
+    DEFAULT_TRANSFORMER_PATH,
+)
+from app.models.registry import LoadedModel, ModelRegistry
+from app.models.stream_scoring import aiter_lines, score_stream
+from app.schemas.request_schemas import PredictRequest, PredictBatchRequest
+from app.schemas.response_schemas import (
+    PredictResponse,
+    PredictBatchResponse,
+    PredictBatchItemError,
+    InferenceStatsResponse,
+    CacheStatsResponse,
+)
 
 router = APIRouter()
-model, poly = load_model_and_transformer()
 
 
-@router.post("/predict", response_model=PredictResponse, summary="Predict Insurance Cost", tags=["Prediction"])
-async def predict_cost(data: PredictRequest):
+def load_version(version: str, model_path: str = DEFAULT_MODEL_PATH,
+                 transformer_path: Optional[str] = DEFAULT_TRANSFORMER_PATH) -> LoadedModel:
+    """Loads a model version along with the executor, micro-batcher and prediction cache configured in settings."""
+    start = time.perf_counter()
+    model, poly = load_model_and_transformer(
+        model_path, transformer_path,
+        inference_mode=settings.inference_mode,
+        lookup_max_children=settings.lookup_table_max_children,
+        lookup_max_bytes=settings.lookup_table_max_bytes,
+    )
+    load_seconds = time.perf_counter() - start
+
+    executor = InferenceExecutor(
+        model, poly,
+        backend=settings.inference_backend,
+        max_workers=settings.inference_workers,
+        blas_threads=settings.inference_blas_threads,
+    )
+    prediction_cache = PredictionCache(
+        LRUCache(max_entries=settings.prediction_cache_max_entries, ttl_seconds=settings.prediction_cache_ttl_seconds),
+        bmi_quantum=settings.prediction_cache_bmi_quantum,
+    ) if settings.prediction_cache_enabled else None
+
+    loaded = LoadedModel(version, model, poly, executor, prediction_cache=prediction_cache, source=model_path,
+                         load_seconds=load_seconds)
+    if settings.micro_batch_enabled:
+        loaded.batcher = MicroBatcher(
+            loaded.predict_rows,
+            max_batch_size=settings.micro_batch_max_size,
+            max_wait_ms=settings.micro_batch_max_wait_ms,
+        )
+    return loaded
+
+
+def load_default_version() -> LoadedModel:
+    """Loads the model version configured in settings."""
+    return load_version(settings.model_version, settings.model_artifact_path or DEFAULT_MODEL_PATH)
+
+
+# Versions are loaded at start-up (see `app.startup`), not when this module is imported.
+registry = ModelRegistry(load_version)
+
+
+def get_model_version(version: Optional[str] = None) -> LoadedModel:
+    """
+    Returns the requested model version, or the active one if `version` is None; 404 if it is unknown, 503 if no
+    version is loaded yet.
+    """
+    if version is None and registry.active_version is None:
+        raise HTTPException(status_code=503, detail="The model is not loaded yet")
+    try:
+        return registry.get(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found")
+
+
+@router.post("/predict", response_model=PredictResponse, summary="Predict Insurance Cost", tags=["Prediction"],
+             openapi_extra=json_body_openapi(PredictRequest))
+async def predict_cost(data: PredictRequest = Depends(json_body(PredictRequest))):
     """
     Predicts the health insurance premium cost based on given parameters.
 
@@ -17,15 +96,113 @@ async def predict_cost(data: PredictRequest):
     - **bmi**: Body Mass Index as a float, typically between 0 and 100.
     - **age**: Age as a positive integer between 0 and 120.
     - **children**: Number of children as a non-negative integer.
+    - **model_version**: Optional model version to use instead of the active one.
 
-    Returns the predicted insurance cost.
+    Returns the predicted insurance cost and the model version that computed it.
     """
+    loaded = get_model_version(data.model_version)
     input_data = {
         "age": data.age,
         "bmi": data.bmi,
         "children": data.children,
         "smoker": data.smoker
     }
-    predicted_charges = predict_insurance_charges(model, poly, input_data)
+    predicted_charges = await loaded.predict(input_data)
+    return ModelJSONResponse(PredictResponse(cost_prediction=predicted_charges, model_version=loaded.version))
+
+
+@router.post("/predict/batch", response_model=PredictBatchResponse, summary="Predict Insurance Cost in Batch",
+             tags=["Prediction"], openapi_extra=json_body_openapi(PredictBatchRequest))
+async def predict_cost_batch(data: PredictBatchRequest = Depends(json_body(PredictBatchRequest))):
+    """
+    Predicts the health insurance premium cost for many inputs in one call.
+
+    - **items**: List of objects with the same fields as the `/predict` request body.
+    - **columns**: Alternatively, a mapping of each field name to a list of values.
+    - **model_version**: Optional model version to use instead of the active one.
+
+    Each input is validated on its own; valid inputs are scored together as a single matrix.
+    Returns the predictions in input order, with `null` and an entry in `errors` for invalid inputs.
+    """
+    loaded = get_model_version(data.model_version)
+    valid_indices = []
+    valid_inputs = []
+    errors = []
+    for index, row in enumerate(data.rows()):
+        try:
+            valid_inputs.append(PredictRequest.model_validate(row).model_dump(exclude={"model_version"}))
+            valid_indices.append(index)
+        except ValidationError as e:
+            errors.append(PredictBatchItemError(
+                index=index,
+                errors=e.errors(include_url=False, include_context=False, include_input=False)
+            ))
 
-    return PredictResponse(cost_prediction=predicted_charges)
+    predictions = await loaded.predict_rows(valid_inputs)
+
+    cost_predictions = [None] * (len(valid_indices) + len(errors))
+    for index, prediction in zip(valid_indices, predictions.tolist()):
+        cost_predictions[index] = prediction
+
+    return ModelJSONResponse(PredictBatchResponse(cost_predictions=cost_predictions, errors=errors,
+                                                  model_version=loaded.version))
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    Streaming response for an endpoint still reading its request body while it responds.
+
+    `StreamingResponse` listens for client disconnects by calling `receive`, which would swallow the request body;
+    here a disconnect is detected instead by the body stream raising `ClientDisconnect`.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@router.post("/predict/stream", response_class=StreamingResponse, summary="Score an NDJSON or CSV Stream",
+             tags=["Prediction"])
+async def predict_cost_stream(request: Request, format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+                              model_version: Optional[str] = None):
+    """
+    Scores an uploaded NDJSON or CSV body of any size as it arrives, streaming NDJSON results back.
+
+    - **format**: `ndjson` (one `/predict` request body per line) or `csv` (a header naming the columns, then one
+      input per row). Defaults to `csv` for a `text/csv` body and `ndjson` otherwise.
+    - **model_version**: Optional model version to use instead of the active one.
+
+    Inputs are scored in chunks of `stream_chunk_size` lines, so memory use does not grow with the input; lines
+    longer than `stream_max_line_bytes` are reported as errors without being buffered.
+    Each input line gives `{"line": n, "cost_prediction": x}` or `{"line": n, "errors": [...]}`, and the last
+    line is a `summary` with the row counts and throughput in rows per second.
+    """
+    loaded = get_model_version(model_version)
+    if format is None:
+        format = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson"
+    lines = aiter_lines(request.stream(), max_line_bytes=settings.stream_max_line_bytes)
+    results = score_stream(lines, loaded.predict_rows, fmt=format, chunk_size=settings.stream_chunk_size)
+    return _DuplexStreamingResponse(results, media_type="application/x-ndjson")
+
+
+@router.get("/predict/stats", response_model=InferenceStatsResponse, summary="Inference Executor Load",
+            tags=["Prediction"])
+async def predict_stats(model_version: Optional[str] = None):
+    """
+    Reports how loaded the inference executor of a model version (the active one by default) is, to help size
+    the number of workers.
+
+    - **queue_depth**: Predictions waiting for a free worker.
+    - **saturation**: Fraction of workers currently busy (1.0 means fully saturated).
+    - **micro_batch_queue_depth**: Requests waiting for the next micro-batch flush, if micro-batching is enabled.
+    - **prediction_cache**: Size and hit/miss/eviction counters of the prediction cache, if it is enabled.
+    """
+    loaded = get_model_version(model_version)
+    return InferenceStatsResponse(
+        model_version=loaded.version,
+        **loaded.executor.stats(),
+        micro_batch_queue_depth=loaded.batcher.queue_depth if loaded.batcher is not None else None,
+        prediction_cache=(CacheStatsResponse(**loaded.prediction_cache.stats())
+                          if loaded.prediction_cache is not None else None),
+    )
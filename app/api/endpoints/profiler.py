@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.api.dependencies import require_admin
+from app.profiling import profiler
+from app.schemas.request_schemas import ProfilerStartRequest
+from app.schemas.response_schemas import ProfilerStatsResponse
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("", response_model=ProfilerStatsResponse, summary="Profiler Status")
+async def profiler_status():
+    """
+    Reports the profiled fraction of requests and how many requests and stack samples were recorded.
+    """
+    return ProfilerStatsResponse(**profiler.stats())
+
+
+@router.post("/start", response_model=ProfilerStatsResponse, summary="Start Profiling")
+async def start_profiling(data: ProfilerStartRequest):
+    """
+    Starts profiling a fraction of the incoming requests.
+
+    - **sample_rate**: Fraction of requests to profile, e.g. 0.01 for one in a hundred.
+    - **clear**: Discard the samples collected so far (default true).
+    """
+    if data.clear:
+        profiler.clear()
+    profiler.sample_rate = data.sample_rate
+    return ProfilerStatsResponse(**profiler.stats())
+
+
+@router.post("/stop", response_model=ProfilerStatsResponse, summary="Stop Profiling")
+async def stop_profiling():
+    """
+    Stops profiling sampled requests; the samples are kept until the next start. Requests sent with the
+    `X-Profile` header are still profiled.
+    """
+    profiler.sample_rate = 0.0
+    return ProfilerStatsResponse(**profiler.stats())
+
+
+@router.get("/flamegraph", response_class=PlainTextResponse, summary="Profile as Folded Stacks")
+async def profiler_flamegraph():
+    """
+    Returns the call stacks sampled during profiled requests in the folded format (one
+    `thread;outer;...;inner count` line per distinct stack), which flamegraph.pl, speedscope and inferno render
+    as a flamegraph.
+    """
+    return PlainTextResponse(profiler.folded_stacks())
+
+
+@router.delete("", status_code=204, summary="Clear Profile")
+async def clear_profile():
+    """
+    Discards the samples collected so far.
+    """
+    profiler.clear()
@@ -1,13 +1,150 @@
-from fastapi import APIRouter, HTTPException
-from app.db_control.crud_user import create_user, get_user_by_id, update_user, delete_user
-from app.schemas.request_schemas import UserCreate, UserUpdate
-from app.schemas.response_schemas import UserResponse
+import base64
+import binascii
+import json
+from contextlib import aclosing
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+from app.api.dependencies import require_admin
+from app.api.serialization import ModelJSONResponse, json_body, json_body_openapi
+from app.config import settings
+from app.db_control import crud_user
+from app.db_control.crud_user import (
+    create_user,
+    get_user_by_id,
+    update_user,
+    delete_user,
+    bulk_create_users,
+    bulk_update_users,
+    bulk_delete_users,
+    stream_users,
+    listing_orders,
+)
+from app.schemas.request_schemas import (
+    UserCreate,
+    UserUpdate,
+    UserBulkCreate,
+    UserBulkUpdate,
+    UserBulkUpdateItem,
+    UserBulkDelete,
+)
+from app.schemas.response_schemas import (
+    UserResponse,
+    UserBulkItemError,
+    UserBulkCreateResponse,
+    UserBulkUpdateResponse,
+    UserBulkDeleteResponse,
+    UserListResponse,
+    CacheStatsResponse,
+)
 
 router = APIRouter()
 
+# Number of users serialized per chunk written to a streamed listing.
+LIST_STREAM_CHUNK_ROWS = 100
+
+
+def _encode_cursor(order_by: str, row) -> str:
+    """Builds the opaque cursor pointing just after `row` in the given order."""
+    if order_by == "id":
+        keys = [row.id]
+    elif order_by == "created_at":
+        keys = [row.created_at.isoformat(), row.id]
+    else:
+        keys = [getattr(row, order_by), row.id]
+    return base64.urlsafe_b64encode(json.dumps([order_by, keys]).encode()).decode()
+
+
+def _decode_cursor(order_by: str, cursor: str) -> tuple:
+    """Parses a cursor built by `_encode_cursor`, raising a 400 error if it is malformed or for another order."""
+    try:
+        cursor_order, keys = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if cursor_order != order_by:
+            raise ValueError("cursor was issued for another order")
+        if order_by == "id":
+            (user_id,) = keys
+            return (int(user_id),)
+        value, user_id = keys
+        if order_by == "created_at":
+            value = datetime.fromisoformat(value)
+        elif order_by == "age":
+            value = int(value)
+        elif not isinstance(value, str):
+            raise ValueError("cursor name is not a string")
+        return value, int(user_id)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+async def _user_page(limit: int, order_by: str, after: Optional[tuple], **filters):
+    """Streams one page of users as a JSON document shaped like `UserListResponse`."""
+    yield '{"users": ['
+    count = 0
+    last = None
+    has_more = False
+    parts = []
+    # One row more than the page size tells whether another page follows.
+    async with aclosing(stream_users(limit + 1, order_by=order_by, after=after, **filters)) as rows:
+        async for row in rows:
+            if count == limit:
+                has_more = True
+                break
+            parts.append(("," if count else "") + json.dumps(
+                {"id": row.id, "name": row.name, "email": row.email, "age": row.age}
+            ))
+            count += 1
+            last = row
+            if len(parts) == LIST_STREAM_CHUNK_ROWS:
+                yield "".join(parts)
+                parts = []
+    parts.append(f'], "next_cursor": {json.dumps(_encode_cursor(order_by, last) if has_more else None)}}}')
+    yield "".join(parts)
+
+
+@router.get("", response_class=StreamingResponse, responses={200: {"model": UserListResponse}},
+            summary="List users", tags=["User"])
+async def list_users_endpoint(limit: int = Query(100, ge=1, le=1000),
+                              cursor: Optional[str] = None,
+                              order_by: Optional[Literal["id", "created_at", "name", "age"]] = None,
+                              email: Optional[str] = None,
+                              name_prefix: Optional[str] = None,
+                              min_age: Optional[int] = Query(None, ge=0),
+                              max_age: Optional[int] = Query(None, ge=0)):
+    """
+    Lists users page by page, streaming the page as it is read from the database.
+
+    - **limit**: Maximum number of users in the page (1 to 1000).
+    - **cursor**: `next_cursor` of the previous page, to fetch the page after it.
+    - **order_by**: `id`, `created_at`, `name` or `age`; a cursor is only valid for the order it was issued with.
+      The filters decide which orders are available: `id` or `created_at` with `email`, `name` with
+      `name_prefix`, `age` with an age range, and `id`, `created_at` or `name` without filters. Defaults to the
+      first of them.
+    - **email**: Only list users with this exact email.
+    - **name_prefix**: Only list users whose name starts with this prefix.
+    - **min_age** / **max_age**: Only list users within this age range.
+
+    Returns the users and the cursor of the next page, or `null` if this is the last page.
+    """
+    orders = listing_orders(email=email, name_prefix=name_prefix, min_age=min_age, max_age=max_age)
+    if order_by is None:
+        order_by = orders[0]
+    elif order_by not in orders:
+        supported = " or ".join(orders)
+        raise HTTPException(status_code=400,
+                            detail=f"order_by={order_by} is not supported with these filters; use {supported}")
+    after = _decode_cursor(order_by, cursor) if cursor is not None else None
+    page = _user_page(limit, order_by, after, email=email, name_prefix=name_prefix, min_age=min_age,
+                      max_age=max_age)
+    return StreamingResponse(page, media_type="application/json")
+
 
-@router.post("/create", response_model=UserResponse, status_code=201, summary="Create a new user", tags=["User"])
-async def create_user_endpoint(user_data: UserCreate):
+@router.post("/create", response_model=UserResponse, status_code=201, summary="Create a new user", tags=["User"],
+             openapi_extra=json_body_openapi(UserCreate))
+async def create_user_endpoint(user_data: UserCreate = Depends(json_body(UserCreate))):
     """
     Creates a new user in the system.
 
@@ -16,7 +153,7 @@ async def create_user_endpoint(user_data: UserCreate):
     - **age**: The user's age (optional).
     """
     try:
-        user = create_user(
+        user = await create_user(
             name=user_data.name,
             email=user_data.email,
             age=user_data.age
@@ -24,7 +161,19 @@ async def create_user_endpoint(user_data: UserCreate):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    return user
+    return ModelJSONResponse(UserResponse.model_validate(user), status_code=201)
+
+
+@router.get("/cache/stats", response_model=Optional[CacheStatsResponse], summary="User cache statistics",
+            tags=["User"], dependencies=[Depends(require_admin)])
+async def user_cache_stats_endpoint():
+    """
+    Reports the size and hit/miss/eviction counters of the user cache, or `null` if it is disabled. Admin only,
+    like the other operational endpoints.
+    """
+    if crud_user.user_cache is None:
+        return None
+    return CacheStatsResponse(**crud_user.user_cache.stats())
 
 
 @router.get("/{user_id}", response_model=UserResponse, summary="Retrieve a user by ID", tags=["User"])
@@ -34,14 +183,15 @@ async def get_user_endpoint(user_id: int):
 
     - **user_id**: The ID of the user you want to retrieve.
     """
-    user = get_user_by_id(user_id)
+    user = await get_user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return ModelJSONResponse(UserResponse.model_validate(user))
 
 
-@router.put("/{user_id}", response_model=UserResponse, summary="Update a user's information", tags=["User"])
-async def update_user_endpoint(user_id: int, user_data: UserUpdate):
+@router.put("/{user_id}", response_model=UserResponse, summary="Update a user's information", tags=["User"],
+            openapi_extra=json_body_openapi(UserUpdate))
+async def update_user_endpoint(user_id: int, user_data: UserUpdate = Depends(json_body(UserUpdate))):
     """
     Updates an existing user's details by ID.
 
@@ -50,7 +200,7 @@ async def update_user_endpoint(user_id: int, user_data: UserUpdate):
     - **email**: Updated email of the user (optional).
     - **age**: Updated age of the user (optional).
     """
-    user = update_user(
+    user = await update_user(
         user_id=user_id,
         name=user_data.name,
         email=user_data.email,
@@ -58,7 +208,7 @@ async def update_user_endpoint(user_id: int, user_data: UserUpdate):
     )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return ModelJSONResponse(UserResponse.model_validate(user))
 
 
 @router.delete("/{user_id}", status_code=204, summary="Delete a user by ID", tags=["User"])
@@ -68,7 +218,81 @@ async def delete_user_endpoint(user_id: int):
 
     - **user_id**: The ID of the user you want to delete.
     """
-    result = delete_user(user_id)
+    result = await delete_user(user_id)
     if not result:
         raise HTTPException(status_code=404, detail="User not found")
     return {"detail": "User deleted successfully"}
+
+
+def _validate_rows(rows: List[Dict[str, Any]], schema) -> Tuple[List[Tuple[int, dict]], List[UserBulkItemError]]:
+    """Validates each row on its own, returning the valid rows with their positions and the errors of the rest."""
+    valid = []
+    errors = []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, schema.model_validate(row).model_dump()))
+        except ValidationError as e:
+            errors.append(UserBulkItemError(
+                index=index,
+                errors=e.errors(include_url=False, include_context=False, include_input=False)
+            ))
+    return valid, errors
+
+
+def _database_errors(valid: List[Tuple[int, dict]], errors: Dict[int, str]) -> List[UserBulkItemError]:
+    """Maps errors reported by the CRUD layer, keyed by position among the valid rows, back to request positions."""
+    return [
+        UserBulkItemError(index=valid[position][0], errors=[{"msg": message}])
+        for position, message in errors.items()
+    ]
+
+
+@router.post("/bulk/create", response_model=UserBulkCreateResponse, status_code=201,
+             summary="Create many users", tags=["User"])
+async def bulk_create_users_endpoint(data: UserBulkCreate):
+    """
+    Creates many users in a single transaction.
+
+    - **users**: List of objects with the same fields as the `/create` request body.
+
+    Each entry is validated on its own; valid entries are inserted in chunks with one statement per chunk.
+    Returns the created users in request order and the errors of rejected entries.
+    """
+    valid, errors = _validate_rows(data.users, UserCreate)
+    created, db_errors = await bulk_create_users([row for _, row in valid], chunk_size=settings.bulk_chunk_size)
+
+    errors.extend(_database_errors(valid, db_errors))
+    errors.sort(key=lambda error: error.index)
+    users = [UserResponse.model_validate(created[position]) for position in sorted(created)]
+    return UserBulkCreateResponse(users=users, errors=errors)
+
+
+@router.put("/bulk/update", response_model=UserBulkUpdateResponse, summary="Update many users", tags=["User"])
+async def bulk_update_users_endpoint(data: UserBulkUpdate):
+    """
+    Updates many users in a single transaction.
+
+    - **users**: List of objects with the `id` of the user to update and any of `name`, `email` and `age`.
+
+    Missing or null fields are left unchanged. Returns the ids of the updated users and the errors of rejected
+    entries, including ids that do not exist.
+    """
+    valid, errors = _validate_rows(data.users, UserBulkUpdateItem)
+    updated_ids, db_errors = await bulk_update_users([row for _, row in valid], chunk_size=settings.bulk_chunk_size)
+
+    errors.extend(_database_errors(valid, db_errors))
+    errors.sort(key=lambda error: error.index)
+    return UserBulkUpdateResponse(updated_ids=updated_ids, errors=errors)
+
+
+@router.post("/bulk/delete", response_model=UserBulkDeleteResponse, summary="Delete many users", tags=["User"])
+async def bulk_delete_users_endpoint(data: UserBulkDelete):
+    """
+    Deletes many users in a single transaction.
+
+    - **ids**: IDs of the users to delete.
+
+    Returns the ids that were deleted and those that did not exist.
+    """
+    deleted_ids, not_found_ids = await bulk_delete_users(data.ids, chunk_size=settings.bulk_chunk_size)
+    return UserBulkDeleteResponse(deleted_ids=deleted_ids, not_found_ids=not_found_ids)
@@ -0,0 +1,104 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class CacheBackend(ABC):
+    """
+    Interface of the key-value stores used by the application caches.
+
+    The in-process `LRUCache` is the default; a shared store (e.g. Redis) can be plugged in by
+    implementing these methods.
+    """
+
+    @abstractmethod
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the value stored under `key`, or `default` if it is missing or expired."""
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any):
+        """Stores `value` under `key`."""
+
+    @abstractmethod
+    def delete(self, key: Hashable):
+        """Removes `key` if present."""
+
+    @abstractmethod
+    def clear(self):
+        """Removes every entry."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Returns usage counters of the cache."""
+
+
+class LRUCache(CacheBackend):
+    """
+    Thread-safe, bounded, in-process cache with least-recently-used eviction and an optional TTL.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: Optional[float] = None,
+                 timer: Callable[[], float] = time.monotonic):
+        """
+        Parameters:
+            max_entries (int): Number of entries kept before the least recently used one is evicted.
+            ttl_seconds (Optional[float]): Lifetime of an entry, or None for entries that never expire.
+            timer (Callable[[], float]): Clock used for expiry, in seconds.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.timer = timer
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > self.timer():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        expires_at = None if self.ttl_seconds is None else self.timer() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
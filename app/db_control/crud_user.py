@@ -1,12 +1,30 @@
-from typing import Optional
+import sys
+from collections import defaultdict, deque
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
+from sqlalchemy import Select, select, insert, update, delete, tuple_
+from sqlalchemy.engine import Row
+
+from app.cache import LRUCache
+from app.config import settings
 from app.db_control.session import session_scope
 from app.db_control.models import User
+from app.db_control.user_cache import UserCache
+from app.metrics import db_query_seconds
+
+user_cache = UserCache(
+    LRUCache(max_entries=settings.user_cache_max_entries, ttl_seconds=settings.user_cache_ttl_seconds)
+) if settings.user_cache_enabled else None
+
 
+def _invalidate_cache(user_ids):
+    if user_cache is not None:
+        user_cache.invalidate(user_ids)
 
-def create_user(name: str, email: str, age: int = None):
+
+async def create_user(name: str, email: str, age: int = None):
     """
-    Creates a new user in the database.
+    Creates a new user in the database with a single INSERT ... RETURNING statement.
 
     Args:
     name (str): The name of the user.
@@ -19,27 +37,21 @@ def create_user(name: str, email: str, age: int = None):
     Raises:
     Exception: If the user could not be created due to a database error or constraint violation.
     """
+    statement = insert(User).values(name=name, email=email, age=age).returning(User)
 
-    new_user = User(
-        name=name,
-        email=email,
-        age=age
-    )
-
-    with session_scope() as session:
-        session.add(new_user)
-        try:
-            session.flush()
-            session.refresh(new_user)
-        except Exception as e:
-            raise e
+    with db_query_seconds.time(("create_user",)):
+        async with session_scope() as session:
+            result = await session.scalars(statement)
+            user = result.one()
 
-    return new_user
+    # The new ID may have been cached as not found.
+    _invalidate_cache([user.id])
+    return user
 
 
-def get_user_by_id(user_id: int) -> Optional[User]:
+async def get_user_by_id(user_id: int) -> Optional[User]:
     """
-    Retrieves a user by ID.
+    Retrieves a user by ID, from the user cache when it holds the ID.
 
     Args:
     user_id (int): The ID of the user.
@@ -47,14 +59,26 @@ def get_user_by_id(user_id: int) -> Optional[User]:
     Returns:
     Optional[User]: The User object if found, otherwise None.
     """
-    with session_scope() as session:
-        return session.query(User).filter(User.id == user_id).first()
+    if user_cache is not None:
+        cached, user = user_cache.lookup(user_id)
+        if cached:
+            return user
+        version = user_cache.version
+
+    with db_query_seconds.time(("get_user_by_id",)):
+        async with session_scope() as session:
+            result = await session.execute(select(User).where(User.id == user_id))
+            user = result.scalars().first()
+
+    if user_cache is not None:
+        user_cache.fill(user_id, user, version)
+    return user
 
 
-def update_user(user_id: int, name: Optional[str] = None, email: Optional[str] = None,
-                age: Optional[int] = None) -> Optional[User]:
+async def update_user(user_id: int, name: Optional[str] = None, email: Optional[str] = None,
+                      age: Optional[int] = None) -> Optional[User]:
     """
-    Updates an existing user's details.
+    Updates an existing user's details with a single UPDATE ... RETURNING statement.
 
     Args:
     user_id (int): The ID of the user to update.
@@ -65,30 +89,31 @@ def update_user(user_id: int, name: Optional[str] = None, email: Optional[str] =
     Returns:
     Optional[User]: The updated User object if found, otherwise None.
     """
-    with session_scope() as session:
-        user = session.query(User).filter(User.id == user_id).first()
-        if user is None:
-            return None
+    values = {key: value for key, value in (("name", name), ("email", email), ("age", age)) if value is not None}
+    if not values:
+        return await get_user_by_id(user_id)
 
-        if name is not None:
-            user.name = name
-        if email is not None:
-            user.email = email
-        if age is not None:
-            user.age = age
+    statement = (
+        update(User)
+        .where(User.id == user_id)
+        .values(**values)
+        .returning(User)
+        # Nothing is loaded in the session yet, so there are no in-memory objects to synchronize.
+        .execution_options(synchronize_session=False)
+    )
 
-        try:
-            session.flush()
-            session.refresh(user)
-        except Exception as e:
-            raise e
+    with db_query_seconds.time(("update_user",)):
+        async with session_scope() as session:
+            result = await session.scalars(statement)
+            user = result.first()
 
-        return user
+    _invalidate_cache([user_id])
+    return user
 
 
-def delete_user(user_id: int) -> bool:
+async def delete_user(user_id: int) -> bool:
     """
-    Deletes a user by ID.
+    Deletes a user by ID with a single DELETE ... RETURNING statement.
 
     Args:
     user_id (int): The ID of the user to delete.
@@ -96,16 +121,257 @@ def delete_user(user_id: int) -> bool:
     Returns:
     bool: True if the user was deleted, False if the user was not found.
     """
-    with session_scope() as session:
-        user = session.query(User).filter(User.id == user_id).first()
-        if user is None:
-            return False
+    statement = delete(User).where(User.id == user_id).returning(User.id)
+
+    with db_query_seconds.time(("delete_user",)):
+        async with session_scope() as session:
+            result = await session.execute(statement)
+            deleted = result.first() is not None
+
+    _invalidate_cache([user_id])
+    return deleted
+
+
+def listing_orders(email: Optional[str] = None, name_prefix: Optional[str] = None, min_age: Optional[int] = None,
+                   max_age: Optional[int] = None) -> Tuple[str, ...]:
+    """
+    Returns the orders in which users matching the filters can be listed, the default one first.
+
+    The listing is served by the index of its most selective filter (email, then name prefix, then age range)
+    read in order, so it only supports the orders that index keeps: any other one would need a sort step.
+    Ordering by age needs an age filter, as users without an age cannot be resumed from a cursor.
+
+    Args:
+    email (Optional[str]): Exact email filter.
+    name_prefix (Optional[str]): Name prefix filter.
+    min_age (Optional[int]): Lower bound of the age filter.
+    max_age (Optional[int]): Upper bound of the age filter.
+
+    Returns:
+    Tuple[str, ...]: Supported values of `order_by`.
+    """
+    if email is not None:
+        return "id", "created_at"
+    if name_prefix:
+        return ("name",)
+    if min_age is not None or max_age is not None:
+        return ("age",)
+    return "id", "created_at", "name"
 
-        session.delete(user)
 
-        try:
-            session.flush()
-        except Exception as e:
-            raise e
+def _prefix_upper_bound(prefix: str) -> Optional[str]:
+    """Returns the smallest string greater than every string starting with `prefix`, None if there is none."""
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _listing_statement(limit: int, order_by: str = "id", after: Optional[tuple] = None, email: Optional[str] = None,
+                       name_prefix: Optional[str] = None, min_age: Optional[int] = None,
+                       max_age: Optional[int] = None) -> Select:
+    """Builds the query of `stream_users`, raising ValueError for an order the filters do not support."""
+    if order_by not in listing_orders(email, name_prefix, min_age, max_age):
+        raise ValueError(f"Unsupported order with these filters: {order_by}")
+    keys = (getattr(User, order_by), User.id) if order_by != "id" else (User.id,)
+
+    statement = select(User.id, User.name, User.email, User.age, User.created_at)
+    if email is not None:
+        statement = statement.where(User.email == email)
+    if name_prefix:
+        # A range rather than LIKE, so an ordinary index on name can serve it on every backend.
+        statement = statement.where(User.name >= name_prefix)
+        upper_bound = _prefix_upper_bound(name_prefix)
+        if upper_bound is not None:
+            statement = statement.where(User.name < upper_bound)
+    if min_age is not None:
+        statement = statement.where(User.age >= min_age)
+    if max_age is not None:
+        statement = statement.where(User.age <= max_age)
+    if after is not None:
+        statement = statement.where(tuple_(*keys) > tuple_(*after))
+    return statement.order_by(*keys).limit(limit)
+
+
+async def stream_users(limit: int, order_by: str = "id", after: Optional[tuple] = None, email: Optional[str] = None,
+                       name_prefix: Optional[str] = None, min_age: Optional[int] = None,
+                       max_age: Optional[int] = None) -> AsyncIterator[Row]:
+    """
+    Streams users matching the filters in keyset order, without loading them as ORM objects.
+
+    Args:
+    limit (int): Maximum number of users returned.
+    order_by (str): "id" to order by id, or "created_at", "name" or "age" to order by that column and id. Must
+    be one of the `listing_orders` of the filters.
+    after (Optional[tuple]): Keyset of the last user of the previous page: (id,) or (value of order_by, id).
+    email (Optional[str]): Only return users with this exact email.
+    name_prefix (Optional[str]): Only return users whose name starts with this prefix.
+    min_age (Optional[int]): Only return users at least this old.
+    max_age (Optional[int]): Only return users at most this old.
+
+    Yields:
+    Row: Rows with `id`, `name`, `email`, `age` and `created_at` columns.
+
+    Raises:
+    ValueError: If the filters do not support `order_by`.
+    """
+    statement = _listing_statement(limit, order_by, after, email, name_prefix, min_age, max_age)
+
+    async with session_scope() as session:
+        # Only running the query is timed, not the time the caller spends consuming the rows.
+        with db_query_seconds.time(("stream_users",)):
+            result = await session.stream(statement)
+        async for row in result:
+            yield row
+
+
+def _chunks(items: list, chunk_size: int):
+    """Yields (offset, chunk) pairs splitting `items` into lists of at most `chunk_size` elements."""
+    for offset in range(0, len(items), chunk_size):
+        yield offset, items[offset:offset + chunk_size]
+
+
+def _match_inserted(rows: List[dict], offset: int, users: List[User]) -> Dict[int, User]:
+    """
+    Matches the users returned by a multi-row INSERT ... RETURNING to the positions of their rows.
+
+    Neither SQLAlchemy nor the database guarantees that RETURNING rows come back in row order, so each user is
+    matched on its name, email and age. Rows that share all three are interchangeable, and get their users in
+    the order they were returned.
+
+    Args:
+    rows (List[dict]): The inserted rows.
+    offset (int): Position of the first row in the whole request.
+    users (List[User]): The users returned by the statement.
+
+    Returns:
+    Dict[int, User]: The users keyed by the position of their row.
+    """
+    positions = defaultdict(deque)
+    for index, row in enumerate(rows, start=offset):
+        positions[(row["name"], row["email"], row.get("age"))].append(index)
+    return {positions[(user.name, user.email, user.age)].popleft(): user for user in users}
+
+
+async def bulk_create_users(users: List[dict], chunk_size: int = 500) -> Tuple[Dict[int, User], Dict[int, str]]:
+    """
+    Creates many users in a single transaction.
+
+    Each chunk of `chunk_size` rows is written with one multi-row INSERT ... RETURNING statement. If a chunk
+    fails, its rows are retried one by one so that only the offending rows are rejected.
+
+    Args:
+    users (List[dict]): Rows with `name`, `email` and `age` keys.
+    chunk_size (int): Number of rows written per statement.
+
+    Returns:
+    Tuple[Dict[int, User], Dict[int, str]]: The created users and the error messages of rejected rows,
+    both keyed by the row's position in `users`.
+    """
+    created = {}
+    errors = {}
+    # Asking SQLAlchemy to keep RETURNING rows in parameter order makes it fall back to one INSERT per row on
+    # SQLite, so the returned users are matched back to their rows by content instead (see `_match_inserted`).
+    statement = insert(User).returning(User)
+
+    with db_query_seconds.time(("bulk_create_users",)):
+        async with session_scope() as session:
+            for offset, chunk in _chunks(users, chunk_size):
+                try:
+                    async with session.begin_nested():
+                        chunk_users = (await session.scalars(statement, chunk)).all()
+                except Exception:
+                    # Retry row by row to find out which rows were rejected.
+                    for index, row in enumerate(chunk, start=offset):
+                        try:
+                            async with session.begin_nested():
+                                created[index] = (await session.scalars(statement, [row])).one()
+                        except Exception as e:
+                            errors[index] = str(e)
+                else:
+                    created.update(_match_inserted(chunk, offset, chunk_users))
+
+    _invalidate_cache(user.id for user in created.values())
+    return created, errors
+
+
+async def bulk_update_users(users: List[dict], chunk_size: int = 500) -> Tuple[List[int], Dict[int, str]]:
+    """
+    Updates many users in a single transaction.
+
+    Each chunk costs one SELECT of the existing ids plus one executemany UPDATE by primary key. Fields that
+    are missing or None are left unchanged, as in `update_user`.
+
+    Args:
+    users (List[dict]): Rows with an `id` key and any of `name`, `email` and `age`.
+    chunk_size (int): Number of rows written per statement.
+
+    Returns:
+    Tuple[List[int], Dict[int, str]]: The ids of the updated users and the error messages of rejected rows,
+    keyed by the row's position in `users`.
+    """
+    updated = []
+    errors = {}
+
+    with db_query_seconds.time(("bulk_update_users",)):
+        async with session_scope() as session:
+            for offset, chunk in _chunks(users, chunk_size):
+                ids = [row["id"] for row in chunk]
+                existing = set((await session.scalars(select(User.id).where(User.id.in_(ids)))).all())
+
+                rows = []
+                for index, row in enumerate(chunk, start=offset):
+                    if row["id"] not in existing:
+                        errors[index] = "User not found"
+                        continue
+                    values = {key: value for key, value in row.items() if value is not None}
+                    if len(values) == 1:
+                        # Nothing to change besides the id.
+                        updated.append(row["id"])
+                    else:
+                        rows.append((index, values))
+
+                if not rows:
+                    continue
+                try:
+                    async with session.begin_nested():
+                        await session.execute(update(User), [values for _, values in rows])
+                except Exception:
+                    # Retry row by row to find out which rows were rejected.
+                    for index, values in rows:
+                        try:
+                            async with session.begin_nested():
+                                await session.execute(update(User), [values])
+                        except Exception as e:
+                            errors[index] = str(e)
+                        else:
+                            updated.append(values["id"])
+                else:
+                    updated.extend(values["id"] for _, values in rows)
+
+    _invalidate_cache(updated)
+    return updated, errors
+
+
+async def bulk_delete_users(user_ids: List[int], chunk_size: int = 500) -> Tuple[List[int], List[int]]:
+    """
+    Deletes many users in a single transaction, with one DELETE ... RETURNING statement per chunk.
+
+    Args:
+    user_ids (List[int]): IDs of the users to delete.
+    chunk_size (int): Number of ids deleted per statement.
+
+    Returns:
+    Tuple[List[int], List[int]]: The ids that were deleted and the ids that were not found.
+    """
+    deleted = []
+
+    with db_query_seconds.time(("bulk_delete_users",)):
+        async with session_scope() as session:
+            for _, chunk in _chunks(user_ids, chunk_size):
+                result = await session.scalars(delete(User).where(User.id.in_(chunk)).returning(User.id))
+                deleted.extend(result.all())
 
-        return True
+    _invalidate_cache(deleted)
+    deleted_set = set(deleted)
+    return deleted, [user_id for user_id in user_ids if user_id not in deleted_set]
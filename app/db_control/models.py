@@ -1,7 +1,11 @@
 from datetime import datetime, UTC
 
 from app.db_control.session import Base
-from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy import Column, String, Integer, DateTime, Index
+
+
+def utc_now() -> datetime:
+    return datetime.now(UTC)
 
 
 class User(Base):
@@ -11,8 +15,19 @@ class User(Base):
     name = Column(String(255), nullable=False)
     email = Column(String(255), nullable=False)
     age = Column(Integer, nullable=True)
-    created_at = Column(DateTime, default=datetime.now(UTC), nullable=False)
-    updated_at = Column(DateTime, default=datetime.now(UTC), onupdate=datetime.now(UTC), nullable=False)
+    created_at = Column(DateTime, default=utc_now, nullable=False)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now, nullable=False)
+
+    # Indexes backing the filters and keyset orderings of the user listing (see `crud_user.listing_orders`). The
+    # id is appended so each filter can be range-scanned in (value, id) order and resumed from a cursor without
+    # sorting.
+    __table_args__ = (
+        Index("ix_users_email_id", "email", "id"),
+        Index("ix_users_email_created_at_id", "email", "created_at", "id"),
+        Index("ix_users_name_id", "name", "id"),
+        Index("ix_users_age_id", "age", "id"),
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     def __repr__(self):
         return f"<User(id={self.id}, name={self.name}, email={self.email})>"
@@ -1,33 +1,107 @@
-import os
-from contextlib import contextmanager
+from contextlib import asynccontextmanager
+from typing import Dict, Union
 
-from sqlalchemy import create_engine
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 
-SQLITE_DATABASE_URL = f"sqlite:///{os.path.dirname(os.path.abspath(__file__))}/../../user.db"
+from app.config import settings, Settings
 
-engine = create_engine(
-    SQLITE_DATABASE_URL, echo=True, connect_args={"check_same_thread": False}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
-# Create a scoped session
-Session = scoped_session(SessionLocal)
+def sqlite_pragmas(config: Settings) -> Dict[str, Union[str, int]]:
+    """
+    Returns the PRAGMAs set on every SQLite connection by the configured engine profile.
+
+    Parameters:
+        config (Settings): Application settings holding the SQLite profile and its options.
+
+    Returns:
+        Dict[str, Union[str, int]]: PRAGMA names and values, empty for the "default" profile.
+    """
+    if config.database_sqlite_profile == "default":
+        return {}
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": config.database_sqlite_mmap_size,
+        "busy_timeout": config.database_sqlite_busy_timeout_ms,
+    }
+
+
+def _set_pragmas_on_connect(engine: AsyncEngine, pragmas: Dict[str, Union[str, int]]):
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_engine_from_settings(config: Settings) -> AsyncEngine:
+    """
+    Creates the async engine described by the database settings.
+
+    Parameters:
+        config (Settings): Application settings holding the database URL and pool options.
+
+    Returns:
+        AsyncEngine: Engine with a connection pool of `database_pool_size` connections plus up to
+        `database_max_overflow` temporary ones, pinging connections before use if `database_pool_pre_ping`.
+        SQLite connections are set up according to `database_sqlite_profile`.
+    """
+    url = make_url(config.database_url)
+    connect_args = {}
+    pragmas = {}
+    if url.get_backend_name() == "sqlite":
+        connect_args["check_same_thread"] = False
+        if url.database in (None, "", ":memory:"):
+            # An in-memory database only exists on its one connection.
+            return create_async_engine(url, echo=config.database_echo, poolclass=StaticPool,
+                                       connect_args=connect_args)
+        pragmas = sqlite_pragmas(config)
+        if pragmas:
+            connect_args["cached_statements"] = config.database_sqlite_statement_cache_size
+
+    engine = create_async_engine(
+        url,
+        echo=config.database_echo,
+        # SQLAlchemy does not pool aiosqlite connections by default; use a real pool for every backend.
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=config.database_pool_size,
+        max_overflow=config.database_max_overflow,
+        pool_timeout=config.database_pool_timeout,
+        pool_pre_ping=config.database_pool_pre_ping,
+        connect_args=connect_args,
+    )
+    if pragmas:
+        _set_pragmas_on_connect(engine, pragmas)
+    return engine
+
+
+engine = create_engine_from_settings(settings)
+AsyncSessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
 
-@contextmanager
-def session_scope():
+async def create_tables():
+    """Creates the tables of every model. Not for production, where a migration tool should be used."""
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+
+@asynccontextmanager
+async def session_scope():
     """Provide a transactional scope around a series of operations."""
-    session = Session()
+    session = AsyncSessionLocal()
     try:
         yield session
-        session.commit()
+        await session.commit()
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         print(f"SQLAlchemy error: {e}")
         raise
     finally:
-        session.close()
+        await session.close()
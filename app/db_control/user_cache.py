@@ -0,0 +1,57 @@
+from typing import Any, Iterable, Optional, Tuple
+
+from app.cache import CacheBackend
+
+# Returned by the backend for keys it does not hold; distinct from a cached None (a user known not to exist).
+_MISSING = object()
+
+
+class UserCache:
+    """
+    Read-through cache of users by ID, including negative entries for IDs that do not exist.
+
+    Writers call `invalidate` after committing. Readers take `version` before querying the database and pass
+    it to `fill`, which skips storing the result if any invalidation happened in between, so a read racing
+    with a write can never put the pre-write row back into the cache.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        """
+        Parameters:
+            backend (CacheBackend): Store holding the cached users.
+        """
+        self.backend = backend
+        self.version = 0
+
+    def lookup(self, user_id: int) -> Tuple[bool, Optional[Any]]:
+        """
+        Looks a user up in the cache.
+
+        Returns:
+            Tuple[bool, Optional[Any]]: Whether the ID was cached, and the cached user (None if it is known
+            not to exist).
+        """
+        user = self.backend.get(user_id, _MISSING)
+        if user is _MISSING:
+            return False, None
+        return True, user
+
+    def fill(self, user_id: int, user: Optional[Any], version: int):
+        """Caches the result of a database read that started at `version`, unless a write happened since."""
+        if version == self.version:
+            self.backend.set(user_id, user)
+
+    def invalidate(self, user_ids: Iterable[int]):
+        """Drops the given IDs after they were written."""
+        self.version += 1
+        for user_id in user_ids:
+            self.backend.delete(user_id)
+
+    def clear(self):
+        """Drops every cached user."""
+        self.version += 1
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        """Returns the usage counters of the backend."""
+        return self.backend.stats()
@@ -1,15 +1,48 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.db_control import models
-from app.db_control.session import engine
+from app.db_control import models, session  # noqa: F401 - importing models registers its tables on Base
+
+from app import startup
+from app.api.serialization import DefaultJSONResponse
+from app.api.endpoints import user, predict, health, metrics as metrics_endpoint, models as model_versions, profiler
+from app.config import settings
+from app.metrics import MetricsMiddleware
+from app.profiling import ProfilingMiddleware
+
 
-from app.api.endpoints import user, predict
+async def run_in_background():
+    """Starts the application, then keeps watching the model registry directory if one is configured."""
+    await startup.initialize()
+    if startup.state.ready and settings.model_registry_dir is not None:
+        await predict.registry.watch(settings.model_registry_dir, settings.model_registry_poll_seconds)
 
-# Not for production, only for development. For production, a migration tool should be used.
-models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start-up runs in the background: the server accepts connections, and answers liveness checks, while the
+    # model loads, and `/api/ready` tells when it can take traffic.
+    startup.state.reset()
+    background = asyncio.create_task(run_in_background())
+    yield
+    startup.state.status = startup.STOPPING
+    # Cancels the model loading and warm-up, but lets the table creation finish: disposing of the engine under it
+    # would orphan its aiosqlite connection thread, and the process would never exit.
+    background.cancel()
+    with suppress(asyncio.CancelledError):
+        await background
+    if startup.state.tables is not None:
+        with suppress(Exception):
+            await startup.state.tables
+    # Release the inference pools; they are recreated on demand if the app is started again.
+    predict.registry.shutdown()
+    await session.engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=DefaultJSONResponse)
 
 # Configure CORS middleware
 app.add_middleware(
@@ -20,12 +53,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profile the sampled fraction of requests
+app.add_middleware(ProfilingMiddleware)
+
+# Record request latencies and requests in flight
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 # Include the user router
 app.include_router(user.router, prefix="/api/users", tags=["User"])
 
 # Include the predict router
 app.include_router(predict.router)
 
+# Include the model registry admin router
+app.include_router(model_versions.router, prefix="/api/models", tags=["Model"])
+
+# Include the profiler admin router
+app.include_router(profiler.router, prefix="/api/profiler", tags=["Profiler"])
+
+# Include the liveness and readiness probes
+app.include_router(health.router, prefix="/api", tags=["Health"])
+
+# Include the metrics router
+if settings.metrics_enabled:
+    app.include_router(metrics_endpoint.router)
+
 
 @app.get("/api/healthcheck")
 async def health_check():
@@ -34,7 +87,7 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    # Configure server settings
+    # Development server, reloading on code changes; run `python -m app.server` in production.
     uvicorn_config = uvicorn.Config(app=app,
                                     host="0.0.0.0",
                                     port=5001,
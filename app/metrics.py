@@ -0,0 +1,243 @@
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Sequence, Tuple
+
+from app.config import settings
+
+# Media type of the Prometheus text exposition format served by GET /metrics.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds, in seconds, of the histogram buckets of request latencies and of in-process prediction stages.
+REQUEST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", r"\\").replace('"', r'\"').replace("\n", r"\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class _Metric(ABC):
+    """Base of the metric types: a named family of samples, one per combination of label values."""
+
+    type = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _check_labels(self, labels: Tuple[str, ...]):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """Returns the (name suffix, formatted labels, value) samples of the metric."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples())
+        return "\n".join(lines)
+
+    @abstractmethod
+    def clear(self):
+        """Removes every sample."""
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, such as the number of requests in flight."""
+
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, labels: Tuple[str, ...] = ()):
+        if not self.registry.enabled:
+            return
+        self._check_labels(labels)
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labels: Tuple[str, ...] = ()):
+        self.inc(-amount, labels)
+
+    def get(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        if not values and not self.labelnames:
+            values = [((), 0.0)]
+        return [("", _format_labels(self.labelnames, labels), value) for labels, value in values]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class _Timer:
+    """Context manager observing the time spent in its block."""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, self.labels)
+
+
+class Histogram(_Metric):
+    """Counts observations (e.g. durations in seconds) in cumulative buckets, with their sum and count."""
+
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = REQUEST_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: observations per bucket (the last one is +Inf, not cumulative) and their sum.
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()):
+        if not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                self._check_labels(labels)
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, labels: Tuple[str, ...] = ()) -> _Timer:
+        """Returns a context manager observing the duration of its block, in seconds."""
+        return _Timer(self, labels)
+
+    def count(self, labels: Tuple[str, ...] = ()) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series is not None else 0
+
+    def samples(self):
+        with self._lock:
+            series = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        samples = []
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append(("_bucket", _format_labels(self.labelnames + ("le",), labels + (_format_value(bound),)),
+                                cumulative))
+            formatted = _format_labels(self.labelnames, labels)
+            samples.append(("_sum", formatted, total))
+            samples.append(("_count", formatted, cumulative))
+        return samples
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """
+    Collection of the application's metrics, rendered in the Prometheus text exposition format.
+
+    Metrics live in the process that records them: with several server processes, each one serves its own.
+    While `enabled` is False, recording is a no-op.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = REQUEST_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets=buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+    def clear(self):
+        """Resets every metric."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency of every HTTP request, labelled by method, route template and status
+    code, and the number of requests in flight. Streaming responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            # The router stores the matched route in the scope; unmatched paths share one label to bound
+            # the number of series.
+            route = scope.get("route")
+            http_request_seconds.observe(time.perf_counter() - start,
+                                         (scope["method"], getattr(route, "path", "unmatched"), status))
+
+
+registry = MetricsRegistry(enabled=settings.metrics_enabled)
+
+http_request_seconds = registry.histogram(
+    "ml_service_http_request_duration_seconds", "Latency of HTTP requests.", ("method", "route", "status"))
+http_requests_in_flight = registry.gauge(
+    "ml_service_http_requests_in_flight", "HTTP requests being processed.")
+prediction_stage_seconds = registry.histogram(
+    "ml_service_prediction_stage_duration_seconds",
+    "Time spent per prediction stage: input validation, feature transformation and model prediction.",
+    ("stage",), buckets=STAGE_BUCKETS)
+db_query_seconds = registry.histogram(
+    "ml_service_db_query_duration_seconds", "Time spent in database queries, per user operation.", ("operation",))
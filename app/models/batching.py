@@ -0,0 +1,100 @@
+import asyncio
+import inspect
+from typing import Awaitable, Callable, List, Optional, Sequence, Set, Tuple, Union
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single predictions into vectorized batches.
+
+    Callers `await submit(input_data)`; the input is queued and the queue is flushed through
+    `predict_batch` as soon as it holds `max_batch_size` inputs or the oldest input has waited
+    `max_wait_ms` milliseconds, whichever comes first. Each caller's future is then resolved with
+    its own prediction, so at most `max_wait_ms` of latency is traded for fewer, larger model calls.
+    """
+
+    def __init__(self,
+                 predict_batch: Callable[[List[dict]], Union[Sequence[float], Awaitable[Sequence[float]]]],
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        """
+        Parameters:
+            predict_batch (Callable): Scores a list of inputs, returning (or, if it is a coroutine function,
+                                      resolving to) one prediction per input in order.
+            max_batch_size (int): Number of queued inputs that triggers an immediate flush.
+            max_wait_ms (float): Longest time an input waits in the queue before it is flushed.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative")
+
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.batches_flushed = 0
+        self.items_flushed = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of inputs waiting for the next flush."""
+        return len(self._pending)
+
+    async def submit(self, input_data: dict) -> float:
+        """
+        Queues a single input and waits for its prediction.
+
+        Parameters:
+            input_data (dict): Input accepted by `predict_batch`.
+
+        Returns:
+            float: The prediction for `input_data`.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((input_data, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Takes every queued input as one batch and starts scoring it."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        # Callers that were cancelled while waiting no longer need a prediction.
+        batch = [(input_data, future) for input_data, future in batch if not future.done()]
+        if not batch:
+            return
+
+        self.batches_flushed += 1
+        self.items_flushed += len(batch)
+        task = asyncio.ensure_future(self._score(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, batch: List[Tuple[dict, asyncio.Future]]):
+        """Runs `predict_batch` on a flushed batch and resolves the waiting futures."""
+        try:
+            predictions = self.predict_batch([input_data for input_data, _ in batch])
+            if inspect.isawaitable(predictions):
+                predictions = await predictions
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), prediction in zip(batch, predictions):
+            if not future.done():
+                future.set_result(float(prediction))
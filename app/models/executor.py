@@ -0,0 +1,161 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+from threadpoolctl import threadpool_limits
+
+from app.models.model_loader import predict_insurance_charges, predict_insurance_charges_batch
+
+BACKENDS = ("inline", "thread", "process")
+
+# Name prefix of the threads of the "thread" backend's pool.
+THREAD_NAME_PREFIX = "inference"
+
+# Model loaded into a process pool worker by `_init_worker`.
+_worker_model = None
+_worker_poly = None
+
+
+def _limit_blas_threads(blas_threads: Optional[int]):
+    """Pins the number of threads used by BLAS libraries in the current process."""
+    if blas_threads is not None:
+        threadpool_limits(limits=blas_threads, user_api="blas")
+
+
+def _init_worker(model, poly, blas_threads: Optional[int]):
+    """Process pool initializer: keeps the model in the worker so tasks only ship their inputs."""
+    global _worker_model, _worker_poly
+    _worker_model, _worker_poly = model, poly
+    _limit_blas_threads(blas_threads)
+
+
+def _worker_predict(input_data: dict) -> float:
+    return predict_insurance_charges(_worker_model, _worker_poly, input_data)
+
+
+def _worker_predict_batch(features: np.ndarray) -> np.ndarray:
+    return predict_insurance_charges_batch(_worker_model, _worker_poly, features)
+
+
+class InferenceExecutor:
+    """
+    Runs model inference on a selectable backend so CPU-bound work does not block the event loop.
+
+    - "inline" runs predictions directly on the event loop (lowest overhead, blocks other requests).
+    - "thread" runs them on a thread pool sharing the loaded model.
+    - "process" runs them on a process pool; each worker receives the model once, at start-up.
+
+    Pools are created on first use and can be shut down and recreated, so the executor can follow
+    the application's lifespan.
+    """
+
+    def __init__(self, model, poly, backend: str = "thread", max_workers: Optional[int] = None,
+                 blas_threads: Optional[int] = None):
+        """
+        Parameters:
+            model: Loaded regression model (or compiled equivalent).
+            poly: Loaded polynomial features transformer.
+            backend (str): One of "inline", "thread" or "process".
+            max_workers (Optional[int]): Pool size; defaults to the number of CPUs.
+            blas_threads (Optional[int]): Number of BLAS threads per process, or None to leave the default.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend: {backend}")
+
+        self.model = model
+        self.poly = poly
+        self.backend = backend
+        self.max_workers = 1 if backend == "inline" else (max_workers or os.cpu_count() or 1)
+        self.blas_threads = blas_threads
+
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        if backend != "process":
+            _limit_blas_threads(blas_threads)
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.backend == "thread":
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix=THREAD_NAME_PREFIX)
+                else:
+                    # Spawned workers avoid forking a process that already runs the event loop and threads.
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=_init_worker,
+                                                     initargs=(self.model, self.poly, self.blas_threads))
+            return self._pool
+
+    async def _run(self, local_func, worker_func, arg):
+        self._in_flight += 1
+        try:
+            if self.backend == "inline":
+                return local_func(arg)
+            loop = asyncio.get_running_loop()
+            if self.backend == "thread":
+                return await loop.run_in_executor(self._get_pool(), local_func, arg)
+            return await loop.run_in_executor(self._get_pool(), worker_func, arg)
+        finally:
+            self._in_flight -= 1
+
+    async def predict(self, input_data: dict) -> float:
+        """
+        Predicts insurance charges for a single input on the configured backend.
+
+        Parameters:
+            input_data (dict): Input accepted by `predict_insurance_charges`.
+
+        Returns:
+            float: Predicted insurance charges.
+        """
+        return await self._run(self._predict, _worker_predict, input_data)
+
+    async def predict_batch(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predicts insurance charges for a feature matrix on the configured backend.
+
+        Parameters:
+            features (np.ndarray): Matrix as built by `build_feature_matrix`.
+
+        Returns:
+            np.ndarray: One prediction per row.
+        """
+        return await self._run(self._predict_batch, _worker_predict_batch, features)
+
+    def _predict(self, input_data: dict) -> float:
+        return predict_insurance_charges(self.model, self.poly, input_data)
+
+    def _predict_batch(self, features: np.ndarray) -> np.ndarray:
+        return predict_insurance_charges_batch(self.model, self.poly, features)
+
+    def stats(self) -> dict:
+        """
+        Reports load on the executor.
+
+        Returns:
+            dict: The backend and pool size, tasks in flight, tasks queued behind busy workers, and
+            saturation (the fraction of workers busy).
+        """
+        in_flight = self._in_flight
+        running = min(in_flight, self.max_workers)
+        return {
+            "backend": self.backend,
+            "max_workers": self.max_workers,
+            "in_flight": in_flight,
+            "queue_depth": in_flight - running,
+            "saturation": running / self.max_workers,
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Shuts the pool down; it is recreated on the next prediction."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
@@ -1,37 +1,162 @@
+import io
 import os
-from typing import Tuple
-import joblib
-import pandas as pd
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
+import struct
+import time
+import zipfile
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple, Union
+import numpy as np
 
+from app.metrics import prediction_stage_seconds
+from app.models.polynomial_predictor import CompiledPolynomialModel, LookupTableModel
 
-def load_model_and_transformer(model_path: str =
-                               f'{os.path.dirname(os.path.abspath(__file__))}/polynomial_regression_model.pkl',
-                               transformer_path: str =
-                               f'{os.path.dirname(os.path.abspath(__file__))}/polynomial_features.pkl') -> Tuple[
-                                LinearRegression, PolynomialFeatures]:
+# joblib, pandas and sklearn are only needed for the pickled artifacts and the "sklearn" inference mode, so
+# they are imported where used: serving a .npz artifact never pays for importing them.
+if TYPE_CHECKING:
+    from sklearn.linear_model import LinearRegression
+    from sklearn.preprocessing import PolynomialFeatures
+
+# Artifacts bundled with the service.
+DEFAULT_MODEL_PATH = f'{os.path.dirname(os.path.abspath(__file__))}/polynomial_regression_model.pkl'
+DEFAULT_TRANSFORMER_PATH = f'{os.path.dirname(os.path.abspath(__file__))}/polynomial_features.pkl'
+
+# Layout version of the pickle-free .npz artifacts written by `model/train.py`, which imports it from here.
+ARTIFACT_FORMAT_VERSION = 1
+
+# Column order the polynomial transformer was fitted with.
+FEATURE_COLUMNS = ("age", "bmi", "children", "smoker")
+
+# Largest age accepted by the API; the lookup table covers ages 0 to this value.
+MAX_AGE = 120
+
+# Models evaluating the polynomial without the sklearn transformer.
+FAST_MODELS = (CompiledPolynomialModel, LookupTableModel)
+
+# Labels of the prediction stages timed in `prediction_stage_seconds`. Fast models expand the polynomial terms
+# as part of "predict"; "transform" covers building their input vector.
+TRANSFORM_STAGE = ("transform",)
+PREDICT_STAGE = ("predict",)
+
+
+def _memory_map_npz(path: str) -> Dict[str, np.ndarray]:
+    """
+    Memory-maps every array of an uncompressed .npz archive, read-only.
+
+    `np.load` reads .npz members into private memory; viewing them in place in a single mapping of the file
+    instead means processes loading the same artifact share its pages through the OS page cache.
+    """
+    with zipfile.ZipFile(path) as archive:
+        members = archive.infolist()
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+
+    arrays = {}
+    for info in members:
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f"{path}: member {info.filename} is compressed and cannot be memory-mapped")
+        # The member starts after its 30-byte local file header, file name and extra field, with a .npy header.
+        name_length, extra_length = struct.unpack_from("<HH", data, info.header_offset + 26)
+        start = info.header_offset + 30 + name_length + extra_length
+        # Only the .npy header is copied out of the mapping: magic string and version (8 bytes), header length (2
+        # bytes in format 1.0, 4 after) and the header itself.
+        length_format = "<H" if data[start + 6] == 1 else "<I"
+        header_length = struct.unpack_from(length_format, data, start + 8)[0]
+        header_end = start + 8 + struct.calcsize(length_format) + header_length
+        header = io.BytesIO(data[start:min(header_end, start + info.file_size)].tobytes())
+        if np.lib.format.read_magic(header) == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(header)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(header)
+        if dtype.hasobject:
+            raise ValueError(f"{path}: member {info.filename} holds Python objects")
+        arrays[os.path.splitext(info.filename)[0]] = np.ndarray(
+            shape, dtype=dtype, buffer=data, offset=start + header.tell(), order="F" if fortran_order else "C"
+        )
+    return arrays
+
+
+def load_model_artifact(artifact_path: str, inference_mode: str = "compiled", lookup_max_children: int = 10,
+                        lookup_max_bytes: Optional[int] = None) -> Tuple[
+                         Union[CompiledPolynomialModel, LookupTableModel], None]:
+    """
+    Loads a model from the pickle-free .npz artifact exported by `model/train.py`, memory-mapping its arrays.
+
+    Parameters:
+        artifact_path (str): Path to the .npz artifact.
+        inference_mode (str): "compiled" or "lookup", as in `load_model_and_transformer`. "sklearn" is not
+                              available, since the artifact holds no sklearn objects.
+        lookup_max_children (int): Largest number of children tabulated in "lookup" mode.
+        lookup_max_bytes (Optional[int]): Upper bound on the lookup table size in bytes.
+
+    Returns:
+        Tuple[Union[CompiledPolynomialModel, LookupTableModel], None]: The model, and None in place of the
+        transformer, which the compiled models do not need.
+    """
+    if inference_mode not in ("compiled", "lookup"):
+        raise ValueError(f"Inference mode {inference_mode} needs the pickled model and transformer")
+
+    arrays = _memory_map_npz(artifact_path)
+    if int(arrays["format_version"][0]) != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"{artifact_path}: unsupported artifact format version {int(arrays['format_version'][0])}")
+    if tuple(arrays["feature_names"]) != FEATURE_COLUMNS:
+        raise ValueError(f"{artifact_path}: model was trained on features {tuple(arrays['feature_names'])}, "
+                         f"expected {FEATURE_COLUMNS}")
+
+    model = CompiledPolynomialModel(arrays["powers"], arrays["coef"], float(arrays["intercept"][0]))
+    if inference_mode == "lookup":
+        model = LookupTableModel(model, continuous_feature=FEATURE_COLUMNS.index("bmi"),
+                                 max_values=(MAX_AGE, lookup_max_children, 1), max_bytes=lookup_max_bytes)
+    return model, None
+
+
+def load_model_and_transformer(model_path: str = DEFAULT_MODEL_PATH,
+                               transformer_path: Optional[str] = DEFAULT_TRANSFORMER_PATH,
+                               inference_mode: str = "sklearn", lookup_max_children: int = 10,
+                               lookup_max_bytes: Optional[int] = None) -> Tuple[
+                                Union["LinearRegression", CompiledPolynomialModel, LookupTableModel],
+                                Optional["PolynomialFeatures"]]:
     """
     Loads the pre-trained model and polynomial features transformer.
 
     Parameters:
-        model_path (str): Path to the pre-trained model file.
-        transformer_path (str): Path to the polynomial features transformer file.
+        model_path (str): Path to the pre-trained model file. A path ending in ".npz" is loaded with
+                          `load_model_artifact`, and `transformer_path` is then ignored.
+        transformer_path (Optional[str]): Path to the polynomial features transformer file.
+        inference_mode (str): "sklearn" to return the pickled model as-is, "compiled" to return a
+                              `CompiledPolynomialModel` evaluating the same polynomial without sklearn, or
+                              "lookup" to return a `LookupTableModel` precomputed over age, children and smoker.
+        lookup_max_children (int): Largest number of children tabulated in "lookup" mode; larger values
+                                   fall back to the compiled polynomial.
+        lookup_max_bytes (Optional[int]): Upper bound on the lookup table size in bytes.
 
     Returns:
-        Tuple[LinearRegression, PolynomialFeatures]: The loaded regression model and transformer.
+        Tuple[Union[LinearRegression, CompiledPolynomialModel, LookupTableModel], Optional[PolynomialFeatures]]:
+        The loaded regression model (or its compiled equivalent) and transformer (None for a .npz artifact).
     """
+    if model_path.endswith(".npz"):
+        return load_model_artifact(model_path, inference_mode=inference_mode,
+                                   lookup_max_children=lookup_max_children, lookup_max_bytes=lookup_max_bytes)
+
+    import joblib
+
     model = joblib.load(model_path)
     poly = joblib.load(transformer_path)
+    if inference_mode in ("compiled", "lookup"):
+        model = CompiledPolynomialModel.from_sklearn(model, poly)
+    if inference_mode == "lookup":
+        # Tabulate over (age, children, smoker), leaving bmi as the polynomial variable.
+        model = LookupTableModel(model, continuous_feature=FEATURE_COLUMNS.index("bmi"),
+                                 max_values=(MAX_AGE, lookup_max_children, 1), max_bytes=lookup_max_bytes)
+    elif inference_mode not in ("sklearn", "compiled"):
+        raise ValueError(f"Unknown inference mode: {inference_mode}")
     return model, poly
 
 
-def predict_insurance_charges(model: LinearRegression, poly: PolynomialFeatures, input_data: dict) -> float:
+def predict_insurance_charges(model: Union["LinearRegression", CompiledPolynomialModel, LookupTableModel],
+                              poly: "PolynomialFeatures", input_data: dict) -> float:
     """
     Predicts insurance charges based on input data.
 
     Parameters:
-        model (LinearRegression): Trained regression model for predictions.
+        model (Union[LinearRegression, CompiledPolynomialModel, LookupTableModel]): Trained regression model.
         poly (PolynomialFeatures): Polynomial features transformer to preprocess input data.
         input_data (dict): Dictionary containing input features for a single prediction, with keys:
                            - 'age' (int): Age of the individual.
@@ -42,10 +167,77 @@ def predict_insurance_charges(model: LinearRegression, poly: PolynomialFeatures,
     Returns:
         float: Predicted insurance charges.
     """
+    start = time.perf_counter()
+    if isinstance(model, FAST_MODELS):
+        features = (input_data["age"], input_data["bmi"], input_data["children"],
+                    1.0 if input_data["smoker"] else 0.0)
+        transformed = time.perf_counter()
+        prediction = model.predict_one(features)
+        prediction_stage_seconds.observe(transformed - start, TRANSFORM_STAGE)
+        prediction_stage_seconds.observe(time.perf_counter() - transformed, PREDICT_STAGE)
+        return prediction
+
+    import pandas as pd
 
     df = pd.DataFrame([input_data])
     df['smoker'] = 1 if df['smoker'][0] else 0
     x_poly = poly.transform(df)
+    transformed = time.perf_counter()
     prediction = model.predict(x_poly)
+    prediction_stage_seconds.observe(transformed - start, TRANSFORM_STAGE)
+    prediction_stage_seconds.observe(time.perf_counter() - transformed, PREDICT_STAGE)
 
     return float(prediction[0])
+
+
+def build_feature_matrix(input_data: Iterable[dict]) -> np.ndarray:
+    """
+    Builds a feature matrix from a sequence of input records.
+
+    Parameters:
+        input_data (Iterable[dict]): Records with the same keys as accepted by `predict_insurance_charges`.
+
+    Returns:
+        np.ndarray: A float64 matrix of shape (n_records, 4) with columns ordered as `FEATURE_COLUMNS`.
+    """
+    with prediction_stage_seconds.time(TRANSFORM_STAGE):
+        rows = [
+            (row["age"], row["bmi"], row["children"], 1.0 if row["smoker"] else 0.0)
+            for row in input_data
+        ]
+        return np.array(rows, dtype=np.float64).reshape(len(rows), len(FEATURE_COLUMNS))
+
+
+def predict_insurance_charges_batch(model: Union["LinearRegression", CompiledPolynomialModel, LookupTableModel],
+                                    poly: "PolynomialFeatures", features: np.ndarray) -> np.ndarray:
+    """
+    Predicts insurance charges for many inputs with a single transform and predict call.
+
+    Parameters:
+        model (Union[LinearRegression, CompiledPolynomialModel, LookupTableModel]): Trained regression model.
+        poly (PolynomialFeatures): Polynomial features transformer to preprocess input data.
+        features (np.ndarray): Matrix of shape (n_samples, 4) as built by `build_feature_matrix`.
+
+    Returns:
+        np.ndarray: Predicted insurance charges, one per row of `features`.
+    """
+    if features.shape[0] == 0:
+        return np.empty(0, dtype=np.float64)
+    if isinstance(model, FAST_MODELS):
+        with prediction_stage_seconds.time(PREDICT_STAGE):
+            return model.predict(features)
+
+    start = time.perf_counter()
+    x = features
+    if hasattr(poly, "feature_names_in_"):
+        import pandas as pd
+
+        # Wrapping the matrix keeps sklearn's feature-name check quiet without copying the data.
+        x = pd.DataFrame(features, columns=list(poly.feature_names_in_), copy=False)
+    x_poly = poly.transform(x)
+    transformed = time.perf_counter()
+    prediction = np.asarray(model.predict(x_poly), dtype=np.float64)
+    prediction_stage_seconds.observe(transformed - start, TRANSFORM_STAGE)
+    prediction_stage_seconds.observe(time.perf_counter() - transformed, PREDICT_STAGE)
+
+    return prediction
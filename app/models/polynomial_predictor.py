@@ -0,0 +1,211 @@
+from typing import TYPE_CHECKING, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from sklearn.linear_model import LinearRegression
+    from sklearn.preprocessing import PolynomialFeatures
+
+
+class CompiledPolynomialModel:
+    """
+    Closed-form evaluator of a fitted `PolynomialFeatures` + `LinearRegression` pipeline.
+
+    The polynomial is rebuilt from the transformer's `powers_` and the regression coefficients, so
+    predictions need neither pandas nor sklearn's input validation. It can be passed anywhere a
+    loaded `LinearRegression` is accepted by `app.models.model_loader`.
+    """
+
+    def __init__(self, powers: np.ndarray, coef: np.ndarray, intercept: float):
+        """
+        Parameters:
+            powers (np.ndarray): Integer matrix of shape (n_terms, n_features), as `PolynomialFeatures.powers_`.
+            coef (np.ndarray): Regression coefficient of each term, shape (n_terms,).
+            intercept (float): Regression intercept.
+        """
+        powers = np.asarray(powers, dtype=np.int64)
+        coef = np.asarray(coef, dtype=np.float64).ravel()
+        if powers.ndim != 2 or powers.shape[0] != coef.shape[0]:
+            raise ValueError("powers and coef describe a different number of polynomial terms")
+
+        # Fold the constant term into the intercept; this also avoids the large cancelling bias and
+        # intercept values a rank-deficient least-squares fit may produce.
+        constant = np.all(powers == 0, axis=1)
+        self.intercept = float(intercept) + float(coef[constant].sum())
+        self.powers = powers[~constant]
+        self.coef = coef[~constant]
+        self.n_features = powers.shape[1]
+
+        # Plain Python copies of the terms: the full power tuple for the single-row path, and the
+        # (feature, power) pairs with a non-zero power for the vectorized path.
+        self._terms = [(float(c), tuple(int(p) for p in row)) for c, row in zip(self.coef, self.powers)]
+        self._factors = [(c, [(j, p) for j, p in enumerate(row) if p]) for c, row in self._terms]
+        self._max_powers = [(j, int(p)) for j, p in enumerate(self.powers.max(axis=0, initial=0))]
+
+    @classmethod
+    def from_sklearn(cls, model: "LinearRegression", poly: "PolynomialFeatures") -> "CompiledPolynomialModel":
+        """
+        Builds a compiled model from a fitted regression model and polynomial features transformer.
+
+        Parameters:
+            model (LinearRegression): Trained regression model.
+            poly (PolynomialFeatures): Fitted polynomial features transformer.
+
+        Returns:
+            CompiledPolynomialModel: Model giving the same predictions as `model.predict(poly.transform(x))`.
+        """
+        return cls(poly.powers_, model.coef_, model.intercept_)
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predicts for a matrix of raw (untransformed) features.
+
+        Parameters:
+            features (np.ndarray): Matrix of shape (n_samples, n_features).
+
+        Returns:
+            np.ndarray: One prediction per row.
+        """
+        x = np.asarray(features, dtype=np.float64)
+        if x.ndim != 2 or x.shape[1] != self.n_features:
+            raise ValueError(f"Expected a matrix with {self.n_features} columns, got shape {x.shape}")
+
+        # Column-major copy so every feature (and its powers) is a contiguous vector.
+        columns = np.ascontiguousarray(x.T)
+        x_powers = [[None, column] for column in columns]
+        for j, power in self._max_powers:
+            for _ in range(2, power + 1):
+                x_powers[j].append(x_powers[j][-1] * columns[j])
+
+        result = np.full(x.shape[0], self.intercept)
+        for c, factors in self._factors:
+            term = c * x_powers[factors[0][0]][factors[0][1]]
+            for j, power in factors[1:]:
+                term *= x_powers[j][power]
+            result += term
+        return result
+
+    def predict_one(self, features: Sequence[float]) -> float:
+        """
+        Predicts for a single row of raw features using plain float arithmetic.
+
+        Parameters:
+            features (Sequence[float]): Feature values in the transformer's column order.
+
+        Returns:
+            float: The prediction.
+        """
+        total = self.intercept
+        for c, row in self._terms:
+            term = c
+            for value, power in zip(features, row):
+                if power:
+                    term *= value ** power
+            total += term
+        return total
+
+
+class LookupTableModel:
+    """
+    Table-driven evaluator for a polynomial whose inputs are all bounded integers but one.
+
+    At build time the polynomial is collapsed, for every combination of the discrete features, into a
+    univariate polynomial in the remaining continuous feature. A prediction is then one table lookup
+    plus a Horner evaluation. Inputs outside the table fall back to the `CompiledPolynomialModel`.
+    """
+
+    def __init__(self, compiled: CompiledPolynomialModel, continuous_feature: int, max_values: Sequence[int],
+                 max_bytes: Optional[int] = None):
+        """
+        Parameters:
+            compiled (CompiledPolynomialModel): Model to tabulate.
+            continuous_feature (int): Column index of the feature left as a polynomial variable.
+            max_values (Sequence[int]): Largest tabulated value of each other feature, in column order;
+                                        each is tabulated from 0.
+            max_bytes (Optional[int]): Refuse to build a table larger than this many bytes.
+        """
+        self.compiled = compiled
+        self.continuous_feature = continuous_feature
+        self.discrete_features = [j for j in range(compiled.n_features) if j != continuous_feature]
+        if len(max_values) != len(self.discrete_features):
+            raise ValueError(f"Expected {len(self.discrete_features)} max values, got {len(max_values)}")
+        self.max_values = np.asarray(max_values, dtype=np.int64)
+
+        degree = int(compiled.powers[:, continuous_feature].max(initial=0))
+        shape = tuple(int(m) + 1 for m in self.max_values) + (degree + 1,)
+        size = int(np.prod(shape)) * np.dtype(np.float64).itemsize
+        if max_bytes is not None and size > max_bytes:
+            raise ValueError(f"Lookup table would take {size} bytes, more than the {max_bytes} allowed")
+
+        # table[d_0, ..., d_k, p] is the coefficient of x ** p for discrete feature values (d_0, ..., d_k).
+        grids = np.meshgrid(*(np.arange(int(m) + 1, dtype=np.float64) for m in self.max_values), indexing="ij")
+        table = np.zeros(shape, dtype=np.float64)
+        table[..., 0] = compiled.intercept
+        for c, row in zip(compiled.coef, compiled.powers):
+            term = np.full(shape[:-1], c)
+            for grid, j in zip(grids, self.discrete_features):
+                if row[j]:
+                    term *= grid ** row[j]
+            table[..., row[continuous_feature]] += term
+        self.table = table
+
+        # Row-major strides to turn the discrete values into a flat row index, and a plain Python copy
+        # of the rows for the single-row path.
+        self._strides = [int(np.prod(shape[i + 1:-1])) for i in range(len(shape) - 1)]
+        self._rows = table.reshape(-1, degree + 1).tolist()
+        self._max_values = self.max_values.tolist()
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predicts for a matrix of raw features.
+
+        Parameters:
+            features (np.ndarray): Matrix of shape (n_samples, n_features).
+
+        Returns:
+            np.ndarray: One prediction per row.
+        """
+        x = np.asarray(features, dtype=np.float64)
+        if x.ndim != 2 or x.shape[1] != self.compiled.n_features:
+            raise ValueError(f"Expected a matrix with {self.compiled.n_features} columns, got shape {x.shape}")
+
+        discrete = x[:, self.discrete_features]
+        in_table = np.all((discrete >= 0) & (discrete <= self.max_values) & (discrete == np.floor(discrete)),
+                          axis=1)
+        result = np.empty(x.shape[0], dtype=np.float64)
+
+        coefficients = self.table[tuple(discrete[in_table].astype(np.int64).T)]
+        continuous = x[in_table, self.continuous_feature]
+        values = coefficients[:, -1].copy()
+        for p in range(coefficients.shape[1] - 2, -1, -1):
+            values *= continuous
+            values += coefficients[:, p]
+        result[in_table] = values
+
+        if not in_table.all():
+            result[~in_table] = self.compiled.predict(x[~in_table])
+        return result
+
+    def predict_one(self, features: Sequence[float]) -> float:
+        """
+        Predicts for a single row of raw features using plain float arithmetic.
+
+        Parameters:
+            features (Sequence[float]): Feature values in the transformer's column order.
+
+        Returns:
+            float: The prediction.
+        """
+        index = 0
+        for j, max_value, stride in zip(self.discrete_features, self._max_values, self._strides):
+            value = features[j]
+            if not (0 <= value <= max_value and value == int(value)):
+                return self.compiled.predict_one(features)
+            index += int(value) * stride
+
+        x = features[self.continuous_feature]
+        coefficients = self._rows[index]
+        total = coefficients[-1]
+        for c in reversed(coefficients[:-1]):
+            total = total * x + c
+        return total
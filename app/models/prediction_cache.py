@@ -0,0 +1,56 @@
+from typing import Hashable, Optional
+
+from app.cache import CacheBackend
+
+
+class PredictionCache:
+    """
+    Caches predictions keyed on the (age, children, smoker, quantized bmi) input.
+
+    Entries belong to the model object they were computed with: looking up with a different model,
+    e.g. after the artifacts were reloaded, clears the cache first.
+    """
+
+    def __init__(self, backend: CacheBackend, bmi_quantum: Optional[float] = None):
+        """
+        Parameters:
+            backend (CacheBackend): Store holding the cached predictions.
+            bmi_quantum (Optional[float]): BMI values are rounded to a multiple of this step to build the key,
+                                           so nearby BMIs share an entry. None keys on the exact value.
+        """
+        if bmi_quantum is not None and bmi_quantum <= 0:
+            raise ValueError("bmi_quantum must be positive")
+
+        self.backend = backend
+        self.bmi_quantum = bmi_quantum
+        self._model = None
+
+    def key(self, input_data: dict) -> Hashable:
+        """Builds the cache key of a prediction input."""
+        bmi = float(input_data["bmi"])
+        if self.bmi_quantum is not None:
+            bmi = round(bmi / self.bmi_quantum)
+        return int(input_data["age"]), int(input_data["children"]), bool(input_data["smoker"]), bmi
+
+    def _check_model(self, model):
+        if model is not self._model:
+            self.backend.clear()
+            self._model = model
+
+    def get(self, model, input_data: dict) -> Optional[float]:
+        """Returns the cached prediction of `model` for `input_data`, or None on a miss."""
+        self._check_model(model)
+        return self.backend.get(self.key(input_data))
+
+    def set(self, model, input_data: dict, prediction: float):
+        """Stores the prediction of `model` for `input_data`."""
+        self._check_model(model)
+        self.backend.set(self.key(input_data), prediction)
+
+    def invalidate(self):
+        """Drops every cached prediction."""
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        """Returns the usage counters of the backend."""
+        return self.backend.stats()
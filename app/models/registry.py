@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+import numpy as np
+
+from app.models.batching import MicroBatcher
+from app.models.executor import InferenceExecutor
+from app.models.model_loader import build_feature_matrix, predict_insurance_charges, predict_insurance_charges_batch
+from app.models.prediction_cache import PredictionCache
+
+logger = logging.getLogger(__name__)
+
+# File names of the artifacts inside a version directory of a watched registry directory: either the
+# pickle-free artifact, or the pickled model and transformer.
+ARTIFACT_FILE_NAME = "polynomial_model.npz"
+MODEL_FILE_NAME = "polynomial_regression_model.pkl"
+TRANSFORMER_FILE_NAME = "polynomial_features.pkl"
+
+# Inputs scored when a model is warmed up, spanning the valid input ranges.
+WARMUP_INPUTS = [
+    {"age": age, "bmi": bmi, "children": children, "smoker": smoker}
+    for age, bmi, children, smoker in [(18, 18.5, 0, False), (35, 27.0, 2, True), (64, 42.3, 5, False),
+                                       (120, 100.0, 0, True), (0, 0.0, 1, False)]
+]
+
+
+class VersionExistsError(ValueError):
+    """Raised when registering a version name that is already registered, or being registered."""
+
+
+class LoadedModel:
+    """
+    One model version ready to serve: the loaded artifacts plus the executor, micro-batcher and prediction
+    cache running it.
+    """
+
+    def __init__(self, version: str, model, poly, executor: InferenceExecutor, batcher: Optional[MicroBatcher] = None,
+                 prediction_cache: Optional[PredictionCache] = None, source: Optional[str] = None,
+                 load_seconds: float = 0.0):
+        """
+        Parameters:
+            version (str): Name of the version.
+            model: Loaded regression model (or compiled equivalent).
+            poly: Loaded polynomial features transformer.
+            executor (InferenceExecutor): Executor running this model's predictions.
+            batcher (Optional[MicroBatcher]): Micro-batcher for single predictions, if enabled.
+            prediction_cache (Optional[PredictionCache]): Cache of single predictions, if enabled.
+            source (Optional[str]): Where the artifacts were loaded from.
+            load_seconds (float): Time it took to load the artifacts.
+        """
+        self.version = version
+        self.model = model
+        self.poly = poly
+        self.executor = executor
+        self.batcher = batcher
+        self.prediction_cache = prediction_cache
+        self.source = source
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+
+    async def predict(self, input_data: dict) -> float:
+        """Predicts a single input, going through the prediction cache and micro-batcher when enabled."""
+        if self.prediction_cache is not None:
+            prediction = self.prediction_cache.get(self.model, input_data)
+            if prediction is not None:
+                return prediction
+
+        if self.batcher is not None:
+            prediction = await self.batcher.submit(input_data)
+        else:
+            prediction = await self.executor.predict(input_data)
+
+        if self.prediction_cache is not None:
+            self.prediction_cache.set(self.model, input_data, prediction)
+        return prediction
+
+    async def predict_rows(self, rows: List[dict]) -> np.ndarray:
+        """Predicts a list of validated inputs with a single vectorized model call on the executor."""
+        return await self.executor.predict_batch(build_feature_matrix(rows))
+
+    async def warm_up(self):
+        """Runs the warm-up inputs through the model and the executor so the first real request is not slowed."""
+        for input_data in WARMUP_INPUTS:
+            predict_insurance_charges(self.model, self.poly, input_data)
+        predict_insurance_charges_batch(self.model, self.poly, build_feature_matrix(WARMUP_INPUTS))
+        # Starts the pool workers (and, for a process pool, ships them the model).
+        await asyncio.gather(*(self.predict_rows(WARMUP_INPUTS) for _ in range(self.executor.max_workers)))
+
+    def shutdown(self):
+        """Releases the executor pool; it is recreated if the model is used again."""
+        self.executor.shutdown()
+
+
+class ModelRegistry:
+    """
+    Holds the loaded model versions and which one is active.
+
+    Swapping the active version is a single reference assignment: requests that already fetched a version
+    keep using it until they finish, while new requests get the new one. Versions are warmed up before they
+    are registered, so they never take traffic cold.
+    """
+
+    def __init__(self, build: Callable[[str, str, Optional[str]], LoadedModel]):
+        """
+        Parameters:
+            build (Callable[[str, str, Optional[str]], LoadedModel]): Loads a version from its (version, model
+                                                                      path, transformer path).
+        """
+        self.build = build
+        self._versions: Dict[str, LoadedModel] = {}
+        # Versions being loaded by `register`, reserved so that a concurrent registration of the same name fails.
+        self._loading: Set[str] = set()
+        self._active: Optional[LoadedModel] = None
+
+    @property
+    def active_version(self) -> Optional[str]:
+        return self._active.version if self._active is not None else None
+
+    def versions(self) -> List[LoadedModel]:
+        """Returns the registered versions in registration order."""
+        return list(self._versions.values())
+
+    def get(self, version: Optional[str] = None) -> LoadedModel:
+        """
+        Returns the given version, or the active one if `version` is None.
+
+        Raises:
+            KeyError: If the version is not registered, or no version is active.
+        """
+        if version is None:
+            if self._active is None:
+                raise KeyError("No model version is active")
+            return self._active
+        return self._versions[version]
+
+    def add(self, loaded: LoadedModel, activate: bool = False):
+        """
+        Registers an already loaded version. The first registered version is activated.
+
+        Raises:
+            VersionExistsError: If the version is already registered.
+        """
+        if loaded.version in self._versions:
+            raise VersionExistsError(f"Model version {loaded.version} is already registered")
+        self._versions[loaded.version] = loaded
+        if activate or self._active is None:
+            self._active = loaded
+
+    async def register(self, version: str, model_path: str, transformer_path: Optional[str] = None,
+                       activate: bool = False) -> LoadedModel:
+        """
+        Loads, warms up and registers a version, optionally making it the active one.
+
+        Raises:
+            VersionExistsError: If the version is already registered, or being registered by another call.
+        """
+        # Checking and reserving the name without awaiting in between makes it atomic on the event loop.
+        if version in self._versions or version in self._loading:
+            raise VersionExistsError(f"Model version {version} is already registered")
+        self._loading.add(version)
+        try:
+            loaded = await asyncio.to_thread(self.build, version, model_path, transformer_path)
+            try:
+                await loaded.warm_up()
+                self.add(loaded, activate=activate)
+            except BaseException:
+                await asyncio.to_thread(loaded.shutdown)
+                raise
+        finally:
+            self._loading.discard(version)
+        logger.info("Registered model version %s from %s%s", version, model_path, " (active)" if activate else "")
+        return loaded
+
+    def activate(self, version: str) -> LoadedModel:
+        """
+        Makes a registered version the active one.
+
+        Raises:
+            KeyError: If the version is not registered.
+        """
+        self._active = self._versions[version]
+        return self._active
+
+    async def unregister(self, version: str):
+        """
+        Removes a version that is not active and releases its executor, in a thread as that waits for the
+        predictions still running on it.
+
+        Raises:
+            KeyError: If the version is not registered.
+            ValueError: If the version is the active one.
+        """
+        loaded = self._versions[version]
+        if loaded is self._active:
+            raise ValueError("The active model version cannot be removed")
+        del self._versions[version]
+        await asyncio.to_thread(loaded.shutdown)
+
+    async def scan(self, directory: str, activate: bool = True) -> List[str]:
+        """
+        Registers every version directory of `directory` not registered yet.
+
+        A version directory is a sub-directory holding `ARTIFACT_FILE_NAME`, or both `MODEL_FILE_NAME` and
+        `TRANSFORMER_FILE_NAME`; its name is the version. New versions are registered oldest first, by the time
+        their artifacts were last modified (then by name), and, if `activate`, the newest becomes active. Versions
+        that fail to load (e.g. still being written) are retried on the next scan.
+
+        Returns:
+            List[str]: The newly registered versions, oldest first.
+        """
+        found = []
+        for version in os.listdir(directory):
+            path = os.path.join(directory, version)
+            if version in self._versions or version in self._loading:
+                continue
+            if os.path.isfile(os.path.join(path, ARTIFACT_FILE_NAME)):
+                model_path, transformer_path = os.path.join(path, ARTIFACT_FILE_NAME), None
+            else:
+                model_path = os.path.join(path, MODEL_FILE_NAME)
+                transformer_path = os.path.join(path, TRANSFORMER_FILE_NAME)
+                if not (os.path.isfile(model_path) and os.path.isfile(transformer_path)):
+                    continue
+            paths = [model_path] if transformer_path is None else [model_path, transformer_path]
+            found.append((max(os.path.getmtime(artifact) for artifact in paths), version, model_path, transformer_path))
+
+        registered = []
+        for _, version, model_path, transformer_path in sorted(found):
+            try:
+                await self.register(version, model_path, transformer_path)
+            except Exception:
+                logger.exception("Could not load model version %s from %s", version, model_path)
+                continue
+            registered.append(version)
+
+        if activate and registered:
+            self.activate(registered[-1])
+        return registered
+
+    async def watch(self, directory: str, interval_seconds: float):
+        """Scans `directory` every `interval_seconds`, activating newly added versions, until cancelled."""
+        while True:
+            try:
+                await self.scan(directory)
+            except Exception:
+                logger.exception("Could not scan model directory %s", directory)
+            await asyncio.sleep(interval_seconds)
+
+    def shutdown(self):
+        """Releases the executor pools of every version."""
+        for loaded in self._versions.values():
+            loaded.shutdown()
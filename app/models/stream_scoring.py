@@ -0,0 +1,225 @@
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+from pydantic import ValidationError
+
+from app.models.model_loader import (
+    load_model_and_transformer,
+    build_feature_matrix,
+    predict_insurance_charges_batch,
+    DEFAULT_MODEL_PATH,
+    DEFAULT_TRANSFORMER_PATH,
+)
+from app.schemas.request_schemas import PredictRequest
+
+FORMATS = ("ndjson", "csv")
+
+# Default longest input line accepted by `aiter_lines`, in bytes; a /predict body takes about a hundred.
+MAX_LINE_BYTES = 65536
+
+
+def _decode_line(line: bytes) -> str:
+    return line.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+async def aiter_lines(chunks: AsyncIterable[bytes],
+                      max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Optional[str]]:
+    """
+    Splits a stream of byte chunks (e.g. a request body) into decoded lines, holding at most one partial line.
+
+    Each chunk is searched for line breaks once, so the cost stays linear in the input size. A line longer than
+    `max_line_bytes` is not buffered: its bytes are dropped up to the next line break, and None is yielded in its
+    place.
+    """
+    pending: List[bytes] = []
+    pending_bytes = 0
+    too_long = False
+    async for chunk in chunks:
+        start = 0
+        end = chunk.find(b"\n")
+        while end >= 0:
+            piece = chunk[start:end]
+            if too_long or pending_bytes + len(piece) > max_line_bytes:
+                yield None
+            else:
+                pending.append(piece)
+                yield _decode_line(b"".join(pending))
+            pending, pending_bytes, too_long = [], 0, False
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        if too_long or start == len(chunk):
+            continue
+        pending_bytes += len(chunk) - start
+        if pending_bytes > max_line_bytes:
+            pending, too_long = [], True
+        else:
+            pending.append(chunk[start:])
+    if too_long:
+        yield None
+    elif pending:
+        yield _decode_line(b"".join(pending))
+
+
+class _RecordParser:
+    """Turns the lines of an NDJSON or CSV input into prediction input records."""
+
+    def __init__(self, fmt: str):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown input format: {fmt}")
+        self.fmt = fmt
+        self.header: Optional[List[str]] = None
+
+    def parse(self, line: str) -> Optional[dict]:
+        """
+        Parses one non-empty line. Returns None for the CSV header line.
+
+        Raises:
+            ValueError: If the line is not a JSON object, or a CSV row with as many fields as the header.
+        """
+        if self.fmt == "ndjson":
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Line is not a JSON object")
+            return record
+
+        fields = next(csv.reader([line]))
+        if self.header is None:
+            self.header = [name.strip() for name in fields]
+            return None
+        if len(fields) != len(self.header):
+            raise ValueError(f"Expected {len(self.header)} fields, got {len(fields)}")
+        return dict(zip(self.header, fields))
+
+
+def _line_error(e: Exception) -> List[dict]:
+    if isinstance(e, ValidationError):
+        return e.errors(include_url=False, include_context=False, include_input=False)
+    return [{"type": "parse_error", "msg": str(e)}]
+
+
+async def score_stream(lines: AsyncIterable[Optional[str]], predict_rows: Callable[[List[dict]], Awaitable[np.ndarray]],
+                       fmt: str = "ndjson", chunk_size: int = 1000) -> AsyncIterator[str]:
+    """
+    Scores a stream of NDJSON or CSV input lines in fixed-size vectorized chunks.
+
+    Only one chunk of inputs and results is held at a time, so memory stays bounded whatever the input size.
+
+    Parameters:
+        lines (AsyncIterable[Optional[str]]): Input lines: JSON objects shaped like a /predict request body, or
+                                              CSV rows after a header naming the columns. None stands for a line
+                                              dropped for being too long (see `aiter_lines`), reported as an error.
+        predict_rows (Callable[[List[dict]], Awaitable[np.ndarray]]): Scores a list of validated inputs.
+        fmt (str): "ndjson" or "csv".
+        chunk_size (int): Number of input lines scored per model call.
+
+    Returns:
+        AsyncIterator[str]: NDJSON output, one chunk of lines at a time. Each non-empty input line gives
+        `{"line": n, "cost_prediction": x}` or `{"line": n, "errors": [...]}` (n is the 1-based input line
+        number), and the last line is `{"summary": {"rows", "scored", "errors", "seconds", "rows_per_second"}}`.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    parser = _RecordParser(fmt)
+    start = time.perf_counter()
+    rows = scored = 0
+
+    async def flush(chunk: List[Tuple[int, Optional[dict], Optional[List[dict]]]]) -> str:
+        valid = [record for _, record, errors in chunk if errors is None]
+        predictions = iter((await predict_rows(valid)).tolist() if valid else [])
+        output = []
+        for line_number, _, errors in chunk:
+            if errors is None:
+                output.append(json.dumps({"line": line_number, "cost_prediction": next(predictions)}))
+            else:
+                output.append(json.dumps({"line": line_number, "errors": errors}))
+        output.append("")
+        return "\n".join(output)
+
+    chunk = []
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if line is not None and not line.strip():
+            continue
+        try:
+            if line is None:
+                raise ValueError("Line is too long")
+            record = parser.parse(line)
+            if record is None:
+                continue
+            chunk.append((line_number, PredictRequest.model_validate(record).model_dump(exclude={"model_version"}),
+                          None))
+            scored += 1
+        except (ValueError, ValidationError) as e:
+            chunk.append((line_number, None, _line_error(e)))
+        rows += 1
+
+        if len(chunk) >= chunk_size:
+            yield await flush(chunk)
+            chunk = []
+    if chunk:
+        yield await flush(chunk)
+
+    seconds = time.perf_counter() - start
+    yield json.dumps({"summary": {
+        "rows": rows,
+        "scored": scored,
+        "errors": rows - scored,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else 0.0,
+    }}) + "\n"
+
+
+async def _score_file(input_lines: Iterable[str], output, fmt: str, chunk_size: int, model_path: str,
+                      transformer_path: Optional[str], inference_mode: str):
+    model, poly = load_model_and_transformer(model_path, transformer_path, inference_mode=inference_mode)
+
+    async def predict_rows(rows: List[dict]) -> np.ndarray:
+        return predict_insurance_charges_batch(model, poly, build_feature_matrix(rows))
+
+    async def lines() -> AsyncIterator[str]:
+        for line in input_lines:
+            yield line.rstrip("\r\n")
+
+    async for text in score_stream(lines(), predict_rows, fmt=fmt, chunk_size=chunk_size):
+        output.write(text)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line counterpart of POST /predict/stream: scores an NDJSON or CSV file into NDJSON."""
+    parser = argparse.ArgumentParser(description="Score an NDJSON or CSV file of prediction inputs as a stream.")
+    parser.add_argument('input_path', type=str, help="Path to the input file, or - for standard input.")
+    parser.add_argument('--output_path', type=str, default="-",
+                        help="Path to write the NDJSON results to, or - for standard output (default).")
+    parser.add_argument('--format', type=str, choices=FORMATS, default=None,
+                        help="Input format. Default: csv for a .csv input path, ndjson otherwise.")
+    parser.add_argument('--chunk_size', type=int, default=1000, help="Number of lines scored per model call.")
+    parser.add_argument('--model_path', type=str, default=DEFAULT_MODEL_PATH,
+                        help="Pickled model, or .npz artifact, to score with. Default: the bundled model.")
+    parser.add_argument('--transformer_path', type=str, default=DEFAULT_TRANSFORMER_PATH,
+                        help="Pickled polynomial features transformer (ignored for a .npz model).")
+    parser.add_argument('--inference_mode', type=str, choices=("sklearn", "compiled", "lookup"), default="compiled",
+                        help="How predictions are computed (see ML_SERVICE_INFERENCE_MODE).")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.input_path.endswith(".csv") else "ndjson")
+    input_file = sys.stdin if args.input_path == "-" else open(args.input_path, encoding="utf-8", newline="")
+    output_file = sys.stdout if args.output_path == "-" else open(args.output_path, "w", encoding="utf-8")
+    try:
+        asyncio.run(_score_file(input_file, output_file, fmt, args.chunk_size, args.model_path,
+                                args.transformer_path, args.inference_mode))
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+
+if __name__ == "__main__":
+    main()
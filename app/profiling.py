@@ -0,0 +1,197 @@
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, Optional
+
+from app.api.dependencies import is_admin_token
+from app.config import settings
+from app.models.executor import THREAD_NAME_PREFIX
+
+# Request header asking for the request to be profiled; honoured for admin requests (see `is_admin_token`).
+PROFILE_HEADER = b"x-profile"
+ADMIN_TOKEN_HEADER = b"x-admin-token"
+
+# Innermost frames of threads waiting for work (event loop polling, idle pool workers, blocked waits), which
+# are left out of the samples.
+IDLE_FRAMES = {
+    ("selectors", "select"),
+    ("threading", "wait"),
+    ("queue", "get"),
+    ("concurrent.futures.thread", "_worker"),
+}
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler of live requests.
+
+    While at least one profiled request is in flight, a background thread samples every `interval_seconds` the
+    Python call stacks of the threads doing its work: the event loop running the FastAPI request path and pydantic
+    validation, and the inference threads running the model. Identical stacks are counted together. Nothing is
+    traced, so profiled requests run at full speed; the cost is one stack walk per busy thread and interval.
+
+    A thread holding the GIL only hands it over every switch interval (5 ms by default), so while sampling the
+    interval is shortened to a fraction of `interval_seconds`; otherwise samples would mostly land where the
+    event loop waits for I/O rather than in the request path.
+
+    Requests are interleaved on the event loop, so a sample can land in a request that is not profiled: the
+    aggregate shows where time goes while profiled requests run, which is what a sampled fraction of traffic
+    needs.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, interval_seconds: float = 0.005):
+        """
+        Parameters:
+            sample_rate (float): Fraction of requests profiled, between 0 (none) and 1 (all).
+            interval_seconds (float): Time between two samples.
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if interval_seconds <= 0:
+            raise ValueError("interval_seconds must be positive")
+
+        self.sample_rate = sample_rate
+        self.interval_seconds = interval_seconds
+        self.profiled_requests = 0
+        self.samples = 0
+
+        self._stacks: Counter = Counter()
+        self._labels: Dict[CodeType, str] = {}
+        self._active = 0
+        # Profiled requests in flight per thread running them, and the switch interval to restore afterwards.
+        self._request_threads: Counter = Counter()
+        self._switch_interval: Optional[float] = None
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def should_profile(self) -> bool:
+        """Draws whether a request is part of the sampled fraction."""
+        return self.sample_rate > 0.0 and random.random() < self.sample_rate
+
+    def begin(self):
+        """Marks a profiled request as started; sampling runs while any is in flight."""
+        with self._lock:
+            self.profiled_requests += 1
+            self._active += 1
+            self._request_threads[threading.get_ident()] += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+            if self._switch_interval is None:
+                self._switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(self._switch_interval, max(self.interval_seconds / 10, 0.0001)))
+            self._running.set()
+
+    def end(self):
+        """Marks a profiled request as finished."""
+        with self._lock:
+            self._active -= 1
+            self._request_threads[threading.get_ident()] -= 1
+            self._request_threads += Counter()  # drops threads without requests left
+            if self._active == 0:
+                self._running.clear()
+                sys.setswitchinterval(self._switch_interval)
+                self._switch_interval = None
+
+    def _label(self, frame: FrameType) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}"
+        return label
+
+    def sample(self, threads: Optional[Dict[int, str]] = None):
+        """
+        Records the current stack of the threads running profiled requests and of the inference threads, or of
+        `threads` (a mapping of thread ident to name) if given, unless they are idle.
+        """
+        if threads is None:
+            with self._lock:
+                request_threads = set(self._request_threads)
+            threads = {thread.ident: thread.name for thread in threading.enumerate()
+                       if thread.ident in request_threads or thread.name.startswith(THREAD_NAME_PREFIX)}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident not in threads or (frame.f_globals.get("__name__"), frame.f_code.co_name) in IDLE_FRAMES:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(self._label(frame))
+                frame = frame.f_back
+            labels.append(threads[ident])
+            stacks.append(";".join(reversed(labels)))
+        with self._lock:
+            self._stacks.update(stacks)
+            self.samples += 1
+
+    def _run(self):
+        while True:
+            self._running.wait()
+            self.sample()
+            time.sleep(self.interval_seconds)
+
+    def folded_stacks(self) -> str:
+        """
+        Returns the aggregated samples in the folded stack format read by flamegraph.pl, speedscope and
+        inferno: one `thread;outer;...;inner count` line per distinct stack, most frequent first.
+        """
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "interval_ms": self.interval_seconds * 1000,
+                "profiled_requests": self.profiled_requests,
+                "active_requests": self._active,
+                "samples": self.samples,
+                "stacks": len(self._stacks),
+            }
+
+    def clear(self):
+        """Discards the samples collected so far."""
+        with self._lock:
+            self._stacks.clear()
+            self.profiled_requests = 0
+            self.samples = 0
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling the configured fraction of requests, plus admin requests sent with an
+    `X-Profile: 1` header. The header is ignored while no admin token is configured: profiling slows down every
+    request of the process, so anonymous clients must not be able to turn it on.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (profiler.should_profile() or self._requested(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        profiler.begin()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.end()
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        """Returns whether the request carries `X-Profile: 1` and the configured admin token."""
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER) not in (b"1", b"true"):
+            return False
+        token = headers.get(ADMIN_TOKEN_HEADER)
+        return is_admin_token(token.decode("latin-1") if token is not None else None)
+
+
+profiler = SamplingProfiler(sample_rate=settings.profiler_sample_rate,
+                            interval_seconds=settings.profiler_interval_ms / 1000)
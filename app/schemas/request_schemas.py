@@ -1,5 +1,15 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+import time
+
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, model_validator
+from typing import Any, Dict, List, Optional
+
+from app.metrics import prediction_stage_seconds
+
+# Upper bound on the number of inputs accepted by a single batch prediction request.
+MAX_BATCH_SIZE = 10000
+
+# Upper bound on the number of users accepted by a single bulk request.
+MAX_BULK_SIZE = 10000
 
 
 class UserCreate(BaseModel):
@@ -14,8 +24,98 @@ class UserUpdate(BaseModel):
     age: Optional[int]
 
 
+class UserBulkUpdateItem(BaseModel):
+    id: int
+    name: Optional[str] = None
+    email: Optional[EmailStr] = None
+    age: Optional[int] = None
+
+
+class UserBulkCreate(BaseModel):
+    """Users to create; each entry is validated on its own against `UserCreate`."""
+    users: List[Dict[str, Any]] = Field(..., max_length=MAX_BULK_SIZE)
+
+
+class UserBulkUpdate(BaseModel):
+    """Users to update; each entry is validated on its own against `UserBulkUpdateItem`."""
+    users: List[Dict[str, Any]] = Field(..., max_length=MAX_BULK_SIZE)
+
+
+class UserBulkDelete(BaseModel):
+    ids: List[int] = Field(..., max_length=MAX_BULK_SIZE)
+
+
 class PredictRequest(BaseModel):
+    # Allows the model_version / model_path fields, which pydantic reserves the "model_" prefix against.
+    model_config = ConfigDict(protected_namespaces=())
+
     smoker: bool = Field(..., description="Indicates if the person is a smoker")
     bmi: float = Field(..., ge=0, le=100, description="Body Mass Index, between 0 and 100")
     age: int = Field(..., ge=0, le=120, description="Age in years, between 0 and 120")
     children: int = Field(..., ge=0, description="Number of children (0 or more)")
+    model_version: Optional[str] = Field(None, description="Model version to predict with; the active one if omitted")
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def time_validation(cls, data: Any, handler):
+        """Records the time spent validating each input as the "validation" prediction stage."""
+        start = time.perf_counter()
+        try:
+            return handler(data)
+        finally:
+            prediction_stage_seconds.observe(time.perf_counter() - start, ("validation",))
+
+
+class PredictBatchRequest(BaseModel):
+    """
+    Batch of prediction inputs, given either row-wise as `items` or column-wise as `columns`.
+
+    Individual inputs are validated one by one against `PredictRequest`, so a single bad row
+    does not reject the whole batch.
+    """
+    model_config = ConfigDict(protected_namespaces=())
+
+    items: Optional[List[Dict[str, Any]]] = Field(
+        None, max_length=MAX_BATCH_SIZE, description="List of objects shaped like a /predict request body"
+    )
+    columns: Optional[Dict[str, List[Any]]] = Field(
+        None, description="Mapping of field name to a list of values, all lists of equal length"
+    )
+    model_version: Optional[str] = Field(None, description="Model version to predict with; the active one if omitted")
+
+    @model_validator(mode="after")
+    def check_exactly_one_form(self):
+        if (self.items is None) == (self.columns is None):
+            raise ValueError("Exactly one of 'items' or 'columns' must be provided")
+        if self.columns is not None:
+            lengths = {len(values) for values in self.columns.values()}
+            if len(lengths) > 1:
+                raise ValueError("All lists in 'columns' must have the same length")
+            if lengths and lengths.pop() > MAX_BATCH_SIZE:
+                raise ValueError(f"A batch may contain at most {MAX_BATCH_SIZE} inputs")
+        return self
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Returns the inputs as a list of per-row dictionaries, in request order."""
+        if self.items is not None:
+            return self.items
+        names = list(self.columns)
+        return [dict(zip(names, values)) for values in zip(*self.columns.values())]
+
+
+class ModelRegisterRequest(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    version: str = Field(..., min_length=1, description="Name of the new model version")
+    model_path: str = Field(
+        ..., description="Path of the pickled regression model, or of a .npz artifact, on the server"
+    )
+    transformer_path: Optional[str] = Field(
+        None, description="Path of the pickled polynomial features transformer on the server; not needed for a .npz"
+    )
+    activate: bool = Field(False, description="Make the version active once it is loaded and warmed up")
+
+
+class ProfilerStartRequest(BaseModel):
+    sample_rate: float = Field(1.0, gt=0, le=1, description="Fraction of requests to profile, between 0 and 1")
+    clear: bool = Field(True, description="Discard the samples collected so far")
@@ -1,16 +1,127 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from typing import Any, Dict, List, Optional
 
 
 class UserResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     email: EmailStr
     age: Optional[int]
 
-    class Config:
-        orm_mode = True
+
+class UserListResponse(BaseModel):
+    users: List[UserResponse] = Field(..., description="Users of this page, in the requested order")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, or null on the last page")
+
+
+class UserBulkItemError(BaseModel):
+    index: int = Field(..., description="Position of the rejected entry in the request")
+    errors: List[Dict[str, Any]] = Field(..., description="Why the entry was rejected")
+
+
+class UserBulkCreateResponse(BaseModel):
+    users: List[UserResponse] = Field(..., description="Created users, in request order")
+    errors: List[UserBulkItemError] = Field(default_factory=list)
+
+
+class UserBulkUpdateResponse(BaseModel):
+    updated_ids: List[int] = Field(..., description="IDs of the updated users")
+    errors: List[UserBulkItemError] = Field(default_factory=list)
+
+
+class UserBulkDeleteResponse(BaseModel):
+    deleted_ids: List[int] = Field(..., description="IDs of the deleted users")
+    not_found_ids: List[int] = Field(..., description="Requested IDs that did not exist")
 
 
 class PredictResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
     cost_prediction: float = Field(..., description="Predicted health insurance premium cost")
+    model_version: str = Field(..., description="Model version that made the prediction")
+
+
+class PredictBatchItemError(BaseModel):
+    index: int = Field(..., description="Position of the invalid input in the batch")
+    errors: List[Dict[str, Any]] = Field(..., description="Validation errors for this input")
+
+
+class PredictBatchResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    cost_predictions: List[Optional[float]] = Field(
+        ..., description="Predicted costs in input order, null for inputs that failed validation"
+    )
+    errors: List[PredictBatchItemError] = Field(default_factory=list,
+                                                description="Validation errors of rejected inputs")
+    model_version: str = Field(..., description="Model version that made the predictions")
+
+
+class CacheStatsResponse(BaseModel):
+    size: int = Field(..., description="Number of cached entries")
+    max_entries: int = Field(..., description="Number of entries kept before evicting the least recently used")
+    hits: int = Field(..., description="Lookups answered from the cache")
+    misses: int = Field(..., description="Lookups not found in the cache")
+    evictions: int = Field(..., description="Entries evicted to stay within max_entries")
+    hit_ratio: float = Field(..., description="hits / (hits + misses)")
+
+
+class InferenceStatsResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    model_version: str = Field(..., description="Model version the statistics are about")
+    backend: str = Field(..., description="Inference backend: inline, thread or process")
+    max_workers: int = Field(..., description="Number of inference workers")
+    in_flight: int = Field(..., description="Predictions submitted and not yet finished")
+    queue_depth: int = Field(..., description="Predictions waiting for a free worker")
+    saturation: float = Field(..., description="Fraction of workers currently busy")
+    micro_batch_queue_depth: Optional[int] = Field(None, description="Requests waiting for a micro-batch flush")
+    prediction_cache: Optional[CacheStatsResponse] = Field(None, description="Prediction cache counters")
+
+
+class ModelVersionResponse(BaseModel):
+    version: str = Field(..., description="Name of the model version")
+    source: Optional[str] = Field(None, description="Path the model was loaded from")
+    loaded_at: float = Field(..., description="When the version was loaded, as a Unix timestamp")
+    load_seconds: float = Field(..., description="Time it took to load the artifacts")
+    active: bool = Field(..., description="Whether requests without a model_version use this version")
+
+
+class ModelRegistryResponse(BaseModel):
+    active_version: Optional[str] = Field(None, description="Version used by requests without a model_version")
+    versions: List[ModelVersionResponse] = Field(..., description="Registered versions, in registration order")
+
+
+class ProfilerStatsResponse(BaseModel):
+    sample_rate: float = Field(..., description="Fraction of requests profiled")
+    interval_ms: float = Field(..., description="Time between two stack samples, in milliseconds")
+    profiled_requests: int = Field(..., description="Requests profiled since the samples were last cleared")
+    active_requests: int = Field(..., description="Profiled requests in flight")
+    samples: int = Field(..., description="Stack samples taken")
+    stacks: int = Field(..., description="Distinct call stacks recorded")
+
+
+class CheckResponse(BaseModel):
+    ok: bool = Field(..., description="Whether the check passed")
+    seconds: float = Field(..., description="Time the check took")
+    error: Optional[str] = Field(None, description="Why the check failed")
+
+
+class LivenessResponse(BaseModel):
+    status: str = Field(..., description="Always alive")
+    uptime_seconds: float = Field(..., description="Time since the application started")
+
+
+class ReadinessResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    ready: bool = Field(..., description="Whether the process can take traffic")
+    status: str = Field(..., description="Start-up status: starting, ready, failed or stopping")
+    error: Optional[str] = Field(None, description="Error that made the start-up fail")
+    steps: Dict[str, float] = Field(..., description="Time each completed start-up step took, in seconds")
+    ready_seconds: Optional[float] = Field(None, description="Time from start-up to ready, in seconds")
+    model_version: Optional[str] = Field(None, description="Active model version")
+    model_load_seconds: Optional[float] = Field(None, description="Time it took to load the active model version")
+    checks: Dict[str, CheckResponse] = Field({}, description="Checks run once started: database and model")
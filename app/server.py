@@ -0,0 +1,214 @@
+"""
+Production entry point: serves the API from a pool of pre-forked uvicorn worker processes.
+
+    python -m app.server [--workers N] [--host HOST] [--port PORT]
+
+The application, and with it the bundled model, is imported once in the supervising process before the workers
+are forked, so they share its memory copy-on-write instead of each loading their own copy. The supervisor owns the
+listening socket, restarts workers that die, and on SIGTERM or SIGINT lets every worker finish its in-flight
+requests (up to the graceful shutdown timeout) before exiting.
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+
+from app.config import Settings, settings
+
+logger = logging.getLogger("uvicorn.error")
+
+# Workers dying sooner than this after they start are restarted with a delay, to avoid a restart loop.
+MIN_WORKER_UPTIME_SECONDS = 1.0
+
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+def default_workers() -> int:
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+
+def uvicorn_options(config: Settings) -> dict:
+    """
+    Returns the uvicorn configuration of a worker.
+
+    Parameters:
+        config (Settings): Application settings holding the server options.
+
+    Returns:
+        dict: Keyword arguments of `uvicorn.Config`. uvloop and httptools are used when they are installed.
+    """
+    return {
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11",
+        "backlog": config.server_backlog,
+        "timeout_keep_alive": config.server_keep_alive_seconds,
+        "timeout_graceful_shutdown": config.server_graceful_timeout_seconds,
+        "access_log": config.server_access_log,
+        "proxy_headers": True,
+        "server_header": False,
+    }
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """Creates the listening socket shared by the workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn server of a forked worker, which also shuts down gracefully if its supervisor disappears."""
+
+    def __init__(self, config: uvicorn.Config, supervisor_pid: int):
+        super().__init__(config)
+        self.supervisor_pid = supervisor_pid
+
+    async def on_tick(self, counter: int) -> bool:
+        if os.getppid() != self.supervisor_pid:
+            self.should_exit = True
+        return await super().on_tick(counter)
+
+
+def _prepare():
+    """
+    Creates the tables and loads the model version to serve once, before the workers are forked; the workers then
+    only warm the model up. Closes the database connections it used.
+    """
+    from app.api.endpoints import predict
+    from app.db_control import session
+
+    predict.registry.add(predict.load_default_version(), activate=True)
+
+    async def prepare():
+        await session.create_tables()
+        await session.engine.dispose()
+
+    asyncio.run(prepare())
+
+
+def _signal_worker(pid: int, signum: int):
+    """Sends a signal to a worker, ignoring workers that already exited."""
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def _run_worker(app, sock: socket.socket, options: dict, supervisor_pid: int):
+    # Leave the supervisor's process group, so that a Ctrl-C in a terminal reaches the workers once, through
+    # the supervisor, instead of twice, which uvicorn takes as a request to exit without draining.
+    os.setpgid(0, 0)
+    for signum in STOP_SIGNALS:
+        signal.signal(signum, signal.SIG_DFL)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+    WorkerServer(uvicorn.Config(app, **options), supervisor_pid).run(sockets=[sock])
+
+
+def serve(host: str, port: int, workers: Optional[int] = None, app_settings: Settings = settings):
+    """
+    Serves the API on host:port with `workers` processes (defaulting to the number of usable cores) until
+    SIGTERM or SIGINT, then drains them.
+    """
+    workers = workers or default_workers()
+    options = uvicorn_options(app_settings)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+
+    from app.main import app
+
+    if workers == 1 or not hasattr(os, "fork"):
+        uvicorn.Server(uvicorn.Config(app, host=host, port=port, **options)).run()
+        return
+
+    if app_settings.user_cache_enabled:
+        logger.warning("The user cache is per worker: a write on one worker leaves the others serving stale users "
+                       "for up to %ss", app_settings.user_cache_ttl_seconds)
+    _prepare()
+    sock = bind_socket(host, port, app_settings.server_backlog)
+    supervisor_pid = os.getpid()
+    children: Dict[int, float] = {}
+    stopping: List[int] = []
+
+    def spawn():
+        # Hold the stop signals back while forking, so that a worker is recorded before `stop` can run, and does
+        # not run the supervisor's handler itself before installing its own.
+        signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                _run_worker(app, sock, options, supervisor_pid)
+                exit_code = 0
+            except BaseException:
+                logger.exception("Worker %d failed", os.getpid())
+            finally:
+                os._exit(exit_code)
+        children[pid] = time.monotonic()
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+
+    def stop(signum, frame):
+        if not stopping:
+            logger.info("Received %s, draining %d workers", signal.Signals(signum).name, len(children))
+        stopping.append(signum)
+        for pid in children:
+            _signal_worker(pid, signal.SIGTERM)
+
+    for signum in STOP_SIGNALS:
+        signal.signal(signum, stop)
+
+    logger.info("Serving on http://%s:%d with %d workers (loop %s, http %s, keep-alive %ss, backlog %d)", host, port,
+                workers, options["loop"], options["http"], options["timeout_keep_alive"], options["backlog"])
+    for _ in range(workers):
+        spawn()
+
+    deadline = None
+    while children:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if stopping and deadline is None:
+                # Leave the workers their graceful shutdown timeout, plus time to run the lifespan shutdown.
+                deadline = time.monotonic() + app_settings.server_graceful_timeout_seconds + 10
+            if deadline is not None and time.monotonic() > deadline:
+                logger.error("Workers did not drain in time, killing %d", len(children))
+                for child in children:
+                    _signal_worker(child, signal.SIGKILL)
+                deadline = float("inf")
+            time.sleep(0.1)
+            continue
+
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        logger.warning("Worker %d exited with status %d, restarting it", pid, os.waitstatus_to_exitcode(status))
+        if time.monotonic() - started < MIN_WORKER_UPTIME_SECONDS:
+            time.sleep(MIN_WORKER_UPTIME_SECONDS)
+        spawn()
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve the API with pre-forked uvicorn workers.")
+    parser.add_argument('--host', type=str, default=settings.server_host,
+                        help=f"Interface to listen on. Default: {settings.server_host}.")
+    parser.add_argument('--port', type=int, default=settings.server_port,
+                        help=f"Port to listen on. Default: {settings.server_port}.")
+    parser.add_argument('--workers', type=int, default=settings.server_workers,
+                        help="Number of worker processes. Default: the number of usable CPU cores.")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Application start-up, run by the lifespan of `app.main`.
+
+Importing the application only defines it; the work of getting ready to serve (creating the tables, loading the
+model, and with it importing joblib, pandas and sklearn when pickled artifacts are used, then warming it up) runs
+in `initialize` once the server has started. The server therefore listens and answers `/api/healthcheck` right
+away, while `state` tells whether the application is ready to take traffic yet (see `/api/ready`).
+"""
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+STOPPING = "stopping"
+
+
+class StartupState:
+    """Progress of the application start-up: its status, the time each step took and the error that stopped it."""
+
+    def __init__(self):
+        self.reset()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == READY
+
+    def reset(self):
+        """Goes back to the starting state, when the application is started (again)."""
+        self.status = STARTING
+        self.error: Optional[str] = None
+        self.steps: Dict[str, float] = {}
+        self.started_at = time.perf_counter()
+        self.ready_seconds: Optional[float] = None
+        self.tables: Optional[asyncio.Future] = None
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """Times a start-up step under `name`."""
+        start = time.perf_counter()
+        yield
+        self.steps[name] = time.perf_counter() - start
+
+    def mark_ready(self):
+        self.status = READY
+        self.ready_seconds = time.perf_counter() - self.started_at
+        logger.info("Application ready in %.2fs (%s)", self.ready_seconds,
+                    ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.steps.items()))
+
+    def mark_failed(self, error: BaseException):
+        self.status = FAILED
+        self.error = f"{type(error).__name__}: {error}"
+        logger.exception("Application start-up failed")
+
+
+state = StartupState()
+
+
+async def initialize():
+    """
+    Gets the application ready to serve, recording its progress in `state`: creates the tables, loads the model
+    version configured in settings (unless one is already active, e.g. preloaded by `app.server` before forking)
+    and warms it up, then registers the versions of the model registry directory.
+    """
+    from app.api.endpoints import predict
+    from app.db_control import session
+
+    try:
+        with state.step("tables"):
+            # Not for production, only for development. For production, a migration tool should be used.
+            # Shielded from the cancellation of start-up, as cancelling it mid-way would leave its connection's
+            # thread behind; the lifespan waits for it before disposing of the engine.
+            state.tables = asyncio.ensure_future(session.create_tables())
+            await asyncio.shield(state.tables)
+        with state.step("model"):
+            if predict.registry.active_version is None:
+                predict.registry.add(await asyncio.to_thread(predict.load_default_version), activate=True)
+        with state.step("warm_up"):
+            await predict.registry.get().warm_up()
+        if settings.model_registry_dir is not None:
+            with state.step("model_registry"):
+                await predict.registry.scan(settings.model_registry_dir)
+    except Exception as error:
+        state.mark_failed(error)
+        return
+    state.mark_ready()
@@ -0,0 +1,401 @@
+"""
+Load-testing and latency benchmark suite for the API.
+
+Drives the service either in-process through the ASGI transport, against a uvicorn server it starts, or against
+a server already running at a URL, with a configurable number of concurrent clients. Reports throughput and
+p50/p95/p99 latencies per request type, and saves them as JSON that `compare` checks for regressions:
+
+    python -m benchmarks.load_test run --target asgi --scenario predict --requests 5000 --concurrency 32 \\
+        --output results.json
+    python -m benchmarks.load_test compare baseline.json results.json --threshold 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import httpx
+import numpy as np
+
+TARGETS = ("asgi", "uvicorn")
+PERCENTILES = (50, 95, 99)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Recorder:
+    """Collects the latency and outcome of every request, grouped by request name."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.enabled = True
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str,
+                      expected_status: Optional[int] = None, **kwargs) -> Optional[httpx.Response]:
+        """
+        Sends a request and records its latency under `name`. A transport error, a 5xx response or a status
+        other than `expected_status` counts as an error.
+        """
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        latency = time.perf_counter() - start
+
+        failed = (response is None or response.status_code >= 500
+                  or (expected_status is not None and response.status_code != expected_status))
+        if self.enabled:
+            self.latencies.setdefault(name, []).append(latency)
+            if failed:
+                self.errors[name] = self.errors.get(name, 0) + 1
+        return None if failed else response
+
+    def summary(self, seconds: float) -> Dict[str, dict]:
+        """Returns, per request name, the count, errors, throughput and latency statistics in milliseconds."""
+        results = {}
+        for name, latencies in sorted(self.latencies.items()):
+            values = np.array(latencies) * 1000
+            results[name] = {
+                "count": len(values),
+                "errors": self.errors.get(name, 0),
+                "throughput_rps": len(values) / seconds if seconds > 0 else 0.0,
+                "mean_ms": float(values.mean()),
+                **{f"p{p}_ms": float(np.percentile(values, p)) for p in PERCENTILES},
+                "max_ms": float(values.max()),
+            }
+        return results
+
+
+# A scenario iteration sends one or more requests through the recorder; `index` numbers the iterations.
+Scenario = Callable[[httpx.AsyncClient, Recorder, int], Awaitable[None]]
+
+
+def _predict_payloads(count: int = 1000, seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    return [
+        {"age": rng.randint(18, 64), "bmi": round(rng.uniform(15, 45), 1), "children": rng.randint(0, 5),
+         "smoker": rng.random() < 0.2}
+        for _ in range(count)
+    ]
+
+
+def healthcheck_scenario() -> Scenario:
+    async def iteration(client, recorder, index):
+        await recorder.request(client, "GET /api/healthcheck", "GET", "/api/healthcheck", expected_status=200)
+    return iteration
+
+
+def predict_scenario() -> Scenario:
+    payloads = _predict_payloads()
+
+    async def iteration(client, recorder, index):
+        await recorder.request(client, "POST /predict", "POST", "/predict", expected_status=200,
+                               json=payloads[index % len(payloads)])
+    return iteration
+
+
+def users_scenario() -> Scenario:
+    """Creates, reads, updates and deletes one user per iteration, so the database ends as it started."""
+    run_id = uuid.uuid4().hex[:8]
+
+    async def iteration(client, recorder, index):
+        user = {"name": f"Load {index}", "email": f"load-{run_id}-{index}@example.com", "age": 20 + index % 50}
+        response = await recorder.request(client, "POST /api/users/create", "POST", "/api/users/create",
+                                          expected_status=201, json=user)
+        if response is None:
+            return
+        user_id = response.json()["id"]
+        await recorder.request(client, "GET /api/users/{id}", "GET", f"/api/users/{user_id}", expected_status=200)
+        await recorder.request(client, "PUT /api/users/{id}", "PUT", f"/api/users/{user_id}", expected_status=200,
+                               json={**user, "age": user["age"] + 1})
+        await recorder.request(client, "DELETE /api/users/{id}", "DELETE", f"/api/users/{user_id}",
+                               expected_status=204)
+    return iteration
+
+
+def load_traffic(path: str) -> List[dict]:
+    """
+    Reads a traffic file: one JSON object per line with "method" and "path", and optionally "json" (request
+    body), "headers", "name" (defaults to "METHOD path") and "expected_status".
+    """
+    traffic = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "method" not in entry or "path" not in entry:
+                raise ValueError(f"{path}:{line_number}: a traffic entry needs a method and a path")
+            traffic.append(entry)
+    if not traffic:
+        raise ValueError(f"{path} holds no requests")
+    return traffic
+
+
+def replay_scenario(traffic: List[dict]) -> Scenario:
+    """Replays the requests of a traffic file in order, cycling through it."""
+    async def iteration(client, recorder, index):
+        entry = traffic[index % len(traffic)]
+        method = entry["method"].upper()
+        await recorder.request(client, entry.get("name", f"{method} {entry['path']}"), method, entry["path"],
+                               expected_status=entry.get("expected_status"), json=entry.get("json"),
+                               headers=entry.get("headers"))
+    return iteration
+
+
+SCENARIOS: Dict[str, Callable[[], Scenario]] = {
+    "healthcheck": healthcheck_scenario,
+    "predict": predict_scenario,
+    "users": users_scenario,
+}
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, iterations: int, concurrency: int,
+                       warmup: int = 0) -> dict:
+    """
+    Runs `iterations` iterations of a scenario over `concurrency` concurrent clients, after `warmup` unrecorded
+    ones, and returns the per-request summary plus the overall duration and throughput.
+    """
+    recorder = Recorder()
+
+    async def drain(counter: Iterator[int]):
+        for index in counter:
+            await scenario(client, recorder, index)
+
+    async def run(start: int, count: int) -> float:
+        counter = iter(range(start, start + count))
+        began = time.perf_counter()
+        await asyncio.gather(*(drain(counter) for _ in range(concurrency)))
+        return time.perf_counter() - began
+
+    recorder.enabled = False
+    await run(0, warmup)
+    recorder.enabled = True
+    seconds = await run(warmup, iterations)
+
+    requests = recorder.summary(seconds)
+    total = sum(result["count"] for result in requests.values())
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "seconds": seconds,
+        "throughput_rps": total / seconds if seconds > 0 else 0.0,
+        "requests": requests,
+    }
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 30.0,
+                           server: Optional[subprocess.Popen] = None):
+    """
+    Polls `/api/ready` until the application reports ready: it answers, but `/predict` returns 503, while its
+    model loads in the background. Raises RuntimeError if the start-up fails, the server exits or `timeout` passes.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            response = await client.get("/api/ready")
+            if response.status_code == 200:
+                return
+            if response.json().get("status") == "failed":
+                raise RuntimeError(f"The application failed to start: {response.json().get('error')}")
+        except httpx.TransportError:
+            pass
+        if (server is not None and server.poll() is not None) or time.monotonic() > deadline:
+            raise RuntimeError("The application did not get ready")
+        await asyncio.sleep(0.1)
+
+
+@asynccontextmanager
+async def asgi_client(startup_timeout: float = 30.0) -> AsyncIterator[httpx.AsyncClient]:
+    """Client calling the application in-process, with its lifespan running, once it is ready."""
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+            await wait_until_ready(client, startup_timeout)
+            yield client
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@asynccontextmanager
+async def uvicorn_client(workers: int = 1, env: Optional[Dict[str, str]] = None,
+                         startup_timeout: float = 30.0) -> AsyncIterator[httpx.AsyncClient]:
+    """Client calling a local uvicorn server started for the benchmark, once it is ready, and stopped afterwards."""
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=REPO_ROOT, env={**os.environ, **(env or {})},
+    )
+    try:
+        async with httpx_client(f"http://127.0.0.1:{port}") as client:
+            await wait_until_ready(client, startup_timeout, server)
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def httpx_client(base_url: str) -> httpx.AsyncClient:
+    """Client calling a running server, with enough pooled connections for any concurrency."""
+    return httpx.AsyncClient(base_url=base_url, timeout=30.0,
+                             limits=httpx.Limits(max_connections=None, max_keepalive_connections=None))
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmarks(scenarios: List[str], target: str = "asgi", url: Optional[str] = None,
+                         iterations: int = 1000, concurrency: int = 16, warmup: int = 50,
+                         traffic_path: Optional[str] = None, workers: int = 1,
+                         env: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Runs the given scenarios (names from `SCENARIOS`, or "replay" with `traffic_path`) against one target:
+    `url` if given, else "asgi" (in-process) or "uvicorn" (a local server with `workers` processes).
+
+    Returns the JSON-serializable results, with the run metadata under "meta".
+    """
+    factories = {name: SCENARIOS[name] for name in scenarios if name != "replay"}
+    if "replay" in scenarios:
+        if traffic_path is None:
+            raise ValueError("The replay scenario needs a traffic file")
+        traffic = load_traffic(traffic_path)
+        factories["replay"] = lambda: replay_scenario(traffic)
+
+    if url is not None:
+        client_context = httpx_client(url)
+    elif target == "asgi":
+        client_context = asgi_client()
+    elif target == "uvicorn":
+        client_context = uvicorn_client(workers=workers, env=env)
+    else:
+        raise ValueError(f"Unknown target: {target}")
+
+    results = {}
+    async with client_context as client:
+        for name, factory in factories.items():
+            results[name] = await run_scenario(client, factory(), iterations, concurrency, warmup=warmup)
+
+    return {
+        "meta": {
+            "target": url or target,
+            "commit": _git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "iterations": iterations,
+            "concurrency": concurrency,
+            "workers": workers if url is None and target == "uvicorn" else None,
+        },
+        "scenarios": results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.1) -> List[str]:
+    """
+    Lists the regressions of `current` against `baseline`: request types whose p50 or p99 latency grew, or whose
+    throughput fell, by more than `threshold` (a fraction).
+    """
+    regressions = []
+    for scenario, results in current["scenarios"].items():
+        for name, stats in results["requests"].items():
+            base = baseline.get("scenarios", {}).get(scenario, {}).get("requests", {}).get(name)
+            if base is None:
+                continue
+            for metric in ("p50_ms", "p99_ms"):
+                if base[metric] > 0 and stats[metric] > base[metric] * (1 + threshold):
+                    regressions.append(f"{scenario} {name}: {metric} {base[metric]:.2f} -> {stats[metric]:.2f}")
+            if stats["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+                regressions.append(f"{scenario} {name}: throughput_rps {base['throughput_rps']:.0f} -> "
+                                   f"{stats['throughput_rps']:.0f}")
+    return regressions
+
+
+def format_results(results: dict) -> str:
+    """Formats benchmark results as a table."""
+    lines = [f"{'scenario':<12} {'request':<28} {'count':>7} {'errors':>6} {'req/s':>9} "
+             + " ".join(f"{f'p{p} ms':>8}" for p in PERCENTILES)]
+    for scenario, scenario_results in results["scenarios"].items():
+        for name, stats in scenario_results["requests"].items():
+            percentiles = " ".join(f"{stats[f'p{p}_ms']:>8.2f}" for p in PERCENTILES)
+            lines.append(f"{scenario:<12} {name:<28} {stats['count']:>7} {stats['errors']:>6} "
+                         f"{stats['throughput_rps']:>9.0f} {percentiles}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load-test the API and compare latency results between commits.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run benchmark scenarios and report throughput and latencies.")
+    run.add_argument('--target', choices=TARGETS, default="asgi",
+                     help="asgi: in-process, uvicorn: a local server started for the run. Default is asgi.")
+    run.add_argument('--url', type=str, default=None, help="Benchmark a server already running at this URL instead.")
+    run.add_argument('--scenario', action="append", choices=list(SCENARIOS) + ["replay"], default=None,
+                     help="Scenario to run; repeat for several. Default: healthcheck, predict and users.")
+    run.add_argument('--traffic', type=str, default=None,
+                     help="JSON lines traffic file for the replay scenario (selects it if no scenario is given).")
+    run.add_argument('--requests', type=int, default=1000, help="Iterations per scenario. Default is 1000.")
+    run.add_argument('--concurrency', type=int, default=16, help="Concurrent clients. Default is 16.")
+    run.add_argument('--warmup', type=int, default=50, help="Unrecorded iterations first. Default is 50.")
+    run.add_argument('--workers', type=int, default=1, help="uvicorn worker processes for --target uvicorn.")
+    run.add_argument('--database_url', type=str, default=None,
+                     help="Database the service uses. Default: a temporary SQLite file, leaving user.db untouched.")
+    run.add_argument('--output', type=str, default=None, help="Path to save the results as JSON.")
+
+    compare = commands.add_parser("compare", help="Compare two saved results; exits with 1 on a regression.")
+    compare.add_argument('baseline', type=str, help="Results of the reference commit.")
+    compare.add_argument('current', type=str, help="Results to check.")
+    compare.add_argument('--threshold', type=float, default=0.1,
+                         help="Relative change counted as a regression. Default is 0.1 (10%%).")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare_results(baseline, current, args.threshold)
+        print("\n".join(regressions) if regressions else "No regressions.")
+        sys.exit(1 if regressions else 0)
+
+    scenarios = args.scenario or (["replay"] if args.traffic else ["healthcheck", "predict", "users"])
+    with tempfile.TemporaryDirectory() as directory:
+        # Settings are read from the environment when the app is imported, here or in the uvicorn server.
+        database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(directory, 'load_test.db')}"
+        env = {"ML_SERVICE_DATABASE_URL": database_url}
+        os.environ.update(env)
+        results = asyncio.run(run_benchmarks(scenarios, target=args.target, url=args.url, iterations=args.requests,
+                                             concurrency=args.concurrency, warmup=args.warmup,
+                                             traffic_path=args.traffic, workers=args.workers, env=env))
+
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
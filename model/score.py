@@ -0,0 +1,218 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from app.models.model_loader import (
+    DEFAULT_MODEL_PATH,
+    DEFAULT_TRANSFORMER_PATH,
+    FEATURE_COLUMNS,
+    MAX_AGE,
+    load_model_and_transformer,
+    predict_insurance_charges_batch,
+)
+
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+MANIFEST_FILE_NAME = "_manifest.json"
+SUCCESS_FILE_NAME = "_SUCCESS"
+SMOKER_VALUES = {"yes": 1.0, "true": 1.0, "1": 1.0, "no": 0.0, "false": 0.0, "0": 0.0}
+
+# Model loaded into each pool worker by _init_worker.
+_model = None
+_poly = None
+
+
+def _init_worker(model_path, transformer_path, inference_mode):
+    global _model, _poly
+    _model, _poly = load_model_and_transformer(model_path, transformer_path, inference_mode=inference_mode)
+    # One BLAS thread per worker: the pool already uses every core.
+    threadpool_limits(limits=1, user_api="blas")
+
+
+def _read_chunks(input_path, fmt, chunk_size):
+    """Yields the input as DataFrames of at most chunk_size rows."""
+    if fmt == "csv":
+        yield from pd.read_csv(input_path, chunksize=chunk_size)
+        return
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading and writing Parquet requires pyarrow: pip install pyarrow")
+    for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pandas()
+
+
+def _feature_matrix(df):
+    """
+    Builds the (n, 4) feature matrix of a chunk, and a mask of the rows with valid inputs.
+
+    smoker may be boolean, 0/1, or yes/no/true/false text as in the training data.
+    """
+    smoker = df["smoker"]
+    if smoker.dtype == object:
+        smoker = smoker.astype(str).str.strip().str.lower().map(SMOKER_VALUES)
+    columns = {"age": df["age"], "bmi": df["bmi"], "children": df["children"], "smoker": smoker}
+    features = np.column_stack([pd.to_numeric(columns[name], errors="coerce").to_numpy(dtype=np.float64)
+                                for name in FEATURE_COLUMNS])
+
+    age, bmi, children, smoker = features.T
+    with np.errstate(invalid="ignore"):
+        valid = ((age >= 0) & (age <= MAX_AGE) & (age == np.floor(age)) & (bmi >= 0) & (bmi <= 100)
+                 & (children >= 0) & (children == np.floor(children)) & ((smoker == 0) | (smoker == 1)))
+    return features, valid
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _manifest(input_path, chunk_size, fmt, model_path, transformer_path, inference_mode):
+    """
+    Returns the settings a run's output depends on: the input and how it is chunked, and the model, identified by
+    its paths and the SHA-256 of its files, so that a retrained model written to the same paths is told apart.
+    """
+    # A .npz artifact holds the whole model, and the transformer path is not used.
+    if os.path.splitext(model_path)[1] == ".npz":
+        transformer_path = None
+    artifacts = [path for path in (model_path, transformer_path) if path is not None]
+    return {
+        "input_path": os.path.abspath(input_path),
+        "chunk_size": chunk_size,
+        "format": fmt,
+        "model_path": os.path.abspath(model_path),
+        "transformer_path": os.path.abspath(transformer_path) if transformer_path is not None else None,
+        "model_sha256": [_file_sha256(path) for path in artifacts],
+        "inference_mode": inference_mode,
+    }
+
+
+def _part_path(output_dir, index, fmt):
+    return os.path.join(output_dir, f"part-{index:05d}.{fmt}")
+
+
+def _score_chunk(index, df, output_dir, fmt):
+    """Pool task: scores one chunk and writes it, with a cost_prediction column, as its own part file."""
+    features, valid = _feature_matrix(df)
+    predictions = np.full(len(df), np.nan)
+    if valid.any():
+        predictions[valid] = predict_insurance_charges_batch(_model, _poly, features[valid])
+    df = df.assign(cost_prediction=predictions)
+
+    # Write under a temporary name and rename, so an interrupted run never leaves a partial part behind.
+    path = _part_path(output_dir, index, fmt)
+    temporary_path = path + ".tmp"
+    if fmt == "csv":
+        df.to_csv(temporary_path, index=False)
+    else:
+        df.to_parquet(temporary_path, index=False)
+    os.replace(temporary_path, path)
+    return len(df), int((~valid).sum())
+
+
+def score_file(input_path, output_dir, chunk_size=100000, workers=None, model_path=DEFAULT_MODEL_PATH,
+               transformer_path=DEFAULT_TRANSFORMER_PATH, inference_mode="compiled"):
+    """
+    Scores a CSV or Parquet file in chunks on a process pool, each worker holding its own copy of the model.
+
+    Each chunk is written as output_dir/part-NNNNN.<format>, in the input's format, with the input columns and a
+    cost_prediction column (empty for rows with invalid inputs). Running again with the same settings resumes
+    an interrupted run: chunks whose part file exists are skipped. A run with another input, chunk size or model
+    (see `_manifest`) is refused, so that the parts never mix models. output_dir/_SUCCESS marks a complete run.
+
+    Returns a dict with the number of chunks, skipped chunks, rows scored and invalid rows, seconds and rows/sec.
+    Rows and invalid rows only count the chunks scored by this run, not the skipped ones.
+    """
+    fmt = FORMATS.get(os.path.splitext(input_path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported input format: {input_path} (expected one of {', '.join(FORMATS)})")
+    workers = workers or os.cpu_count() or 1
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = _manifest(input_path, chunk_size, fmt, model_path, transformer_path, inference_mode)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) != manifest:
+                raise ValueError(f"{output_dir} holds the output of a run with different settings: {manifest_path}")
+    else:
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f)
+
+    start = time.perf_counter()
+    chunks = skipped = rows = invalid = 0
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(model_path, transformer_path, inference_mode))
+    with pool:
+        pending = set()
+        for index, df in enumerate(_read_chunks(input_path, fmt, chunk_size)):
+            chunks += 1
+            if os.path.exists(_part_path(output_dir, index, fmt)):
+                skipped += 1
+                continue
+            # Bound the chunks held in memory to two per worker.
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk_rows, chunk_invalid = future.result()
+                    rows, invalid = rows + chunk_rows, invalid + chunk_invalid
+            pending.add(pool.submit(_score_chunk, index, df, output_dir, fmt))
+
+        for future in pending:
+            chunk_rows, chunk_invalid = future.result()
+            rows, invalid = rows + chunk_rows, invalid + chunk_invalid
+
+    open(os.path.join(output_dir, SUCCESS_FILE_NAME), "w").close()
+    seconds = time.perf_counter() - start
+    return {
+        "chunks": chunks,
+        "skipped_chunks": skipped,
+        "rows": rows,
+        "invalid_rows": invalid,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet dataset offline with a process pool.")
+    parser.add_argument('input_path', type=str, help="Path to the .csv or .parquet file to score.")
+    parser.add_argument('output_dir', type=str,
+                        help="Directory to write the scored part files to. Re-running with it resumes the run.")
+    parser.add_argument('--chunk_size', type=int, default=100000, help="Number of rows per chunk. Default is 100000.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes. Default: CPU count.")
+    parser.add_argument('--model_path', type=str, default=DEFAULT_MODEL_PATH,
+                        help="Pickled model, or .npz artifact, to score with. Default: the bundled model.")
+    parser.add_argument('--transformer_path', type=str, default=DEFAULT_TRANSFORMER_PATH,
+                        help="Pickled polynomial features transformer (ignored for a .npz model).")
+    parser.add_argument('--inference_mode', type=str, choices=("sklearn", "compiled", "lookup"), default="compiled",
+                        help="How predictions are computed. Default is compiled.")
+
+    args = parser.parse_args()
+
+    # Ensure input path exists
+    if not os.path.exists(args.input_path):
+        raise FileNotFoundError(f"The specified input file does not exist: {args.input_path}")
+
+    stats = score_file(
+        input_path=args.input_path,
+        output_dir=args.output_dir,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        model_path=args.model_path,
+        transformer_path=args.transformer_path,
+        inference_mode=args.inference_mode
+    )
+    print(f"Scored {stats['rows']} rows ({stats['invalid_rows']} invalid) in {stats['chunks']} chunks, "
+          f"{stats['skipped_chunks']} already done (not counted), in {stats['seconds']:.2f} s "
+          f"({stats['rows_per_second']:.0f} rows/sec).")
@@ -0,0 +1,293 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.model_selection import KFold
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+from threadpoolctl import threadpool_limits
+
+from app.models.model_loader import (
+    build_feature_matrix,
+    load_model_and_transformer,
+    predict_insurance_charges,
+    predict_insurance_charges_batch,
+)
+from app.models.registry import ARTIFACT_FILE_NAME, MODEL_FILE_NAME, TRANSFORMER_FILE_NAME
+from model.train import FEATURE_COLUMNS, SMOKER_CODES, TARGET_COLUMN, export_model_artifact
+
+DEGREES = (1, 2, 3, 4)
+ESTIMATORS = ("linear", "ridge", "lasso")
+
+# Predictions timed per candidate, one input at a time, and rows of the batch timed as one matrix.
+LATENCY_CALLS = 2000
+LATENCY_BATCH_ROWS = 1000
+
+# Training data loaded into each pool worker by _init_worker.
+_features = None
+_target = None
+
+
+def _read_training_data(data_path):
+    """Returns the feature columns (smoker as 0/1) and the charges of a training CSV, without incomplete rows."""
+    df = pd.read_csv(data_path, usecols=FEATURE_COLUMNS + [TARGET_COLUMN])
+    df["smoker"] = df["smoker"].astype(str).str.strip().str.lower().map(SMOKER_CODES)
+    df = df.dropna()
+    return df[FEATURE_COLUMNS].astype(np.float64), df[TARGET_COLUMN].to_numpy(dtype=np.float64)
+
+
+def _init_worker(data_path):
+    global _features, _target
+    _features, _target = _read_training_data(data_path)
+    # One BLAS thread per worker: the pool already uses every core.
+    threadpool_limits(limits=1, user_api="blas")
+
+
+def candidates(degrees=DEGREES, estimators=ESTIMATORS, alpha=1.0):
+    """
+    Returns the candidate pipelines: every estimator at every degree, on all polynomial terms and, from degree 2,
+    on the interaction terms only (products of distinct features, no powers).
+    """
+    pipelines = []
+    for degree, estimator, interaction_only in itertools.product(sorted(degrees), estimators, (False, True)):
+        if interaction_only and degree == 1:
+            continue
+        pipelines.append({
+            "name": f"{estimator}-d{degree}" + ("-interaction" if interaction_only else ""),
+            "degree": degree,
+            "estimator": estimator,
+            "alpha": None if estimator == "linear" else alpha,
+            "interaction_only": interaction_only,
+        })
+    return pipelines
+
+
+def fit_candidate(candidate, features, target):
+    """
+    Fits a candidate pipeline, returning it as a fitted LinearRegression over the terms of a PolynomialFeatures.
+
+    The estimator is fitted on standardized terms, so that the ridge and lasso penalties weigh every term alike,
+    then the scaling is folded into the coefficients: the result evaluates the raw polynomial terms like the models
+    of train.py, and is exported and served the same way.
+    """
+    poly = PolynomialFeatures(degree=candidate["degree"], interaction_only=candidate["interaction_only"])
+    terms = poly.fit_transform(features)[:, 1:]
+    scaler = StandardScaler().fit(terms)
+    if candidate["estimator"] == "ridge":
+        estimator = Ridge(alpha=candidate["alpha"])
+    elif candidate["estimator"] == "lasso":
+        estimator = Lasso(alpha=candidate["alpha"], max_iter=10000)
+    else:
+        estimator = LinearRegression()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        estimator.fit(scaler.transform(terms), target)
+
+    coef = estimator.coef_ / scaler.scale_
+    model = LinearRegression()
+    model.coef_ = np.concatenate([[0.0], coef])
+    model.intercept_ = float(estimator.intercept_ - coef @ scaler.mean_)
+    model.n_features_in_ = len(model.coef_)
+    return model, poly
+
+
+def _evaluate_candidate(candidate, folds, seed):
+    """
+    Pool task: returns a candidate's k-fold cross-validated RMSE and MAE, and the candidate fitted on all rows
+    with the time that took.
+    """
+    squared_errors = absolute_errors = 0.0
+    for training, validation in KFold(n_splits=folds, shuffle=True, random_state=seed).split(_features):
+        model, poly = fit_candidate(candidate, _features.iloc[training], _target[training])
+        errors = model.predict(poly.transform(_features.iloc[validation])) - _target[validation]
+        squared_errors += float(np.sum(errors ** 2))
+        absolute_errors += float(np.sum(np.abs(errors)))
+
+    start = time.perf_counter()
+    model, poly = fit_candidate(candidate, _features, _target)
+    fit_seconds = time.perf_counter() - start
+    scores = {"rmse": np.sqrt(squared_errors / len(_target)), "mae": absolute_errors / len(_target),
+              "fit_seconds": fit_seconds}
+    return scores, model, poly
+
+
+def _save(model, poly, directory):
+    """Saves a fitted candidate in the layout of a model registry version directory."""
+    os.makedirs(directory, exist_ok=True)
+    joblib.dump(model, os.path.join(directory, MODEL_FILE_NAME))
+    joblib.dump(poly, os.path.join(directory, TRANSFORMER_FILE_NAME))
+    export_model_artifact(model, poly, os.path.join(directory, ARTIFACT_FILE_NAME))
+
+
+def _best_seconds(function, repeats=3):
+    """Runs `function` `repeats` times, returning its fastest time."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _measure_candidate(directory, inputs, inference_mode):
+    """Times a saved candidate as the service loads it, one input at a time and as a batch, and sizes its files."""
+    if inference_mode == "sklearn":
+        model, poly = load_model_and_transformer(os.path.join(directory, MODEL_FILE_NAME),
+                                                 os.path.join(directory, TRANSFORMER_FILE_NAME))
+    else:
+        model, poly = load_model_and_transformer(os.path.join(directory, ARTIFACT_FILE_NAME),
+                                                 inference_mode=inference_mode)
+    single = inputs[:LATENCY_CALLS]
+    batch = build_feature_matrix(inputs[:LATENCY_BATCH_ROWS])
+
+    def predict_each():
+        for input_data in single:
+            predict_insurance_charges(model, poly, input_data)
+
+    return {
+        "single_row_us": _best_seconds(predict_each) / len(single) * 1e6,
+        "batch_row_us": _best_seconds(lambda: predict_insurance_charges_batch(model, poly, batch)) / len(batch) * 1e6,
+        "artifact_bytes": os.path.getsize(os.path.join(directory, ARTIFACT_FILE_NAME)),
+        "pickle_bytes": (os.path.getsize(os.path.join(directory, MODEL_FILE_NAME))
+                         + os.path.getsize(os.path.join(directory, TRANSFORMER_FILE_NAME))),
+    }
+
+
+def select(results, error_budget=None):
+    """
+    Returns the name of the selected candidate: the fastest, one input at a time, among those whose cross-validated
+    RMSE is within `error_budget`, or the most accurate if there is no budget. None if no candidate meets it.
+    """
+    if error_budget is None:
+        return min(results, key=lambda result: result["rmse"])["name"]
+    eligible = [result for result in results if result["rmse"] <= error_budget]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda result: (result["single_row_us"], result["batch_row_us"]))["name"]
+
+
+def select_model(data_path, degrees=DEGREES, estimators=ESTIMATORS, alpha=1.0, folds=5, workers=None, seed=0,
+                 error_budget=None, inference_mode="compiled", output_dir=None):
+    """
+    Benchmarks candidate pipelines (see `candidates`) on a training CSV and selects one.
+
+    Candidates are cross-validated and fitted in parallel on a process pool, each worker loading the data once.
+    Each fitted candidate is then saved and loaded back as the service would with `inference_mode`, and timed in
+    this process one candidate at a time, so that training does not disturb the measurements: latency per input
+    predicted one at a time (as /predict does) and per row of a batch, and the size of its artifacts.
+
+    With `output_dir`, the selected candidate is saved there in the layout of a model registry version directory
+    (pickles and .npz artifact), ready to be copied into ML_SERVICE_MODEL_REGISTRY_DIR.
+
+    Returns the report: the settings, the selected candidate name (None if none meets `error_budget`), and one
+    entry per candidate with its settings, number of polynomial terms, cross-validated RMSE and MAE, fit time,
+    latencies in microseconds and artifact sizes in bytes, sorted by RMSE.
+    """
+    pipelines = candidates(degrees, estimators, alpha)
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(data_path,))
+    with pool:
+        futures = [pool.submit(_evaluate_candidate, candidate, folds, seed) for candidate in pipelines]
+        evaluated = [future.result() for future in futures]
+
+    features, _ = _read_training_data(data_path)
+    sample = features.sample(n=max(LATENCY_CALLS, LATENCY_BATCH_ROWS), replace=True, random_state=seed)
+    inputs = [{**row, "age": int(row["age"]), "children": int(row["children"]), "smoker": bool(row["smoker"])}
+              for row in sample.to_dict("records")]
+
+    results = []
+    fitted = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for candidate, (scores, model, poly) in zip(pipelines, evaluated):
+            directory = os.path.join(work_dir, candidate["name"])
+            _save(model, poly, directory)
+            results.append({**candidate, "terms": len(poly.powers_), **scores,
+                            **_measure_candidate(directory, inputs, inference_mode)})
+            fitted[candidate["name"]] = model, poly
+
+    results.sort(key=lambda result: result["rmse"])
+    selected = select(results, error_budget)
+    if output_dir is not None and selected is not None:
+        _save(*fitted[selected], output_dir)
+    return {
+        "data_path": os.path.abspath(data_path),
+        "rows": len(features),
+        "folds": folds,
+        "inference_mode": inference_mode,
+        "error_budget": error_budget,
+        "selected": selected,
+        "candidates": results,
+    }
+
+
+def format_report(report):
+    """Formats a report as a table, marking the selected candidate with *."""
+    lines = [f"{'candidate':<26} {'terms':>5} {'cv rmse':>10} {'cv mae':>10} {'1 row us':>9} {'batch us/row':>12} "
+             f"{'artifact kB':>11}"]
+    for result in report["candidates"]:
+        marker = "*" if result["name"] == report["selected"] else " "
+        lines.append(f"{marker}{result['name']:<25} {result['terms']:>5} {result['rmse']:>10.1f} "
+                     f"{result['mae']:>10.1f} {result['single_row_us']:>9.2f} {result['batch_row_us']:>12.3f} "
+                     f"{result['artifact_bytes'] / 1000:>11.1f}")
+    budget = report["error_budget"]
+    if report["selected"] is None:
+        lines.append(f"No candidate meets the error budget (RMSE <= {budget}).")
+    elif budget is None:
+        lines.append(f"Selected {report['selected']}: the lowest cross-validated RMSE.")
+    else:
+        lines.append(f"Selected {report['selected']}: the fastest with a cross-validated RMSE <= {budget}.")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark candidate polynomial pipelines and select one.")
+    parser.add_argument('data_path', type=str, help="Path to the CSV data file.")
+    parser.add_argument('--degrees', type=int, nargs='+', default=list(DEGREES),
+                        help="Polynomial degrees to try. Default: 1 2 3 4.")
+    parser.add_argument('--estimators', type=str, nargs='+', choices=ESTIMATORS, default=list(ESTIMATORS),
+                        help="Estimators to try. Default: linear ridge lasso.")
+    parser.add_argument('--alpha', type=float, default=1.0,
+                        help="Regularization strength of ridge and lasso, on standardized terms. Default is 1.0.")
+    parser.add_argument('--folds', type=int, default=5, help="Number of cross-validation folds. Default is 5.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes. Default: CPU count.")
+    parser.add_argument('--error_budget', type=float, default=None,
+                        help="Largest acceptable cross-validated RMSE; the fastest candidate within it is selected. "
+                             "Default: select the most accurate.")
+    parser.add_argument('--inference_mode', type=str, choices=("sklearn", "compiled", "lookup"), default="compiled",
+                        help="How the service computes predictions, for the latency measurements. Default is compiled.")
+    parser.add_argument('--report', type=str, default=None, help="Path to save the report as JSON.")
+    parser.add_argument('--output_dir', type=str, default=None,
+                        help="Directory to save the selected model to, as a model registry version directory.")
+
+    args = parser.parse_args()
+
+    # Ensure data path exists
+    if not os.path.exists(args.data_path):
+        raise FileNotFoundError(f"The specified data file does not exist: {args.data_path}")
+
+    report = select_model(
+        data_path=args.data_path,
+        degrees=args.degrees,
+        estimators=args.estimators,
+        alpha=args.alpha,
+        folds=args.folds,
+        workers=args.workers,
+        error_budget=args.error_budget,
+        inference_mode=args.inference_mode,
+        output_dir=args.output_dir
+    )
+    print(format_report(report))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
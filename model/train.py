@@ -4,13 +4,47 @@ from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import PolynomialFeatures, LabelEncoder
 from sklearn.metrics import mean_absolute_error, mean_squared_error
+from threadpoolctl import threadpool_limits
 import joblib
 import argparse
+import multiprocessing
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from app.models.model_loader import ARTIFACT_FORMAT_VERSION
+
+# Version of the training state layout written by train_incremental.
+STATE_FORMAT_VERSION = 1
+
+# Feature columns of the training data, in the order the polynomial transformer is fitted with, and the target.
+FEATURE_COLUMNS = ["age", "bmi", "children", "smoker"]
+TARGET_COLUMN = "charges"
+
+# Codes of the smoker column, as LabelEncoder assigns them in train_model.
+SMOKER_CODES = {"no": 0.0, "yes": 1.0}
+
+
+def export_model_artifact(model, poly, artifact_output_path):
+    """
+    Writes the fitted polynomial as a pickle-free NumPy .npz artifact.
+
+    The archive is stored uncompressed so the serving side can memory-map each array in place. It holds:
+    format_version (int64[1]), feature_names (unicode[n_features]), powers (int64[n_terms, n_features], as
+    PolynomialFeatures.powers_), coef (float64[n_terms]) and intercept (float64[1]).
+    """
+    np.savez(
+        artifact_output_path,
+        format_version=np.array([ARTIFACT_FORMAT_VERSION], dtype=np.int64),
+        feature_names=np.array(poly.feature_names_in_, dtype=str),
+        powers=np.ascontiguousarray(poly.powers_, dtype=np.int64),
+        coef=np.ascontiguousarray(np.ravel(model.coef_), dtype=np.float64),
+        intercept=np.array([model.intercept_], dtype=np.float64),
+    )
 
 
 def train_model(data_path, model_path=None, degree=2, model_output_path='polynomial_regression_model.pkl',
-                transformer_output_path='polynomial_features.pkl'):
+                transformer_output_path='polynomial_features.pkl', artifact_output_path=None):
     # Load dataset
     df = pd.read_csv(data_path)
 
@@ -63,6 +97,193 @@ def train_model(data_path, model_path=None, degree=2, model_output_path='polynom
     joblib.dump(poly, transformer_output_path)
     print("Model and transformer saved successfully.")
 
+    if artifact_output_path:
+        export_model_artifact(model, poly, artifact_output_path)
+        print(f"Pickle-free model artifact saved to {artifact_output_path}.")
+
+
+def _init_worker():
+    # One BLAS thread per worker: the pool already uses every core.
+    threadpool_limits(limits=1, user_api="blas")
+
+
+def _fit_transformer(degree):
+    """Returns a PolynomialFeatures of the given degree fitted on the feature columns (it only reads their names)."""
+    return PolynomialFeatures(degree=degree).fit(pd.DataFrame([[0.0] * len(FEATURE_COLUMNS)], columns=FEATURE_COLUMNS))
+
+
+def _chunk_matrix(df, poly):
+    """Expands a chunk of the training data to [polynomial terms | charges], dropping rows with missing values."""
+    data = df[FEATURE_COLUMNS + [TARGET_COLUMN]].copy()
+    if data["smoker"].dtype == object:
+        data["smoker"] = data["smoker"].str.strip().str.lower().map(SMOKER_CODES)
+    data = data.apply(pd.to_numeric, errors="coerce").dropna()
+    return np.column_stack([poly.transform(data[FEATURE_COLUMNS]), data[TARGET_COLUMN].to_numpy(dtype=np.float64)])
+
+
+def _qr_factor(matrix):
+    """
+    Returns the square R factor of the QR decomposition of `matrix`.
+
+    R.T @ R equals matrix.T @ matrix, so R summarizes any number of rows for least squares in n_columns^2 numbers,
+    without squaring the condition number like accumulating the normal equations would. The factor of stacked
+    factors is the factor of the stacked rows, so chunks can be summarized apart and merged in any order.
+    """
+    n_columns = matrix.shape[1]
+    if len(matrix) == 0:
+        return np.zeros((n_columns, n_columns))
+    factor = np.linalg.qr(matrix, mode="r")
+    if len(factor) < n_columns:
+        factor = np.vstack([factor, np.zeros((n_columns - len(factor), n_columns))])
+    return factor
+
+
+def _chunk_factors(df, degree, folds, seed, offset):
+    """
+    Pool task: returns the R factor of the rows of each cross-validation fold in a chunk, and its number of rows.
+
+    Rows are assigned to folds at random, seeded by the chunk's offset in the data so that runs are repeatable.
+    """
+    matrix = _chunk_matrix(df, _fit_transformer(degree))
+    fold_of_row = np.random.default_rng([seed, offset]).integers(0, folds, len(matrix))
+    return np.stack([_qr_factor(matrix[fold_of_row == fold]) for fold in range(folds)]), len(matrix)
+
+
+def _solve(factor, n_terms):
+    """Least-squares coefficients of the first n_terms polynomial terms, from the R factor of [terms | target]."""
+    coef, *_ = np.linalg.lstsq(factor[:n_terms, :n_terms], factor[:n_terms, -1], rcond=None)
+    return coef
+
+
+def _errors(factor, coef):
+    """
+    Returns the squared error sum and the total sum of squares of the target, over the rows summarized by `factor`,
+    of the predictions of `coef` (for the leading polynomial terms).
+    """
+    weights = np.zeros(len(factor))
+    weights[:len(coef)], weights[-1] = coef, -1.0
+    gram = factor.T @ factor
+    # The first term is the bias: its column of ones gives the row count and the target sum.
+    rows, target_sum, target_square_sum = gram[0, 0], gram[0, -1], gram[-1, -1]
+    return float(np.sum((factor @ weights) ** 2)), float(target_square_sum - target_sum ** 2 / max(rows, 1.0))
+
+
+def _linear_model(coef):
+    """Builds the LinearRegression fitted to `coef`, whose first entry multiplies the transformer's bias term."""
+    model = LinearRegression()
+    model.coef_ = np.concatenate([[0.0], coef[1:]])
+    model.intercept_ = float(coef[0])
+    model.n_features_in_ = len(coef)
+    return model
+
+
+def _load_state(state_path, degree, folds):
+    """Returns the fold factors and row count of a saved training state, or empty ones if there is none."""
+    n_columns = len(_fit_transformer(degree).powers_) + 1
+    if state_path is None or not os.path.exists(state_path):
+        return np.zeros((folds, n_columns, n_columns)), 0
+    with np.load(state_path) as state:
+        if int(state["format_version"][0]) != STATE_FORMAT_VERSION:
+            raise ValueError(f"{state_path}: unsupported training state format {int(state['format_version'][0])}")
+        if (int(state["degree"][0]), int(state["folds"][0])) != (degree, folds):
+            raise ValueError(f"{state_path} was trained with degree {int(state['degree'][0])} and "
+                             f"{int(state['folds'][0])} folds, not degree {degree} and {folds} folds")
+        return state["factors"], int(state["rows"][0])
+
+
+def _save_state(state_path, degree, folds, factors, rows):
+    """
+    Saves the fold factors and row count to exactly `state_path`, through a file handle, as np.savez would add .npz
+    to a path without it. The state is written to a temporary file first, so an interrupted save keeps the previous.
+    """
+    temporary_path = f"{state_path}.tmp"
+    with open(temporary_path, "wb") as f:
+        np.savez(f, format_version=np.array([STATE_FORMAT_VERSION], dtype=np.int64),
+                 degree=np.array([degree], dtype=np.int64), folds=np.array([folds], dtype=np.int64),
+                 rows=np.array([rows], dtype=np.int64), factors=factors)
+    os.replace(temporary_path, state_path)
+
+
+def train_incremental(data_path, degrees=(2,), folds=5, chunk_size=100000, workers=None, seed=0, state_path=None,
+                      model_output_path='polynomial_regression_model.pkl',
+                      transformer_output_path='polynomial_features.pkl', artifact_output_path=None):
+    """
+    Trains the polynomial regression on a CSV of any size, streamed in chunks summarized on a process pool.
+
+    Each chunk is reduced to the R factor of the QR decomposition of its [polynomial terms | charges] rows, per
+    cross-validation fold, and the factors are merged as they come: memory use depends on the number of terms and
+    workers, not on the data size, and the resulting fit is the exact least-squares solution over all rows. As the
+    terms of a lower degree lead those of a higher one, a single pass at the largest degree evaluates every degree
+    in `degrees` with k-fold cross-validation; the one with the lowest cross-validated RMSE is fitted on all rows
+    and saved like train_model does.
+
+    With `state_path`, the merged factors are saved there, and a later run on new data continues from them: the
+    model is then fitted on the rows of every run, which makes it an actual fine-tuning.
+
+    Returns a dict with the selected degree, the rows used (over all runs), the cross-validated RMSE and R^2 of
+    each degree, and the seconds and rows/sec of this run.
+    """
+    degrees = sorted(set(degrees))
+    if degrees[0] < 1 or folds < 2:
+        raise ValueError("Degrees must be at least 1 and folds at least 2")
+    degree = degrees[-1]
+    workers = workers or os.cpu_count() or 1
+    factors, rows = _load_state(state_path, degree, folds)
+    previous_rows = rows
+
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker)
+
+    def merge(future):
+        nonlocal factors, rows
+        chunk_factors, chunk_rows = future.result()
+        factors = np.stack([_qr_factor(np.vstack([total, chunk])) for total, chunk in zip(factors, chunk_factors)])
+        rows += chunk_rows
+
+    with pool:
+        pending = set()
+        for index, df in enumerate(pd.read_csv(data_path, chunksize=chunk_size)):
+            # Bound the chunks held in memory to two per worker.
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge(future)
+            pending.add(pool.submit(_chunk_factors, df, degree, folds, seed, previous_rows + index * chunk_size))
+        for future in pending:
+            merge(future)
+    seconds = time.perf_counter() - start
+
+    cv = {}
+    for candidate in degrees:
+        n_terms = len(_fit_transformer(candidate).powers_)
+        squared_error = total_squares = 0.0
+        for fold in range(folds):
+            training = _qr_factor(np.vstack([factors[other] for other in range(folds) if other != fold]))
+            fold_error, fold_squares = _errors(factors[fold], _solve(training, n_terms))
+            squared_error, total_squares = squared_error + fold_error, total_squares + fold_squares
+        cv[candidate] = {"rmse": float(np.sqrt(squared_error / max(rows, 1))),
+                         "r2": 1.0 - squared_error / total_squares if total_squares > 0 else 0.0}
+    best = min(degrees, key=lambda candidate: cv[candidate]["rmse"])
+
+    poly = _fit_transformer(best)
+    model = _linear_model(_solve(_qr_factor(np.vstack(factors)), len(poly.powers_)))
+    joblib.dump(model, model_output_path)
+    joblib.dump(poly, transformer_output_path)
+    if artifact_output_path:
+        export_model_artifact(model, poly, artifact_output_path)
+    if state_path:
+        _save_state(state_path, degree, folds, factors, rows)
+
+    new_rows = rows - previous_rows
+    return {
+        "degree": best,
+        "rows": rows,
+        "cv": cv,
+        "seconds": seconds,
+        "rows_per_second": new_rows / seconds if seconds > 0 else 0.0,
+    }
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Train or fine-tune a polynomial regression model.")
@@ -74,6 +295,20 @@ if __name__ == "__main__":
                         help="Path to save the trained or fine-tuned model.")
     parser.add_argument('--transformer_output_path', type=str, default='polynomial_features.pkl',
                         help="Path to save the polynomial transformer.")
+    parser.add_argument('--artifact_output_path', type=str, default=None,
+                        help="Path to also save the model as a pickle-free, memory-mappable .npz artifact.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Stream the CSV in chunks on a process pool instead of loading it whole, and select the "
+                             "degree by k-fold cross-validation.")
+    parser.add_argument('--degrees', type=int, nargs='+', default=None,
+                        help="Incremental mode: candidate degrees to cross-validate. Default: --degree.")
+    parser.add_argument('--folds', type=int, default=5, help="Incremental mode: number of folds. Default is 5.")
+    parser.add_argument('--chunk_size', type=int, default=100000,
+                        help="Incremental mode: number of rows per chunk. Default is 100000.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Incremental mode: number of worker processes. Default: CPU count.")
+    parser.add_argument('--state_path', type=str, default=None,
+                        help="Incremental mode: training state to continue from, if it exists, and to save to.")
 
     args = parser.parse_args()
 
@@ -81,11 +316,29 @@ if __name__ == "__main__":
     if not os.path.exists(args.data_path):
         raise FileNotFoundError(f"The specified data file does not exist: {args.data_path}")
 
-    # Train the model (or fine-tune if a model path is provided)
-    train_model(
-        data_path=args.data_path,
-        model_path=args.model_path,
-        degree=args.degree,
-        model_output_path=args.model_output_path,
-        transformer_output_path=args.transformer_output_path
-    )
+    if args.incremental:
+        stats = train_incremental(
+            data_path=args.data_path,
+            degrees=args.degrees or [args.degree],
+            folds=args.folds,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            state_path=args.state_path,
+            model_output_path=args.model_output_path,
+            transformer_output_path=args.transformer_output_path,
+            artifact_output_path=args.artifact_output_path
+        )
+        for degree, scores in stats["cv"].items():
+            print(f"Degree {degree}: cross-validated RMSE {scores['rmse']:.2f}, R^2 {scores['r2']:.4f}")
+        print(f"Trained degree {stats['degree']} on {stats['rows']} rows in {stats['seconds']:.2f} s "
+              f"({stats['rows_per_second']:.0f} rows/sec). Model and transformer saved successfully.")
+    else:
+        # Train the model (or fine-tune if a model path is provided)
+        train_model(
+            data_path=args.data_path,
+            model_path=args.model_path,
+            degree=args.degree,
+            model_output_path=args.model_output_path,
+            transformer_output_path=args.transformer_output_path,
+            artifact_output_path=args.artifact_output_path
+        )
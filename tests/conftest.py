@@ -1,23 +1,61 @@
+import asyncio
 import os
+import time
 from typing import Generator
 from unittest.mock import patch
 
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session, Session
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from starlette.testclient import TestClient
 
+from app import startup
+from app.api import dependencies
+from app.db_control import crud_user
 from app.db_control.session import Base
 from app.main import app
 
 # SQLite database URL for testing
 TEST_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../test.db")
-TEST_SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
+TEST_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{TEST_DB_PATH}"
 
-# Create an engine and sessionmaker bound to the test database
-engine = create_engine(TEST_SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
-TestingScopedSession = scoped_session(TestingSessionLocal)
+# Admin token configured by the admin_client fixture.
+ADMIN_TOKEN = "test-admin-token"
+
+# Create an engine and sessionmaker bound to the test database. Tests drive coroutines from several
+# event loops (asyncio.run and the TestClient's loop), so connections are not pooled across them.
+engine = create_async_engine(TEST_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+TestingSessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmark", action="store_true", help="Also run the tests marked as benchmarks.")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: slow performance benchmark, only run with --benchmark")
+
+
+def pytest_collection_modifyitems(config, items):
+    # Benchmarks take long and report timings rather than check behavior: skip them unless asked for.
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmark, run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+async def _create_tables():
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+
+async def _drop_tables():
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -26,9 +64,9 @@ def setup_test_database():
     This fixture creates the database with a “Session” scope. It sets up the tables before all tests
     and removes them after all tests are completed.
     """
-    Base.metadata.create_all(bind=engine)  # Create tables
+    asyncio.run(_create_tables())  # Create tables
     yield
-    Base.metadata.drop_all(bind=engine)  # Drop tables after tests
+    asyncio.run(_drop_tables())  # Drop tables after tests
 
     # Remove the test database file after the test session
     if os.path.exists(TEST_DB_PATH):
@@ -36,23 +74,67 @@ def setup_test_database():
 
 
 @pytest.fixture(scope="function")
-def db() -> Generator:
+def db() -> Generator[async_sessionmaker[AsyncSession], None, None]:
     """
-    Create a new database session for each test and roll it back after the test.
+    Point the application at the test database for the duration of a test and provide its session factory.
     """
-    # Patch `Session` to use `TestingSessionLocal` instead of the original `Session`
-    with patch("app.db_control.session.Session", new=TestingScopedSession):
-        yield TestingScopedSession()
-
-        # Rollback transaction
-        TestingScopedSession.rollback()
-        TestingScopedSession.remove()
+    # Patch the application's engine and session factory to use the test database
+    with patch("app.db_control.session.engine", new=engine), \
+            patch("app.db_control.session.AsyncSessionLocal", new=TestingSessionLocal):
+        # Start every test with an empty user cache
+        if crud_user.user_cache is not None:
+            crud_user.user_cache.clear()
+        yield TestingSessionLocal
 
 
 @pytest.fixture(scope="function")
-def client(db: Session) -> Generator[TestClient, None, None]:
+def client(db: async_sessionmaker[AsyncSession]) -> Generator[TestClient, None, None]:
     """
     Provide a TestClient that uses the test database session.
     """
     with TestClient(app) as c:
+        # The application starts in the background; wait until it is ready, as a load balancer would.
+        while not startup.state.ready:
+            assert startup.state.status == startup.STARTING, startup.state.error
+            time.sleep(0.01)
         yield c
+
+
+@pytest.fixture(scope="function")
+def admin_client(client: TestClient) -> Generator[TestClient, None, None]:
+    """
+    Provide the TestClient with an admin token configured, sending it with every request.
+    """
+    with patch.object(dependencies, "settings", dependencies.settings.model_copy(update={"admin_token": ADMIN_TOKEN})):
+        client.headers["X-Admin-Token"] = ADMIN_TOKEN
+        yield client
+
+
+class QueryCounter:
+    """Records the SQL statements sent to the test database."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        """Number of data statements, ignoring transaction and savepoint control."""
+        control = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+        return sum(1 for statement in self.statements if not statement.lstrip().upper().startswith(control))
+
+    def reset(self):
+        self.statements.clear()
+
+
+@pytest.fixture(scope="function")
+def query_counter(db: async_sessionmaker[AsyncSession]) -> Generator[QueryCounter, None, None]:
+    """
+    Count the statements executed against the test database during a test.
+    """
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(engine.sync_engine, "before_cursor_execute", counter)
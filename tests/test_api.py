@@ -1,9 +1,10 @@
+import pytest
 from starlette.testclient import TestClient
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 
-def test_health_check(db: Session, client: TestClient):
+def test_health_check(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that the health check endpoint returns a 200 status code and expected JSON response.
     """
@@ -17,7 +18,7 @@ def test_health_check(db: Session, client: TestClient):
     assert response.json() == {"status": "API is running"}
 
 
-def test_create_user_success(db: Session, client: TestClient):
+def test_create_user_success(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that a new user is created successfully when valid data is provided.
     """
@@ -40,7 +41,7 @@ def test_create_user_success(db: Session, client: TestClient):
     assert response_data["age"] == 28
 
 
-def test_create_user_email_not_valid(db: Session, client: TestClient):
+def test_create_user_email_not_valid(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that an invalid email address is rejected when creating a new user.
     """
@@ -57,7 +58,7 @@ def test_create_user_email_not_valid(db: Session, client: TestClient):
     assert response.status_code == 422
 
 
-def test_get_user_by_id_success(db: Session, client: TestClient):
+def test_get_user_by_id_success(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that a user can be retrieved by ID.
     """
@@ -78,7 +79,7 @@ def test_get_user_by_id_success(db: Session, client: TestClient):
     assert response_data["age"] == 30
 
 
-def test_get_user_by_id_not_found(db: Session, client: TestClient):
+def test_get_user_by_id_not_found(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that retrieving a user that does not exist returns a 404 status code.
     """
@@ -87,7 +88,7 @@ def test_get_user_by_id_not_found(db: Session, client: TestClient):
     assert response.json() == {"detail": "User not found"}
 
 
-def test_update_user_success(db: Session, client: TestClient):
+def test_update_user_success(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that an existing user's details can be updated successfully.
     """
@@ -111,7 +112,7 @@ def test_update_user_success(db: Session, client: TestClient):
     assert response_data["age"] == 26
 
 
-def test_update_user_not_found(db: Session, client: TestClient):
+def test_update_user_not_found(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that updating a user that does not exist returns a 404 status code.
     """
@@ -123,7 +124,7 @@ def test_update_user_not_found(db: Session, client: TestClient):
     assert response.json() == {"detail": "User not found"}
 
 
-def test_delete_user_success(db: Session, client: TestClient):
+def test_delete_user_success(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that a user can be deleted successfully.
     """
@@ -143,7 +144,7 @@ def test_delete_user_success(db: Session, client: TestClient):
     assert get_response.status_code == 404
 
 
-def test_delete_user_not_found(db: Session, client: TestClient):
+def test_delete_user_not_found(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that deleting a user that does not exist returns a 404 status code.
     """
@@ -152,7 +153,7 @@ def test_delete_user_not_found(db: Session, client: TestClient):
     assert response.json() == {"detail": "User not found"}
 
 
-def test_predict_success_smoker(db: Session, client: TestClient):
+def test_predict_success_smoker(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that a cost prediction is successfully returned when valid data is provided for a smoker.
     """
@@ -175,7 +176,7 @@ def test_predict_success_smoker(db: Session, client: TestClient):
     assert isinstance(response_data["cost_prediction"], float)
 
 
-def test_predict_success_non_smoker(db: Session, client: TestClient):
+def test_predict_success_non_smoker(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that a cost prediction is successfully returned when valid data is provided for a non-smoker.
     """
@@ -198,7 +199,7 @@ def test_predict_success_non_smoker(db: Session, client: TestClient):
     assert isinstance(response_data["cost_prediction"], float)
 
 
-def test_predict_invalid_age(db: Session, client: TestClient):
+def test_predict_invalid_age(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that the API returns a 422 error when an invalid age is provided.
     """
@@ -216,7 +217,7 @@ def test_predict_invalid_age(db: Session, client: TestClient):
     assert response.status_code == 422
 
 
-def test_predict_invalid_bmi(db: Session, client: TestClient):
+def test_predict_invalid_bmi(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that the API returns a 422 error when an invalid BMI is provided.
     """
@@ -234,7 +235,7 @@ def test_predict_invalid_bmi(db: Session, client: TestClient):
     assert response.status_code == 422
 
 
-def test_predict_invalid_children(db: Session, client: TestClient):
+def test_predict_invalid_children(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that the API returns a 422 error when an invalid number of children is provided.
     """
@@ -252,7 +253,7 @@ def test_predict_invalid_children(db: Session, client: TestClient):
     assert response.status_code == 422
 
 
-def test_predict_missing_fields(db: Session, client: TestClient):
+def test_predict_missing_fields(db: async_sessionmaker[AsyncSession], client: TestClient):
     """
     Test that the API returns a 422 error when required fields are missing.
     """
@@ -266,3 +267,228 @@ def test_predict_missing_fields(db: Session, client: TestClient):
     # Check that the response status is 422 Unprocessable Entity
     assert response.status_code == 422
 
+
+def test_predict_batch_items(db: async_sessionmaker[AsyncSession], client: TestClient):
+    """
+    Test that batch predictions are returned in input order and match the single-input endpoint.
+    """
+    items = [
+        {"smoker": True, "bmi": 28.5, "age": 40, "children": 2},
+        {"smoker": False, "bmi": 22.0, "age": 25, "children": 1},
+    ]
+    response = client.post("/predict/batch", json={"items": items})
+
+    assert response.status_code == 200
+    response_data = response.json()
+    assert response_data["errors"] == []
+    assert len(response_data["cost_predictions"]) == 2
+
+    for item, prediction in zip(items, response_data["cost_predictions"]):
+        single = client.post("/predict", json=item).json()["cost_prediction"]
+        assert prediction == pytest.approx(single)
+
+
+def test_predict_batch_columns(db: async_sessionmaker[AsyncSession], client: TestClient):
+    """
+    Test that the columnar batch form gives the same predictions as the row-wise form.
+    """
+    columns = {
+        "smoker": [True, False],
+        "bmi": [28.5, 22.0],
+        "age": [40, 25],
+        "children": [2, 1],
+    }
+    items = [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    columnar = client.post("/predict/batch", json={"columns": columns})
+    row_wise = client.post("/predict/batch", json={"items": items})
+
+    assert columnar.status_code == 200
+    assert columnar.json() == row_wise.json()
+
+
+def test_predict_batch_per_item_errors(db: async_sessionmaker[AsyncSession], client: TestClient):
+    """
+    Test that invalid inputs are reported per item without failing the rest of the batch.
+    """
+    items = [
+        {"smoker": True, "bmi": 28.5, "age": 40, "children": 2},
+        {"smoker": True, "bmi": 28.5, "age": -5, "children": 2},  # Invalid age
+        {"bmi": 24.5},  # Missing fields
+        {"smoker": False, "bmi": 22.0, "age": 25, "children": 1},
+    ]
+    response = client.post("/predict/batch", json={"items": items})
+
+    assert response.status_code == 200
+    response_data = response.json()
+    predictions = response_data["cost_predictions"]
+    assert isinstance(predictions[0], float)
+    assert predictions[1] is None
+    assert predictions[2] is None
+    assert isinstance(predictions[3], float)
+    assert [error["index"] for error in response_data["errors"]] == [1, 2]
+    assert response_data["errors"][0]["errors"][0]["loc"] == ["age"]
+
+
+def test_predict_batch_invalid_body(db: async_sessionmaker[AsyncSession], client: TestClient):
+    """
+    Test that the API returns a 422 error when the batch body itself is malformed.
+    """
+    # Both forms given at once
+    response = client.post("/predict/batch", json={"items": [], "columns": {}})
+    assert response.status_code == 422
+
+    # Columns of different lengths
+    response = client.post("/predict/batch", json={"columns": {"age": [1, 2], "bmi": [20.0]}})
+    assert response.status_code == 422
+
+
+def test_bulk_create_users(db: async_sessionmaker[AsyncSession], client: TestClient):
+    """
+    Test that valid users are created in request order and invalid ones are reported by index.
+    """
+    response = client.post(
+        "/api/users/bulk/create",
+        json={"users": [
+            {"name": "Bulk One", "email": "bulkone@example.com", "age": 31},
+            {"name": "Bulk Bad", "email": "not-an-email", "age": 32},
+            {"name": "Bulk Two", "email": "bulktwo@example.com", "age": None},
+        ]}
+    )
+
+    assert response.status_code == 201
+    response_data = response.json()
+    assert [user["name"] for user in response_data["users"]] == ["Bulk One", "Bulk Two"]
+    assert [error["index"] for error in response_data["errors"]] == [1]
+
+    # The created users can be read back
+    for user in response_data["users"]:
+        assert client.get(f"/api/users/{user['id']}").json() == user
+
+
+def test_bulk_update_users(db: async_sessionmaker[AsyncSession], client: TestClient):
+    """
+    Test that existing users are updated and unknown ids are reported.
+    """
+    users = client.post(
+        "/api/users/bulk/create",
+        json={"users": [{"name": f"Update {i}", "email": f"bulkupdate{i}@example.com", "age": 20} for i in range(2)]}
+    ).json()["users"]
+
+    response = client.put(
+        "/api/users/bulk/update",
+        json={"users": [
+            {"id": users[0]["id"], "age": 21},
+            {"id": 99999, "name": "Missing"},
+            {"id": users[1]["id"], "name": "Renamed", "email": "renamed@example.com"},
+        ]}
+    )
+
+    assert response.status_code == 200
+    response_data = response.json()
+    assert sorted(response_data["updated_ids"]) == sorted(user["id"] for user in users)
+    assert response_data["errors"] == [{"index": 1, "errors": [{"msg": "User not found"}]}]
+
+    assert client.get(f"/api/users/{users[0]['id']}").json()["age"] == 21
+    renamed = client.get(f"/api/users/{users[1]['id']}").json()
+    assert renamed["name"] == "Renamed"
+    assert renamed["email"] == "renamed@example.com"
+    assert renamed["age"] == 20
+
+
+def test_bulk_delete_users(db: async_sessionmaker[AsyncSession], client: TestClient):
+    """
+    Test that existing users are deleted and unknown ids are reported.
+    """
+    users = client.post(
+        "/api/users/bulk/create",
+        json={"users": [{"name": f"Delete {i}", "email": f"bulkdelete{i}@example.com", "age": 40} for i in range(3)]}
+    ).json()["users"]
+    ids = [user["id"] for user in users]
+
+    response = client.post("/api/users/bulk/delete", json={"ids": ids + [99999]})
+
+    assert response.status_code == 200
+    assert sorted(response.json()["deleted_ids"]) == sorted(ids)
+    assert response.json()["not_found_ids"] == [99999]
+    for user_id in ids:
+        assert client.get(f"/api/users/{user_id}").status_code == 404
+
+
+def _list_all_pages(client: TestClient, **params):
+    """Follows next_cursor through every page of the user listing."""
+    pages = []
+    cursor = None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get("/api/users", params=query)
+        assert response.status_code == 200
+        page = response.json()
+        pages.append(page["users"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_list_users_keyset_pagination(db: async_sessionmaker[AsyncSession], client: TestClient):
+    """
+    Test that paging with the cursor returns every matching user exactly once, in order.
+    """
+    created = client.post(
+        "/api/users/bulk/create",
+        json={"users": [{"name": f"Pager {i}", "email": "pager@example.com", "age": 20 + i} for i in range(5)]}
+    ).json()["users"]
+
+    for params in ({"name_prefix": "Pager"}, {"email": "pager@example.com", "order_by": "id"},
+                   {"email": "pager@example.com", "order_by": "created_at"}):
+        pages = _list_all_pages(client, limit=2, **params)
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert [user for page in pages for user in page] == created
+
+
+def test_list_users_unsupported_order(db: async_sessionmaker[AsyncSession], client: TestClient):
+    """
+    Test that an order the filters' index does not keep is rejected with 400 rather than sorted.
+    """
+    for params in ({"name_prefix": "Pager", "order_by": "id"}, {"min_age": 20, "order_by": "created_at"},
+                   {"email": "pager@example.com", "order_by": "name"}, {"order_by": "age"}):
+        response = client.get("/api/users", params=params)
+        assert response.status_code == 400
+        assert "not supported" in response.json()["detail"]
+
+
+def test_list_users_filters(db: async_sessionmaker[AsyncSession], client: TestClient):
+    """
+    Test the email, name prefix and age range filters of the user listing.
+    """
+    client.post(
+        "/api/users/bulk/create",
+        json={"users": [
+            {"name": "Filter Young", "email": "filteryoung@example.com", "age": 18},
+            {"name": "Filter Middle", "email": "filtermiddle@example.com", "age": 40},
+            {"name": "Filter Old", "email": "filterold@example.com", "age": 80},
+            {"name": "Filtes Other", "email": "filtesother@example.com", "age": 40},
+        ]}
+    )
+
+    by_age = client.get("/api/users", params={"name_prefix": "Filter", "min_age": 30, "max_age": 90}).json()
+    assert [user["name"] for user in by_age["users"]] == ["Filter Middle", "Filter Old"]
+    assert by_age["next_cursor"] is None
+
+    by_email = client.get("/api/users", params={"email": "filterold@example.com"}).json()
+    assert [user["name"] for user in by_email["users"]] == ["Filter Old"]
+
+
+def test_list_users_invalid_cursor(db: async_sessionmaker[AsyncSession], client: TestClient):
+    """
+    Test that malformed cursors, or cursors issued for another order, are rejected with 400.
+    """
+    client.post("/api/users/bulk/create", json={"users": [
+        {"name": f"Cursor {i}", "email": f"cursor{i}@example.com", "age": 1} for i in range(2)
+    ]})
+    cursor = client.get("/api/users", params={"name_prefix": "Cursor", "limit": 1}).json()["next_cursor"]
+    assert cursor is not None
+
+    assert client.get("/api/users", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/api/users", params={"cursor": cursor, "order_by": "created_at"}).status_code == 400
@@ -0,0 +1,127 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.model_loader import DEFAULT_MODEL_PATH, load_model_and_transformer, predict_insurance_charges_batch
+from model.score import MANIFEST_FILE_NAME, SUCCESS_FILE_NAME, score_file
+
+ROWS = 2000
+
+
+@pytest.fixture
+def dataset(tmp_path) -> str:
+    """A CSV in the training data layout, with a few invalid rows."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "age": rng.integers(18, 65, ROWS),
+        "sex": rng.choice(["male", "female"], ROWS),
+        "bmi": rng.uniform(15, 45, ROWS).round(1),
+        "children": rng.integers(0, 6, ROWS),
+        "smoker": rng.choice(["yes", "no"], ROWS),
+        "region": "southeast",
+    })
+    df.loc[7, "age"] = 200
+    df.loc[8, "smoker"] = "sometimes"
+    path = tmp_path / "insurance.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def read_parts(output_dir: str) -> pd.DataFrame:
+    parts = sorted(name for name in os.listdir(output_dir) if name.startswith("part-"))
+    return pd.concat([pd.read_csv(os.path.join(output_dir, name)) for name in parts], ignore_index=True)
+
+
+def test_score_file(dataset, tmp_path):
+    """Test that every row is scored in input order like the model, with invalid rows left empty."""
+    output_dir = str(tmp_path / "scored")
+    stats = score_file(dataset, output_dir, chunk_size=300, workers=2)
+
+    assert stats["chunks"] == 7
+    assert (stats["rows"], stats["invalid_rows"], stats["skipped_chunks"]) == (ROWS, 2, 0)
+    assert os.path.exists(os.path.join(output_dir, SUCCESS_FILE_NAME))
+
+    scored = read_parts(output_dir)
+    source = pd.read_csv(dataset)
+    pd.testing.assert_frame_equal(scored.drop(columns="cost_prediction"), source)
+    assert scored["cost_prediction"][[7, 8]].isna().all()
+
+    model, poly = load_model_and_transformer(inference_mode="compiled")
+    valid = scored["cost_prediction"].notna()
+    features = np.column_stack([source["age"], source["bmi"], source["children"], source["smoker"] == "yes"])
+    expected = predict_insurance_charges_batch(model, poly, features[valid.to_numpy()].astype(np.float64))
+    np.testing.assert_allclose(scored["cost_prediction"][valid], expected, rtol=1e-7)
+
+
+def test_resume_scores_only_missing_chunks(dataset, tmp_path):
+    """Test that re-running into the same directory only scores the chunks not written yet."""
+    output_dir = str(tmp_path / "scored")
+    score_file(dataset, output_dir, chunk_size=500, workers=1)
+    first = read_parts(output_dir)
+
+    os.remove(os.path.join(output_dir, "part-00002.csv"))
+    os.remove(os.path.join(output_dir, SUCCESS_FILE_NAME))
+    stats = score_file(dataset, output_dir, chunk_size=500, workers=1)
+
+    assert (stats["chunks"], stats["skipped_chunks"], stats["rows"]) == (4, 3, 500)
+    pd.testing.assert_frame_equal(read_parts(output_dir), first)
+
+    with pytest.raises(ValueError):
+        score_file(dataset, output_dir, chunk_size=100, workers=1)
+    assert os.path.exists(os.path.join(output_dir, MANIFEST_FILE_NAME))
+
+
+def test_resume_refuses_another_model(dataset, tmp_path):
+    """Test that a run is not resumed with another inference mode or a retrained model."""
+    model_path = shutil.copy(DEFAULT_MODEL_PATH, tmp_path)
+    output_dir = str(tmp_path / "scored")
+    score_file(dataset, output_dir, chunk_size=500, workers=1, model_path=model_path)
+
+    with pytest.raises(ValueError):
+        score_file(dataset, output_dir, chunk_size=500, workers=1, model_path=model_path, inference_mode="sklearn")
+
+    with open(model_path, "ab") as f:
+        f.write(b"\0")
+    with pytest.raises(ValueError):
+        score_file(dataset, output_dir, chunk_size=500, workers=1, model_path=model_path)
+
+
+def test_unsupported_format(tmp_path):
+    """Test that inputs other than CSV and Parquet are rejected."""
+    with pytest.raises(ValueError):
+        score_file(str(tmp_path / "insurance.json"), str(tmp_path / "scored"))
+
+
+def test_score_parquet(dataset, tmp_path):
+    """Test that Parquet input is scored into Parquet parts."""
+    pytest.importorskip("pyarrow")
+    parquet_path = str(tmp_path / "insurance.parquet")
+    pd.read_csv(dataset).to_parquet(parquet_path, index=False)
+
+    output_dir = str(tmp_path / "scored")
+    stats = score_file(parquet_path, output_dir, chunk_size=1000, workers=1)
+
+    assert stats["rows"] == ROWS
+    assert len(pd.read_parquet(os.path.join(output_dir, "part-00000.parquet"))) == 1000
+
+
+@pytest.mark.benchmark
+def test_scaling_benchmark(dataset, tmp_path):
+    """
+    Benchmark scoring throughput with one worker against one worker per core.
+    """
+    source = pd.read_csv(dataset)
+    large = str(tmp_path / "large.csv")
+    pd.concat([source] * 50, ignore_index=True).to_csv(large, index=False)
+
+    results = {}
+    for workers in sorted({1, os.cpu_count() or 1}):
+        stats = score_file(large, str(tmp_path / f"scored-{workers}"), chunk_size=10000, workers=workers)
+        results[workers] = stats["rows_per_second"]
+        assert stats["rows"] == ROWS * 50
+
+    print("\nbatch scoring: " + ", ".join(f"{workers} worker(s) {rate:.0f} rows/sec"
+                                          for workers, rate in results.items()))
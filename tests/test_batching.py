@@ -0,0 +1,92 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from starlette.testclient import TestClient
+
+from app.api.endpoints import predict
+from app.models.batching import MicroBatcher
+
+
+def double_ages(rows):
+    """Toy batch predictor returning twice the age of every input."""
+    return [row["age"] * 2.0 for row in rows]
+
+
+def test_concurrent_submits_are_coalesced():
+    """Test that concurrent callers share one batch and each get their own result."""
+    calls = []
+
+    def predict_batch(rows):
+        calls.append(len(rows))
+        return double_ages(rows)
+
+    batcher = MicroBatcher(predict_batch, max_batch_size=100, max_wait_ms=5)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit({"age": age}) for age in range(10)))
+
+    results = asyncio.run(run())
+
+    assert results == [age * 2.0 for age in range(10)]
+    assert calls == [10]
+    assert batcher.batches_flushed == 1
+    assert batcher.items_flushed == 10
+    assert batcher.queue_depth == 0
+
+
+def test_full_batch_flushes_without_waiting():
+    """Test that reaching max_batch_size flushes immediately instead of waiting for the timer."""
+    calls = []
+
+    def predict_batch(rows):
+        calls.append(len(rows))
+        return double_ages(rows)
+
+    # A wait far longer than the test would take if the size trigger did not fire.
+    batcher = MicroBatcher(predict_batch, max_batch_size=4, max_wait_ms=60_000)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit({"age": age}) for age in range(8))), 5)
+
+    results = asyncio.run(run())
+
+    assert results == [age * 2.0 for age in range(8)]
+    assert calls == [4, 4]
+
+
+def test_batch_errors_propagate_to_every_caller():
+    """Test that a failing batch raises in every waiting caller."""
+    def predict_batch(rows):
+        raise RuntimeError("model failure")
+
+    batcher = MicroBatcher(predict_batch, max_batch_size=10, max_wait_ms=1)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit({"age": age}) for age in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_invalid_configuration():
+    """Test that nonsensical batch limits are rejected."""
+    with pytest.raises(ValueError):
+        MicroBatcher(double_ages, max_batch_size=0)
+    with pytest.raises(ValueError):
+        MicroBatcher(double_ages, max_wait_ms=-1)
+
+
+def test_predict_endpoint_with_batching(client: TestClient):
+    """Test that /predict gives the same result whether or not micro-batching is enabled."""
+    payload = {"smoker": True, "bmi": 28.5, "age": 40, "children": 2}
+    unbatched = client.post("/predict", json=payload).json()["cost_prediction"]
+
+    loaded = predict.registry.get()
+    batcher = MicroBatcher(loaded.predict_rows, max_batch_size=8, max_wait_ms=1)
+    with patch.object(loaded, "batcher", batcher), patch.object(loaded, "prediction_cache", None):
+        batched = client.post("/predict", json=payload).json()["cost_prediction"]
+
+    assert batched == pytest.approx(unbatched)
+    assert batcher.items_flushed == 1
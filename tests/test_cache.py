@@ -0,0 +1,117 @@
+import pytest
+from starlette.testclient import TestClient
+
+from app.api.endpoints import predict
+from app.cache import LRUCache
+from app.models.prediction_cache import PredictionCache
+
+
+class FakeTimer:
+    """Manually advanced clock for TTL tests."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that the least recently used entry is evicted once the cache is full."""
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" becomes the most recently used entry
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {
+        "size": 2,
+        "max_entries": 2,
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+        "hit_ratio": 0.75,
+    }
+
+
+def test_lru_cache_ttl_expiry():
+    """Test that entries are no longer returned once their TTL has passed."""
+    timer = FakeTimer()
+    cache = LRUCache(max_entries=10, ttl_seconds=5, timer=timer)
+    cache.set("a", 1)
+
+    timer.now = 4.9
+    assert cache.get("a") == 1
+    timer.now = 5.0
+    assert cache.get("a", "missing") == "missing"
+    assert cache.stats()["size"] == 0
+
+
+def test_lru_cache_delete_and_clear():
+    """Test explicit removal of entries."""
+    cache = LRUCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert cache.get("b") is None
+
+
+def test_prediction_cache_bmi_quantization():
+    """Test that BMIs in the same quantization step share an entry."""
+    model = object()
+    cache = PredictionCache(LRUCache(), bmi_quantum=0.1)
+    cache.set(model, {"age": 30, "bmi": 25.01, "children": 1, "smoker": False}, 100.0)
+
+    assert cache.get(model, {"age": 30, "bmi": 24.99, "children": 1, "smoker": False}) == 100.0
+    assert cache.get(model, {"age": 30, "bmi": 25.2, "children": 1, "smoker": False}) is None
+    assert cache.get(model, {"age": 30, "bmi": 25.01, "children": 1, "smoker": True}) is None
+
+
+def test_prediction_cache_exact_key_by_default():
+    """Test that without quantization only the exact BMI hits."""
+    model = object()
+    cache = PredictionCache(LRUCache())
+    cache.set(model, {"age": 30, "bmi": 25.0, "children": 1, "smoker": False}, 100.0)
+
+    assert cache.get(model, {"age": 30, "bmi": 25.0, "children": 1, "smoker": False}) == 100.0
+    assert cache.get(model, {"age": 30, "bmi": 25.000001, "children": 1, "smoker": False}) is None
+
+
+def test_prediction_cache_invalidated_on_model_reload():
+    """Test that switching to a different model object drops predictions of the old one."""
+    old_model, new_model = object(), object()
+    cache = PredictionCache(LRUCache())
+    input_data = {"age": 30, "bmi": 25.0, "children": 1, "smoker": False}
+    cache.set(old_model, input_data, 100.0)
+
+    assert cache.get(new_model, input_data) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_invalid_cache_configuration():
+    """Test that nonsensical cache limits are rejected."""
+    with pytest.raises(ValueError):
+        LRUCache(max_entries=0)
+    with pytest.raises(ValueError):
+        PredictionCache(LRUCache(), bmi_quantum=0)
+
+
+def test_predict_endpoint_uses_cache(client: TestClient, monkeypatch):
+    """Test that a repeated /predict input is answered from the cache."""
+    cache = PredictionCache(LRUCache(max_entries=10))
+    monkeypatch.setattr(predict.registry.get(), "prediction_cache", cache)
+    payload = {"smoker": True, "bmi": 28.5, "age": 40, "children": 2}
+
+    first = client.post("/predict", json=payload).json()
+    second = client.post("/predict", json=payload).json()
+
+    assert first == second
+    stats = client.get("/predict/stats").json()["prediction_cache"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
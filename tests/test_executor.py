@@ -0,0 +1,103 @@
+import asyncio
+
+import numpy as np
+import pytest
+from starlette.testclient import TestClient
+
+from app.models.executor import InferenceExecutor
+from app.models.model_loader import (
+    load_model_and_transformer,
+    predict_insurance_charges,
+    build_feature_matrix,
+    predict_insurance_charges_batch,
+)
+
+sample_inputs = [
+    {"age": 29, "bmi": 27.5, "children": 1, "smoker": True},
+    {"age": 60, "bmi": 35.2, "children": 0, "smoker": False},
+]
+
+
+@pytest.fixture(scope="module")
+def loaded_model():
+    """Fixture to load the compiled model and transformer once for the module."""
+    return load_model_and_transformer(inference_mode="compiled")
+
+
+@pytest.mark.parametrize("backend", ["inline", "thread", "process"])
+def test_backends_match_direct_prediction(loaded_model, backend):
+    """Test that every backend returns the same predictions as calling the model directly."""
+    model, poly = loaded_model
+    executor = InferenceExecutor(model, poly, backend=backend, max_workers=2, blas_threads=1)
+    features = build_feature_matrix(sample_inputs)
+
+    async def run():
+        single = await executor.predict(sample_inputs[0])
+        batch = await executor.predict_batch(features)
+        return single, batch
+
+    try:
+        single, batch = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert single == pytest.approx(predict_insurance_charges(model, poly, sample_inputs[0]))
+    np.testing.assert_allclose(batch, predict_insurance_charges_batch(model, poly, features))
+
+
+def test_stats_report_queue_depth_and_saturation(loaded_model):
+    """Test that queued work beyond the pool size shows up as queue depth and full saturation."""
+    model, poly = loaded_model
+    executor = InferenceExecutor(model, poly, backend="thread", max_workers=2)
+    observed = {}
+
+    async def run():
+        blocker = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        # Occupy both workers with tasks that wait for the event loop to release them.
+        executor._predict = lambda input_data: asyncio.run_coroutine_threadsafe(blocker.wait(), loop).result()
+        tasks = [asyncio.ensure_future(executor.predict(sample_inputs[0])) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        observed.update(executor.stats())
+        blocker.set()
+        await asyncio.gather(*tasks)
+
+    try:
+        asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert observed["in_flight"] == 5
+    assert observed["queue_depth"] == 3
+    assert observed["saturation"] == 1.0
+    assert executor.stats()["in_flight"] == 0
+
+
+def test_executor_restarts_after_shutdown(loaded_model):
+    """Test that a shut down executor recreates its pool on the next prediction."""
+    model, poly = loaded_model
+    executor = InferenceExecutor(model, poly, backend="thread", max_workers=1)
+
+    first = asyncio.run(executor.predict(sample_inputs[0]))
+    executor.shutdown()
+    second = asyncio.run(executor.predict(sample_inputs[0]))
+    executor.shutdown()
+
+    assert first == second
+
+
+def test_unknown_backend(loaded_model):
+    """Test that an unknown backend is rejected."""
+    with pytest.raises(ValueError):
+        InferenceExecutor(*loaded_model, backend="gpu")
+
+
+def test_predict_stats_endpoint(client: TestClient):
+    """Test that the executor load is exposed over the API."""
+    response = client.get("/predict/stats")
+
+    assert response.status_code == 200
+    response_data = response.json()
+    assert response_data["in_flight"] == 0
+    assert response_data["queue_depth"] == 0
+    assert 0.0 <= response_data["saturation"] <= 1.0
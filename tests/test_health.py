@@ -0,0 +1,66 @@
+import asyncio
+from unittest.mock import patch
+
+import numpy as np
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.testclient import TestClient
+
+from app.api.endpoints import health, predict
+from app.config import settings
+
+
+def test_liveness(client: TestClient):
+    """Test that the liveness probe reports the process alive."""
+    response = client.get("/api/live")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "alive" and response.json()["uptime_seconds"] > 0
+
+
+def test_readiness_checks(client: TestClient):
+    """Test that the readiness probe reports the active model version and its passing checks."""
+    response = client.get("/api/ready")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True
+    assert body["model_version"] == settings.model_version and body["model_load_seconds"] > 0
+    assert set(body["checks"]) == {"database", "model"}
+    assert all(check["ok"] and check["error"] is None for check in body["checks"].values())
+
+
+def test_not_ready_when_database_fails(client: TestClient, tmp_path):
+    """Test that a database the pool cannot connect to makes the process not ready, but still alive."""
+    unreachable = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'user.db'}")
+    with patch("app.db_control.session.engine", new=unreachable):
+        response = client.get("/api/ready")
+        assert client.get("/api/live").status_code == 200
+    asyncio.run(unreachable.dispose())
+
+    assert response.status_code == 503
+    body = response.json()
+    assert body["ready"] is False and body["status"] == "ready"
+    assert not body["checks"]["database"]["ok"] and "OperationalError" in body["checks"]["database"]["error"]
+    assert body["checks"]["model"]["ok"]
+
+
+def test_not_ready_when_model_fails_or_hangs(client: TestClient):
+    """Test that the model check fails on non-finite predictions and on predictions slower than the timeout."""
+    async def non_finite(rows):
+        return np.full(len(rows), np.nan)
+
+    async def hang(rows):
+        await asyncio.sleep(10)
+
+    loaded = predict.registry.get()
+    with patch.object(loaded, "predict_rows", non_finite):
+        check = client.get("/api/ready").json()["checks"]["model"]
+    assert check == {"ok": False, "seconds": check["seconds"], "error": "ValueError: The model returned non-finite "
+                                                                         "predictions"}
+
+    with patch.object(loaded, "predict_rows", hang), \
+            patch.object(health, "settings", settings.model_copy(update={"readiness_check_timeout_seconds": 0.05})):
+        response = client.get("/api/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["model"]["error"] == "Timed out after 0.05s"
+    assert client.get("/api/ready").status_code == 200
@@ -0,0 +1,66 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.api.endpoints import predict
+from app.models.registry import ModelRegistry
+from benchmarks.load_test import compare_results, format_results, main, run_benchmarks
+
+
+def test_in_process_scenarios(db):
+    """Test that every built-in scenario runs in-process without errors and reports latency percentiles."""
+    # A registry of its own, so that the run waits for the model to load rather than using one left by other tests.
+    with patch.object(predict, "registry", ModelRegistry(predict.load_version)):
+        results = asyncio.run(run_benchmarks(["healthcheck", "predict", "users"], target="asgi", iterations=20,
+                                             concurrency=4, warmup=0))
+
+    assert results["meta"]["concurrency"] == 4
+    requests = {name: stats for scenario in results["scenarios"].values()
+                for name, stats in scenario["requests"].items()}
+    assert set(requests) == {"GET /api/healthcheck", "POST /predict", "POST /api/users/create",
+                             "GET /api/users/{id}", "PUT /api/users/{id}", "DELETE /api/users/{id}"}
+    for stats in requests.values():
+        assert stats["count"] == 20 and stats["errors"] == 0
+        assert 0 < stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    assert "POST /predict" in format_results(results)
+
+
+def test_replay_scenario(db, tmp_path):
+    """Test that a traffic file is replayed in order, and unexpected statuses are counted as errors."""
+    traffic_path = tmp_path / "traffic.jsonl"
+    traffic_path.write_text("\n".join(json.dumps(entry) for entry in [
+        {"method": "GET", "path": "/api/healthcheck", "name": "health"},
+        {"method": "POST", "path": "/predict", "json": {"age": 40, "bmi": 28.5, "children": 2, "smoker": True}},
+        {"method": "GET", "path": "/api/users/999999", "expected_status": 200},
+    ]) + "\n")
+
+    results = asyncio.run(run_benchmarks(["replay"], iterations=9, concurrency=3, warmup=0,
+                                         traffic_path=str(traffic_path)))
+
+    requests = results["scenarios"]["replay"]["requests"]
+    assert {name: stats["count"] for name, stats in requests.items()} == {
+        "health": 3, "POST /predict": 3, "GET /api/users/999999": 3}
+    assert requests["health"]["errors"] == 0
+    assert requests["GET /api/users/999999"]["errors"] == 3
+
+
+def test_compare_results(tmp_path):
+    """Test that latency growth or throughput loss beyond the threshold is reported as a regression."""
+    def results(p50, p99, rps):
+        stats = {"count": 100, "errors": 0, "throughput_rps": rps, "mean_ms": p50, "p50_ms": p50, "p95_ms": p99,
+                 "p99_ms": p99, "max_ms": p99}
+        return {"meta": {}, "scenarios": {"predict": {"requests": {"POST /predict": stats}}}}
+
+    baseline = results(p50=2.0, p99=5.0, rps=1000)
+    assert compare_results(baseline, results(p50=2.1, p99=5.2, rps=950), threshold=0.1) == []
+    regressions = compare_results(baseline, results(p50=3.0, p99=5.0, rps=700), threshold=0.1)
+    assert len(regressions) == 2 and "p50_ms" in regressions[0] and "throughput_rps" in regressions[1]
+
+    baseline_path, current_path = tmp_path / "baseline.json", tmp_path / "current.json"
+    baseline_path.write_text(json.dumps(baseline))
+    current_path.write_text(json.dumps(results(p50=3.0, p99=5.0, rps=1000)))
+    with pytest.raises(SystemExit) as exit_info:
+        main(["compare", str(baseline_path), str(current_path)])
+    assert exit_info.value.code == 1
@@ -0,0 +1,119 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from starlette.testclient import TestClient
+
+from app import metrics
+from app.api.endpoints import predict
+from app.metrics import MetricsRegistry
+from app.models.model_loader import predict_insurance_charges
+
+PAYLOAD = {"smoker": True, "bmi": 28.5, "age": 40, "children": 2}
+ROUNDS = 5
+REQUESTS = 300
+CALLS = 20000
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    metrics.registry.clear()
+    yield
+    metrics.registry.enabled = True
+
+
+def test_render_exposition_format():
+    """Test that histograms and gauges are rendered as cumulative Prometheus text samples."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_seconds", "Test durations.", ("stage",), buckets=(0.1, 1.0))
+    gauge = registry.gauge("test_in_flight", "Test gauge.")
+    histogram.observe(0.05, ("a",))
+    histogram.observe(0.5, ("a",))
+    histogram.observe(5.0, ("a",))
+    histogram.observe(0.1, ('say "hi"',))
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1.0' in lines
+    assert 'test_seconds_bucket{stage="a",le="1.0"} 2.0' in lines
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3.0' in lines
+    assert 'test_seconds_sum{stage="a"} 5.55' in lines
+    assert 'test_seconds_count{stage="a"} 3.0' in lines
+    assert 'test_seconds_bucket{stage="say \\"hi\\"",le="0.1"} 1.0' in lines
+    assert "test_in_flight 1.0" in lines
+
+    with pytest.raises(ValueError):
+        histogram.observe(1.0, ("a", "b"))
+    registry.enabled = False
+    histogram.observe(1.0, ("b", "c"))
+    assert histogram.count(("a",)) == 3
+
+
+def test_request_and_stage_metrics(client: TestClient):
+    """Test that requests are recorded per route template and every stage of a prediction and user call is timed."""
+    user_id = client.post("/api/users/create", json={"name": "Metrics", "email": "metrics@example.com",
+                                                     "age": 30}).json()["id"]
+    client.get(f"/api/users/{user_id}")
+    client.get("/api/users/999999")
+    client.get("/no/such/route")
+    with patch.object(predict.registry.get(), "prediction_cache", None):
+        client.post("/predict", json=PAYLOAD)
+    client.post("/predict", json={**PAYLOAD, "age": -1})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+
+    assert metrics.http_request_seconds.count(("GET", "/api/users/{user_id}", "200")) == 1
+    assert metrics.http_request_seconds.count(("GET", "/api/users/{user_id}", "404")) == 1
+    assert metrics.http_request_seconds.count(("GET", "unmatched", "404")) == 1
+    assert metrics.http_request_seconds.count(("POST", "/predict", "422")) == 1
+    for stage in ("validation", "transform", "predict"):
+        assert metrics.prediction_stage_seconds.count((stage,)) >= 1
+    for operation in ("create_user", "get_user_by_id"):
+        assert metrics.db_query_seconds.count((operation,)) >= 1
+
+    lines = response.text.splitlines()
+    assert 'ml_service_http_request_duration_seconds_count{method="POST",route="/predict",status="200"} 1.0' in lines
+    assert "ml_service_http_requests_in_flight 1.0" in lines  # the /metrics request itself
+    assert metrics.http_requests_in_flight.get() == 0
+
+
+@pytest.mark.benchmark
+def test_metrics_overhead_benchmark(client: TestClient):
+    """Benchmark the cost of the instrumentation on a prediction call and on a full /predict request."""
+    model, poly = predict.registry.get().model, predict.registry.get().poly
+
+    def per_call(enabled: bool) -> float:
+        metrics.registry.enabled = enabled
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            predict_insurance_charges(model, poly, PAYLOAD)
+        return (time.perf_counter() - start) / CALLS
+
+    def per_request(enabled: bool) -> float:
+        metrics.registry.enabled = enabled
+        start = time.perf_counter()
+        for age in range(REQUESTS):
+            client.post("/predict", json={**PAYLOAD, "age": age % 120})
+        return (time.perf_counter() - start) / REQUESTS
+
+    with patch.object(predict.registry.get(), "prediction_cache", None):
+        # Alternate the rounds so drift affects both sides alike, and keep the fastest of each.
+        calls = {True: [], False: []}
+        requests = {True: [], False: []}
+        for _ in range(ROUNDS):
+            for enabled in (False, True):
+                calls[enabled].append(per_call(enabled))
+                requests[enabled].append(per_request(enabled))
+
+    call_off, call_on = min(calls[False]), min(calls[True])
+    request_off, request_on = min(requests[False]), min(requests[True])
+    print(f"\nmetrics overhead: predict_insurance_charges {call_off * 1e6:.2f} -> {call_on * 1e6:.2f} us, "
+          f"/predict request {request_off * 1e6:.0f} -> {request_on * 1e6:.0f} us "
+          f"({(request_on / request_off - 1) * 100:+.1f}%)")
+    # Timing the stages costs a few microseconds per request, well below the request itself.
+    assert call_on - call_off < 0.1 * request_off
@@ -3,7 +3,12 @@ from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import PolynomialFeatures
 from unittest.mock import Mock, patch
 
-from app.models.model_loader import load_model_and_transformer, predict_insurance_charges
+from app.models.model_loader import (
+    load_model_and_transformer,
+    predict_insurance_charges,
+    build_feature_matrix,
+    predict_insurance_charges_batch,
+)
 
 # Sample input data for testing
 sample_input_data = {
@@ -61,3 +66,26 @@ def test_predict_insurance_charges_mocked(mock_load_model):
     mock_transformer.transform.assert_called_once()
     mock_model.predict.assert_called_once()
     assert predicted_charges == 1234.56, "Mocked prediction did not return expected result"
+
+
+def test_predict_insurance_charges_batch_matches_single(load_test_model):
+    """Test that the vectorized batch path gives the same predictions as the single-input path."""
+    model, poly = load_test_model
+    inputs = [
+        sample_input_data,
+        {"age": 60, "bmi": 35.2, "children": 0, "smoker": False},
+        {"age": 18, "bmi": 19.9, "children": 4, "smoker": True},
+    ]
+
+    predictions = predict_insurance_charges_batch(model, poly, build_feature_matrix(inputs))
+
+    assert predictions.shape == (len(inputs),)
+    for input_data, prediction in zip(inputs, predictions):
+        assert prediction == pytest.approx(predict_insurance_charges(model, poly, input_data))
+
+
+def test_predict_insurance_charges_batch_empty(load_test_model):
+    """Test that an empty batch returns an empty result without calling the model."""
+    model, poly = load_test_model
+    predictions = predict_insurance_charges_batch(model, poly, build_feature_matrix([]))
+    assert predictions.shape == (0,)
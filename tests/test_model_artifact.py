@@ -0,0 +1,145 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import zipfile
+
+import joblib
+import numpy as np
+import pytest
+
+from app.api.endpoints import predict
+from app.models.model_loader import (
+    DEFAULT_MODEL_PATH,
+    DEFAULT_TRANSFORMER_PATH,
+    _memory_map_npz,
+    load_model_and_transformer,
+    load_model_artifact,
+    predict_insurance_charges_batch,
+)
+from app.models.polynomial_predictor import LookupTableModel
+from app.models.registry import ARTIFACT_FILE_NAME, ModelRegistry
+from model.train import export_model_artifact
+
+ROUNDS = 20
+COLD_ROUNDS = 3
+
+FEATURES = np.array([[18, 18.5, 0, 0], [40, 28.5, 2, 1], [64, 42.3, 5, 0], [30, 33.3, 12, 1]], dtype=np.float64)
+
+
+@pytest.fixture
+def artifact_path(tmp_path):
+    """Exports the bundled pickled model as a .npz artifact."""
+    path = str(tmp_path / ARTIFACT_FILE_NAME)
+    export_model_artifact(joblib.load(DEFAULT_MODEL_PATH), joblib.load(DEFAULT_TRANSFORMER_PATH), path)
+    return path
+
+
+def test_artifact_matches_pickles(artifact_path):
+    """Test that the .npz artifact predicts the same as the pickled model, in every supported mode."""
+    sklearn_model, poly = load_model_and_transformer(inference_mode="sklearn")
+    expected = predict_insurance_charges_batch(sklearn_model, poly, FEATURES)
+
+    compiled, transformer = load_model_and_transformer(artifact_path, inference_mode="compiled")
+    lookup, _ = load_model_artifact(artifact_path, inference_mode="lookup")
+
+    assert transformer is None
+    assert isinstance(lookup, LookupTableModel)
+    np.testing.assert_allclose(compiled.predict(FEATURES), expected, rtol=1e-7)
+    np.testing.assert_allclose(lookup.predict(FEATURES), expected, rtol=1e-7)
+
+
+def test_artifact_is_memory_mapped(artifact_path):
+    """Test that the artifact arrays are read-only views of one file mapping, holding the same data as np.load."""
+    arrays = _memory_map_npz(artifact_path)
+    with np.load(artifact_path) as loaded:
+        assert set(arrays) == set(loaded.files)
+        for name in loaded.files:
+            assert isinstance(arrays[name].base, np.memmap)
+            assert not arrays[name].flags.writeable
+            np.testing.assert_array_equal(arrays[name], loaded[name])
+
+
+def test_memory_map_npy_header_versions(tmp_path):
+    """Test that members written with .npy format 1.0 and 2.0 headers are both mapped from their header alone."""
+    path = str(tmp_path / "versions.npz")
+    arrays = {"small": np.arange(6, dtype=np.int64).reshape(2, 3), "large": np.linspace(0, 1, 1_000_000)}
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for (name, array), version in zip(arrays.items(), [(1, 0), (2, 0)]):
+            with archive.open(f"{name}.npy", "w", force_zip64=True) as member:
+                np.lib.format.write_array(member, array, version=version)
+
+    mapped = _memory_map_npz(path)
+    for name, array in arrays.items():
+        assert isinstance(mapped[name].base, np.memmap)
+        np.testing.assert_array_equal(mapped[name], array)
+
+
+def test_invalid_artifacts(artifact_path, tmp_path):
+    """Test that artifacts which cannot be served are rejected."""
+    with pytest.raises(ValueError):
+        load_model_artifact(artifact_path, inference_mode="sklearn")
+
+    with np.load(artifact_path) as loaded:
+        arrays = dict(loaded)
+    compressed = str(tmp_path / "compressed.npz")
+    np.savez_compressed(compressed, **arrays)
+    with pytest.raises(ValueError):
+        load_model_artifact(compressed)
+
+    renamed = str(tmp_path / "renamed.npz")
+    np.savez(renamed, **{**arrays, "feature_names": np.array(["a", "b", "c", "d"])})
+    with pytest.raises(ValueError):
+        load_model_artifact(renamed)
+
+
+def test_registry_scans_artifact_versions(artifact_path, tmp_path):
+    """Test that a version directory holding only the .npz artifact is registered."""
+    version_dir = tmp_path / "registry" / "v2"
+    os.makedirs(version_dir)
+    os.replace(artifact_path, version_dir / ARTIFACT_FILE_NAME)
+
+    registry = ModelRegistry(predict.load_version)
+    try:
+        assert asyncio.run(registry.scan(str(tmp_path / "registry"))) == ["v2"]
+        assert registry.get("v2").poly is None
+    finally:
+        registry.shutdown()
+
+
+def _cold_load_seconds(*args: str) -> float:
+    """Times, in a fresh interpreter, importing the model loader and loading a compiled model from `args`."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "from app.models.model_loader import load_model_and_transformer\n"
+        "load_model_and_transformer(*sys.argv[1:], inference_mode='compiled')\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code, *args], cwd=root, capture_output=True, text=True, check=True)
+    return float(result.stdout)
+
+
+@pytest.mark.benchmark
+def test_startup_benchmark(artifact_path):
+    """
+    Benchmark a worker's cold start (import + load) and a warm reload, from the pickles and from the .npz artifact.
+    """
+    pickle_cold = min(_cold_load_seconds(DEFAULT_MODEL_PATH, DEFAULT_TRANSFORMER_PATH) for _ in range(COLD_ROUNDS))
+    artifact_cold = min(_cold_load_seconds(artifact_path) for _ in range(COLD_ROUNDS))
+
+    def measure(load):
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            model, _ = load()
+        return model, (time.perf_counter() - start) / ROUNDS
+
+    pickled, pickle_warm = measure(lambda: load_model_and_transformer(inference_mode="compiled"))
+    mapped, artifact_warm = measure(lambda: load_model_and_transformer(artifact_path, inference_mode="compiled"))
+
+    print(f"\ncold start: pickles {pickle_cold * 1000:.0f} ms, .npz artifact {artifact_cold * 1000:.0f} ms; "
+          f"warm reload: pickles {pickle_warm * 1000:.2f} ms, .npz artifact {artifact_warm * 1000:.2f} ms "
+          f"({os.path.getsize(artifact_path)} bytes)")
+    np.testing.assert_allclose(mapped.predict(FEATURES), pickled.predict(FEATURES), rtol=1e-7)
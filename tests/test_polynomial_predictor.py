@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import PolynomialFeatures
+
+from app.models.model_loader import (
+    load_model_and_transformer,
+    predict_insurance_charges,
+    predict_insurance_charges_batch,
+    FEATURE_COLUMNS,
+)
+from app.models.polynomial_predictor import CompiledPolynomialModel, LookupTableModel
+
+
+def sklearn_predict(model, poly, features):
+    """Reference predictions through the original sklearn path."""
+    return model.predict(poly.transform(pd.DataFrame(features, columns=list(poly.feature_names_in_))))
+
+
+@pytest.fixture
+def sklearn_model():
+    """Fixture to load the pickled model and transformer."""
+    return load_model_and_transformer()
+
+
+@pytest.fixture
+def random_features():
+    """A grid-covering sample of valid inputs."""
+    rng = np.random.default_rng(0)
+    n = 2000
+    return np.column_stack([
+        rng.integers(0, 121, n),
+        rng.uniform(0, 100, n),
+        rng.integers(0, 10, n),
+        rng.integers(0, 2, n),
+    ]).astype(np.float64)
+
+
+def test_compiled_batch_matches_sklearn(sklearn_model, random_features):
+    """Test that the compiled model reproduces the sklearn predictions on a matrix."""
+    model, poly = sklearn_model
+    compiled = CompiledPolynomialModel.from_sklearn(model, poly)
+
+    expected = sklearn_predict(model, poly, random_features)
+    np.testing.assert_allclose(compiled.predict(random_features), expected, rtol=1e-7, atol=1e-2)
+
+
+def test_compiled_single_row_matches_sklearn(sklearn_model, random_features):
+    """Test that the plain-float single-row path reproduces the sklearn predictions."""
+    model, poly = sklearn_model
+    compiled = CompiledPolynomialModel.from_sklearn(model, poly)
+
+    expected = sklearn_predict(model, poly, random_features[:200])
+    for row, value in zip(random_features[:200].tolist(), expected):
+        assert compiled.predict_one(row) == pytest.approx(value, rel=1e-7, abs=1e-2)
+
+
+@pytest.mark.parametrize("degree,interaction_only,include_bias", [
+    (1, False, True),
+    (2, False, True),
+    (2, True, False),
+    (3, False, False),
+    (4, False, True),
+])
+def test_compiled_matches_freshly_fitted_pipelines(degree, interaction_only, include_bias):
+    """Test equivalence for other transformer configurations the training script could produce."""
+    rng = np.random.default_rng(degree)
+    x = pd.DataFrame(rng.uniform(0, 2, (300, len(FEATURE_COLUMNS))), columns=list(FEATURE_COLUMNS))
+    y = rng.normal(size=300)
+    poly = PolynomialFeatures(degree=degree, interaction_only=interaction_only, include_bias=include_bias)
+    # Fitting an intercept on top of a bias column is rank deficient and leaves huge cancelling
+    # coefficients; that case is covered by the pickled model tests above.
+    model = LinearRegression(fit_intercept=not include_bias).fit(poly.fit_transform(x), y)
+    compiled = CompiledPolynomialModel.from_sklearn(model, poly)
+
+    np.testing.assert_allclose(compiled.predict(x.to_numpy()), sklearn_predict(model, poly, x.to_numpy()),
+                               rtol=1e-9, atol=1e-9)
+
+
+def test_load_model_and_transformer_compiled():
+    """Test that the loader returns a drop-in compiled model when asked to."""
+    model, poly = load_model_and_transformer(inference_mode="compiled")
+    sklearn_model, _ = load_model_and_transformer()
+    assert isinstance(model, CompiledPolynomialModel)
+
+    input_data = {"age": 29, "bmi": 27.5, "children": 1, "smoker": True}
+    assert predict_insurance_charges(model, poly, input_data) == pytest.approx(
+        predict_insurance_charges(sklearn_model, poly, input_data))
+
+    features = np.array([[29, 27.5, 1, 1], [50, 31.0, 3, 0]], dtype=np.float64)
+    np.testing.assert_allclose(predict_insurance_charges_batch(model, poly, features),
+                               predict_insurance_charges_batch(sklearn_model, poly, features), rtol=1e-7)
+
+
+def test_load_model_and_transformer_unknown_mode():
+    """Test that an unknown inference mode is rejected."""
+    with pytest.raises(ValueError):
+        load_model_and_transformer(inference_mode="unknown")
+
+
+def test_compiled_rejects_wrong_shape(sklearn_model):
+    """Test that a matrix with the wrong number of columns is rejected."""
+    compiled = CompiledPolynomialModel.from_sklearn(*sklearn_model)
+    with pytest.raises(ValueError):
+        compiled.predict(np.zeros((2, 3)))
+
+
+@pytest.fixture
+def lookup_model(sklearn_model):
+    """Lookup table built from the pickled model, tabulating up to 5 children."""
+    model, poly = sklearn_model
+    return LookupTableModel(CompiledPolynomialModel.from_sklearn(model, poly),
+                            continuous_feature=FEATURE_COLUMNS.index("bmi"), max_values=(120, 5, 1))
+
+
+def test_lookup_table_matches_sklearn(sklearn_model, lookup_model, random_features):
+    """Test that table predictions, including fallbacks for untabulated children, match sklearn."""
+    model, poly = sklearn_model
+    expected = sklearn_predict(model, poly, random_features)
+
+    np.testing.assert_allclose(lookup_model.predict(random_features), expected, rtol=1e-7, atol=1e-2)
+    for row, value in zip(random_features[:200].tolist(), expected):
+        assert lookup_model.predict_one(row) == pytest.approx(value, rel=1e-7, abs=1e-2)
+
+
+def test_lookup_table_covers_every_cell(sklearn_model, lookup_model):
+    """Test every tabulated (age, children, smoker) cell against sklearn."""
+    model, poly = sklearn_model
+    age, children, smoker = np.meshgrid(np.arange(121), np.arange(6), np.arange(2), indexing="ij")
+    features = np.column_stack([age.ravel(), np.full(age.size, 31.7), children.ravel(), smoker.ravel()])
+
+    np.testing.assert_allclose(lookup_model.predict(features), sklearn_predict(model, poly, features),
+                               rtol=1e-7, atol=1e-2)
+
+
+def test_lookup_table_fallback_for_fractional_inputs(lookup_model):
+    """Test that non-integer discrete values are evaluated by the compiled polynomial."""
+    features = np.array([[30.5, 25.0, 1, 0], [30, 25.0, 1.5, 1]])
+    np.testing.assert_allclose(lookup_model.predict(features), lookup_model.compiled.predict(features))
+
+
+def test_lookup_table_memory_bound(sklearn_model):
+    """Test that a table larger than the configured limit is refused."""
+    compiled = CompiledPolynomialModel.from_sklearn(*sklearn_model)
+    with pytest.raises(ValueError):
+        LookupTableModel(compiled, continuous_feature=1, max_values=(120, 1000, 1), max_bytes=1_000_000)
+
+
+def test_load_model_and_transformer_lookup():
+    """Test that the loader builds a lookup table model when asked to."""
+    model, poly = load_model_and_transformer(inference_mode="lookup", lookup_max_children=3)
+    sklearn_model, _ = load_model_and_transformer()
+    assert isinstance(model, LookupTableModel)
+    assert model.table.shape == (121, 4, 2, 4)
+
+    input_data = {"age": 29, "bmi": 27.5, "children": 1, "smoker": True}
+    assert predict_insurance_charges(model, poly, input_data) == pytest.approx(
+        predict_insurance_charges(sklearn_model, poly, input_data))
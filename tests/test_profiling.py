@@ -0,0 +1,131 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from starlette.testclient import TestClient
+
+from app.api import dependencies
+from app.config import settings
+from app.profiling import SamplingProfiler, profiler
+
+PAYLOAD = {"smoker": True, "bmi": 28.5, "age": 40, "children": 2}
+REQUESTS = 300
+
+
+@pytest.fixture(autouse=True)
+def reset_profiler():
+    interval_seconds = profiler.interval_seconds
+    # Sample often, so that the short requests of the tests are caught.
+    profiler.interval_seconds = 0.0005
+    profiler.clear()
+    yield
+    profiler.sample_rate = 0.0
+    profiler.interval_seconds = interval_seconds
+    profiler.clear()
+
+
+def busy_loop(stop: threading.Event, started: threading.Event):
+    started.set()
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_busy_threads():
+    """Test that busy threads are sampled as folded stacks and idle threads are left out."""
+    sampler = SamplingProfiler()
+    stop, started = threading.Event(), threading.Event()
+    busy = threading.Thread(target=busy_loop, args=(stop, started), name="busy")
+    idle = threading.Thread(target=stop.wait, name="idle")
+    busy.start()
+    idle.start()
+    started.wait()
+    try:
+        for _ in range(20):
+            sampler.sample({busy.ident: busy.name, idle.ident: idle.name})
+            time.sleep(0.001)
+    finally:
+        stop.set()
+        busy.join()
+        idle.join()
+
+    stacks = dict(line.rsplit(" ", 1) for line in sampler.folded_stacks().splitlines())
+    busy_stacks = [stack for stack in stacks if stack.startswith("busy;")]
+    assert busy_stacks and all(stack.endswith(f"{__name__}:busy_loop") for stack in busy_stacks)
+    assert sum(int(stacks[stack]) for stack in busy_stacks) == 20
+    assert not any(stack.startswith("idle;") for stack in stacks)
+    assert sampler.stats()["samples"] == 20
+
+
+def test_profile_sampled_requests(admin_client: TestClient):
+    """Test that started profiling samples the request path, and stopping it leaves other requests unprofiled."""
+    response = admin_client.post("/api/profiler/start", json={"sample_rate": 1.0})
+    assert response.status_code == 200 and response.json()["sample_rate"] == 1.0
+
+    for age in range(REQUESTS):
+        admin_client.post("/predict", json={**PAYLOAD, "age": age % 120})
+
+    stats = admin_client.post("/api/profiler/stop").json()
+    # The stop call is profiled too, and still running when it reports.
+    assert stats["profiled_requests"] == REQUESTS + 1
+    assert stats["active_requests"] == 1 and stats["samples"] > 0
+
+    admin_client.post("/predict", json=PAYLOAD)
+    stats = admin_client.get("/api/profiler").json()
+    assert (stats["profiled_requests"], stats["active_requests"]) == (REQUESTS + 1, 0)
+
+    response = admin_client.get("/api/profiler/flamegraph")
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("fastapi.routing:" in line for line in lines)
+
+    assert admin_client.delete("/api/profiler").status_code == 204
+    assert admin_client.get("/api/profiler").json()["samples"] == 0
+    assert admin_client.post("/api/profiler/start", json={"sample_rate": 1.5}).status_code == 422
+
+
+def test_profiling_closed_without_admin_token(client: TestClient):
+    """Test that without a configured admin token, X-Profile is ignored and the profiler endpoints are rejected."""
+    assert dependencies.settings.admin_token is None
+    client.post("/predict", json=PAYLOAD, headers={"X-Profile": "1"})
+    client.post("/predict", json=PAYLOAD, headers={"X-Profile": "1", "X-Admin-Token": "anything"})
+    assert profiler.stats()["profiled_requests"] == 0
+
+    assert client.post("/api/profiler/start", json={"sample_rate": 1.0}).status_code == 403
+    assert client.get("/api/profiler/flamegraph", headers={"X-Admin-Token": "anything"}).status_code == 403
+    assert profiler.sample_rate == 0.0
+
+
+def test_profile_header_requires_admin(client: TestClient):
+    """Test that the X-Profile header only profiles requests carrying the admin token, when one is configured."""
+    with patch.object(dependencies, "settings", settings.model_copy(update={"admin_token": "secret"})):
+        client.post("/predict", json=PAYLOAD, headers={"X-Profile": "1"})
+        client.post("/predict", json=PAYLOAD, headers={"X-Profile": "1", "X-Admin-Token": "wrong"})
+        assert profiler.stats()["profiled_requests"] == 0
+        client.post("/predict", json=PAYLOAD, headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+        assert profiler.stats()["profiled_requests"] == 1
+
+        assert client.get("/api/profiler/flamegraph").status_code == 403
+        assert client.get("/api/profiler/flamegraph", headers={"X-Admin-Token": "secret"}).status_code == 200
+
+
+@pytest.mark.benchmark
+def test_profiling_overhead_benchmark(client: TestClient):
+    """Benchmark /predict latency with every request profiled against no profiling."""
+    def per_request(sample_rate: float) -> float:
+        profiler.sample_rate = sample_rate
+        start = time.perf_counter()
+        for age in range(REQUESTS):
+            client.post("/predict", json={**PAYLOAD, "age": age % 120})
+        return (time.perf_counter() - start) / REQUESTS
+
+    profiler.interval_seconds = settings.profiler_interval_ms / 1000
+    timings = {0.0: [], 1.0: []}
+    for _ in range(3):
+        for sample_rate in timings:
+            timings[sample_rate].append(per_request(sample_rate))
+    off, on = min(timings[0.0]), min(timings[1.0])
+    print(f"\nprofiling overhead: /predict {off * 1e6:.0f} us unprofiled, {on * 1e6:.0f} us profiled "
+          f"({(on / off - 1) * 100:+.1f}%, {settings.profiler_interval_ms} ms interval)")
+    assert profiler.stats()["samples"] > 0
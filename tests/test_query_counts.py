@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import select
+
+from app.db_control.crud_user import create_user, get_user_by_id, update_user, delete_user
+from app.db_control.models import User
+from app.db_control.session import session_scope
+
+ROUNDS = 50
+
+
+async def _legacy_update_user(user_id: int, **values):
+    """The previous update path: SELECT, then flush the changes, then refresh the object."""
+    async with session_scope() as session:
+        user = (await session.execute(select(User).where(User.id == user_id))).scalars().first()
+        if user is None:
+            return None
+        for key, value in values.items():
+            setattr(user, key, value)
+        await session.flush()
+        await session.refresh(user)
+        return user
+
+
+async def _legacy_delete_user(user_id: int) -> bool:
+    """The previous delete path: SELECT, then flush the deletion."""
+    async with session_scope() as session:
+        user = (await session.execute(select(User).where(User.id == user_id))).scalars().first()
+        if user is None:
+            return False
+        await session.delete(user)
+        await session.flush()
+        return True
+
+
+def _count(query_counter, coroutine):
+    query_counter.reset()
+    result = asyncio.run(coroutine)
+    return result, query_counter.count
+
+
+def test_single_statement_writes(query_counter):
+    """
+    Test that each CRUD call costs exactly one statement, where the previous implementation needed up to three.
+    """
+    user, create_count = _count(query_counter, create_user(name="Counted", email="counted@example.com", age=30))
+    _, get_count = _count(query_counter, get_user_by_id(user.id))
+    updated, update_count = _count(query_counter, update_user(user.id, name="Counted Again", age=31))
+    missing, missing_update_count = _count(query_counter, update_user(99999, name="Missing"))
+    deleted, delete_count = _count(query_counter, delete_user(user.id))
+
+    assert (create_count, get_count, update_count, missing_update_count, delete_count) == (1, 1, 1, 1, 1)
+    assert updated.name == "Counted Again" and updated.age == 31
+    assert missing is None
+    assert deleted is True
+
+    legacy_user = asyncio.run(create_user(name="Legacy", email="legacy@example.com", age=30))
+    _, legacy_update_count = _count(query_counter, _legacy_update_user(legacy_user.id, name="Legacy Again"))
+    _, legacy_delete_count = _count(query_counter, _legacy_delete_user(legacy_user.id))
+
+    assert legacy_update_count == 3
+    assert legacy_delete_count == 2
+
+
+@pytest.mark.benchmark
+def test_single_statement_writes_benchmark(query_counter):
+    """
+    Benchmark update+delete rounds of the single-statement CRUD layer against the previous round-trip pattern.
+    """
+    async def run(update, remove):
+        users = [await create_user(name=f"Bench {i}", email=f"bench{i}@example.com", age=i) for i in range(ROUNDS)]
+        query_counter.reset()
+        start = time.perf_counter()
+        for user in users:
+            await update(user.id, name="Benchmarked")
+            await remove(user.id)
+        return query_counter.count, time.perf_counter() - start
+
+    legacy_statements, legacy_seconds = asyncio.run(run(_legacy_update_user, _legacy_delete_user))
+    statements, seconds = asyncio.run(run(update_user, delete_user))
+
+    print(f"\nupdate+delete x{ROUNDS}: legacy {legacy_statements} statements in {legacy_seconds * 1000:.1f} ms, "
+          f"single-statement {statements} statements in {seconds * 1000:.1f} ms")
+    assert legacy_statements == 5 * ROUNDS
+    assert statements == 2 * ROUNDS
@@ -0,0 +1,190 @@
+import asyncio
+import os
+import shutil
+from unittest.mock import patch
+
+import pytest
+from starlette.testclient import TestClient
+
+from app.api import dependencies
+from app.api.endpoints import predict
+from app.models.model_loader import DEFAULT_MODEL_PATH, DEFAULT_TRANSFORMER_PATH
+from app.models.registry import ModelRegistry, VersionExistsError, MODEL_FILE_NAME, TRANSFORMER_FILE_NAME
+
+PAYLOAD = {"smoker": True, "bmi": 28.5, "age": 40, "children": 2}
+
+
+def make_version_dir(directory, version):
+    """Copies the bundled artifacts into a version directory of a registry directory."""
+    path = os.path.join(directory, version)
+    os.makedirs(path)
+    shutil.copy(DEFAULT_MODEL_PATH, os.path.join(path, MODEL_FILE_NAME))
+    shutil.copy(DEFAULT_TRANSFORMER_PATH, os.path.join(path, TRANSFORMER_FILE_NAME))
+    return path
+
+
+@pytest.fixture
+def registry():
+    """A registry loading versions with the application settings, released after the test."""
+    model_registry = ModelRegistry(predict.load_version)
+    yield model_registry
+    model_registry.shutdown()
+
+
+@pytest.fixture
+def restore_registry():
+    """Puts the application registry back to its original versions after a test changing it."""
+    active = predict.registry.active_version
+    original = {loaded.version for loaded in predict.registry.versions()}
+    yield predict.registry
+    predict.registry.activate(active)
+    for loaded in predict.registry.versions():
+        if loaded.version not in original:
+            asyncio.run(predict.registry.unregister(loaded.version))
+
+
+def test_first_version_is_active(registry: ModelRegistry):
+    """Test that the first registered version becomes active and later ones only when asked."""
+    asyncio.run(registry.register("v1", DEFAULT_MODEL_PATH, DEFAULT_TRANSFORMER_PATH))
+    asyncio.run(registry.register("v2", DEFAULT_MODEL_PATH, DEFAULT_TRANSFORMER_PATH))
+    assert registry.active_version == "v1"
+
+    registry.activate("v2")
+    assert registry.get().version == "v2"
+    assert [loaded.version for loaded in registry.versions()] == ["v1", "v2"]
+
+
+def test_invalid_registry_operations(registry: ModelRegistry):
+    """Test that duplicate, unknown and active versions are rejected."""
+    with pytest.raises(KeyError):
+        registry.get()
+
+    asyncio.run(registry.register("v1", DEFAULT_MODEL_PATH, DEFAULT_TRANSFORMER_PATH))
+    with pytest.raises(ValueError):
+        asyncio.run(registry.register("v1", DEFAULT_MODEL_PATH, DEFAULT_TRANSFORMER_PATH))
+    with pytest.raises(KeyError):
+        registry.get("missing")
+    with pytest.raises(KeyError):
+        registry.activate("missing")
+    with pytest.raises(ValueError):
+        asyncio.run(registry.unregister("v1"))
+
+
+def test_concurrent_registrations_of_a_version(registry: ModelRegistry):
+    """Test that only one of two concurrent registrations of a version succeeds, and the other loads nothing."""
+    async def scenario():
+        return await asyncio.gather(registry.register("v1", DEFAULT_MODEL_PATH, DEFAULT_TRANSFORMER_PATH),
+                                    registry.register("v1", DEFAULT_MODEL_PATH, DEFAULT_TRANSFORMER_PATH),
+                                    return_exceptions=True)
+
+    with patch.object(registry, "build", wraps=registry.build) as build:
+        results = asyncio.run(scenario())
+
+    assert sum(isinstance(result, VersionExistsError) for result in results) == 1
+    assert build.call_count == 1
+    assert [loaded.version for loaded in registry.versions()] == ["v1"]
+
+
+def test_swap_keeps_in_flight_version(registry: ModelRegistry):
+    """Test that a version fetched before a swap keeps serving, while new lookups get the new version."""
+    async def scenario():
+        await registry.register("v1", DEFAULT_MODEL_PATH, DEFAULT_TRANSFORMER_PATH)
+        in_flight = registry.get()
+        await registry.register("v2", DEFAULT_MODEL_PATH, DEFAULT_TRANSFORMER_PATH, activate=True)
+        return in_flight, await in_flight.predict(PAYLOAD), await registry.get().predict(PAYLOAD)
+
+    in_flight, old_prediction, new_prediction = asyncio.run(scenario())
+
+    assert in_flight.version == "v1"
+    assert registry.active_version == "v2"
+    assert old_prediction == pytest.approx(new_prediction)
+
+
+def test_scan_registers_and_activates_new_versions(registry: ModelRegistry, tmp_path):
+    """Test that scanning registers complete version directories, activates the newest and skips the rest."""
+    make_version_dir(tmp_path, "2024-01-01")
+    make_version_dir(tmp_path, "2024-02-01")
+    os.makedirs(tmp_path / "incomplete")
+    broken = make_version_dir(tmp_path, "2024-03-01")
+    with open(os.path.join(broken, MODEL_FILE_NAME), "wb") as f:
+        f.write(b"still being written")
+
+    assert asyncio.run(registry.scan(str(tmp_path))) == ["2024-01-01", "2024-02-01"]
+    assert registry.active_version == "2024-02-01"
+
+    # The broken version is picked up once its artifacts are complete; known versions are not reloaded.
+    shutil.copy(DEFAULT_MODEL_PATH, os.path.join(broken, MODEL_FILE_NAME))
+    assert asyncio.run(registry.scan(str(tmp_path))) == ["2024-03-01"]
+    assert registry.active_version == "2024-03-01"
+
+
+def test_scan_activates_most_recent_version(registry: ModelRegistry, tmp_path):
+    """Test that scanning activates the version whose artifacts were written last, whatever the names."""
+    for version, mtime in (("b-older", 1_700_000_000), ("a-newer", 1_700_000_100)):
+        path = make_version_dir(tmp_path, version)
+        for name in (MODEL_FILE_NAME, TRANSFORMER_FILE_NAME):
+            os.utime(os.path.join(path, name), (mtime, mtime))
+
+    assert asyncio.run(registry.scan(str(tmp_path))) == ["b-older", "a-newer"]
+    assert registry.active_version == "a-newer"
+
+
+def test_predict_pins_model_version(admin_client: TestClient, restore_registry: ModelRegistry):
+    """Test that /predict uses the active version by default and a registered version when pinned."""
+    response = admin_client.post("/api/models", json={
+        "version": "candidate", "model_path": DEFAULT_MODEL_PATH, "transformer_path": DEFAULT_TRANSFORMER_PATH
+    })
+    assert response.status_code == 201
+    assert response.json()["active"] is False
+
+    default = admin_client.post("/predict", json=PAYLOAD).json()
+    pinned = admin_client.post("/predict", json={**PAYLOAD, "model_version": "candidate"}).json()
+    assert default["model_version"] == restore_registry.active_version
+    assert pinned["model_version"] == "candidate"
+    assert pinned["cost_prediction"] == pytest.approx(default["cost_prediction"])
+
+    batch = admin_client.post("/predict/batch", json={"items": [PAYLOAD], "model_version": "candidate"}).json()
+    assert batch["model_version"] == "candidate"
+
+    assert admin_client.post("/predict", json={**PAYLOAD, "model_version": "missing"}).status_code == 404
+    assert admin_client.get("/predict/stats", params={"model_version": "missing"}).status_code == 404
+
+
+def test_admin_model_endpoints(admin_client: TestClient, restore_registry: ModelRegistry):
+    """Test registering, activating and removing versions through the admin endpoints."""
+    body = {"version": "candidate", "model_path": DEFAULT_MODEL_PATH, "transformer_path": DEFAULT_TRANSFORMER_PATH}
+    assert admin_client.post("/api/models", json=body).status_code == 201
+    assert admin_client.post("/api/models", json=body).status_code == 409
+    assert admin_client.post("/api/models", json={**body, "version": "bad", "model_path": "/nonexistent.pkl"}
+                       ).status_code == 400
+
+    assert admin_client.post("/api/models/candidate/activate").json()["active"] is True
+    listing = admin_client.get("/api/models").json()
+    assert listing["active_version"] == "candidate"
+    assert admin_client.post("/predict", json=PAYLOAD).json()["model_version"] == "candidate"
+    assert admin_client.delete("/api/models/candidate").status_code == 409
+
+    previous = next(v["version"] for v in listing["versions"] if v["version"] != "candidate")
+    admin_client.post(f"/api/models/{previous}/activate")
+    assert admin_client.delete("/api/models/candidate").status_code == 204
+    assert admin_client.delete("/api/models/candidate").status_code == 404
+    assert admin_client.post("/api/models/missing/activate").status_code == 404
+
+
+def test_admin_token_required(client: TestClient):
+    """Test that the admin endpoints require the admin token, and are closed when none is configured."""
+    body = {"version": "candidate", "model_path": DEFAULT_MODEL_PATH, "transformer_path": DEFAULT_TRANSFORMER_PATH}
+    assert dependencies.settings.admin_token is None
+    for request in (client.build_request("GET", "/api/models"), client.build_request("POST", "/api/models", json=body),
+                    client.build_request("POST", "/api/models/scan"),
+                    client.build_request("POST", "/api/models/candidate/activate"),
+                    client.build_request("DELETE", "/api/models/candidate")):
+        assert client.send(request).status_code == 403
+        request.headers["X-Admin-Token"] = "anything"
+        assert client.send(request).status_code == 403
+    assert "candidate" not in {loaded.version for loaded in predict.registry.versions()}
+
+    with patch.object(dependencies, "settings", dependencies.settings.model_copy(update={"admin_token": "secret"})):
+        assert client.get("/api/models").status_code == 403
+        assert client.get("/api/models", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        assert client.get("/api/models", headers={"X-Admin-Token": "secret"}).status_code == 200
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.model_loader import build_feature_matrix, load_model_and_transformer, predict_insurance_charges_batch
+from model.selection import candidates, format_report, select_model
+from tests.test_train import make_dataset
+
+ROWS = 2000
+
+
+def test_candidates():
+    """Test that the candidates cover every estimator and degree, with interaction-only variants from degree 2."""
+    names = {candidate["name"] for candidate in candidates(degrees=[1, 2], estimators=["linear", "lasso"])}
+    assert names == {"linear-d1", "lasso-d1", "linear-d2", "lasso-d2", "linear-d2-interaction",
+                     "lasso-d2-interaction"}
+
+
+def test_select_model_within_error_budget(tmp_path):
+    """Test that the fastest candidate within the error budget is selected and saved as a registry version."""
+    data_path = make_dataset(tmp_path / "insurance.csv", ROWS)
+    output_dir = tmp_path / "selected"
+    report = select_model(data_path, degrees=[1, 2, 3], folds=3, workers=2, error_budget=1200,
+                          output_dir=str(output_dir))
+
+    results = {result["name"]: result for result in report["candidates"]}
+    assert len(results) == 15 and report["rows"] == ROWS
+    # The charges follow a degree-2 polynomial plus noise with a standard deviation of 1000.
+    assert results["linear-d1"]["rmse"] > 1200 > results["linear-d2"]["rmse"]
+    eligible = [result for result in results.values() if result["rmse"] <= 1200]
+    assert report["selected"] == min(eligible, key=lambda result: result["single_row_us"])["name"]
+    assert all(result["artifact_bytes"] > 0 and result["batch_row_us"] > 0 for result in results.values())
+    assert "*" + report["selected"] in format_report(report)
+
+    df = pd.read_csv(data_path).head(100)
+    features = build_feature_matrix(df.assign(smoker=df["smoker"] == "yes").to_dict("records"))
+    model, poly = load_model_and_transformer(str(output_dir / "polynomial_regression_model.pkl"),
+                                             str(output_dir / "polynomial_features.pkl"))
+    artifact_model, artifact_poly = load_model_and_transformer(str(output_dir / "polynomial_model.npz"),
+                                                               inference_mode="compiled")
+    np.testing.assert_allclose(predict_insurance_charges_batch(artifact_model, artifact_poly, features),
+                               predict_insurance_charges_batch(model, poly, features), rtol=1e-9)
+
+
+def test_select_model_without_candidate_in_budget(tmp_path):
+    """Test that nothing is selected or saved when no candidate meets the error budget."""
+    data_path = make_dataset(tmp_path / "insurance.csv", ROWS)
+    report = select_model(data_path, degrees=[1], folds=3, workers=1, error_budget=10,
+                          output_dir=str(tmp_path / "selected"))
+
+    assert report["selected"] is None
+    assert not (tmp_path / "selected").exists()
+    assert "No candidate meets the error budget" in format_report(report)
+
+
+@pytest.mark.benchmark
+def test_model_selection_benchmark(tmp_path):
+    """Benchmark every candidate of degrees 1 to 4: cross-validated error, inference latency and artifact size."""
+    data_path = make_dataset(tmp_path / "insurance.csv", 10000)
+    report = select_model(data_path, error_budget=1100)
+
+    print("\n" + format_report(report))
+    assert len(report["candidates"]) == 21 and report["selected"] is not None
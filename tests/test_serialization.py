@@ -0,0 +1,88 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from starlette.testclient import TestClient
+
+from app.api.serialization import ModelJSONResponse
+from app.schemas.request_schemas import PredictRequest
+from app.schemas.response_schemas import PredictResponse
+
+PAYLOAD = {"smoker": True, "bmi": 28.5, "age": 40, "children": 2}
+CALLS = 20000
+
+
+def test_predict_serialization(client: TestClient):
+    """Test that /predict answers compact JSON of its response model."""
+    response = client.post("/predict", json=PAYLOAD)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert set(response.json()) == {"cost_prediction", "model_version"}
+    assert response.content == PredictResponse(**response.json()).model_dump_json().encode()
+
+
+def test_body_validation_errors(client: TestClient):
+    """Test that bodies validated from their bytes get FastAPI's 422 error shape."""
+    response = client.post("/predict", json={**PAYLOAD, "age": -1})
+    assert response.status_code == 422
+    (error,) = response.json()["detail"]
+    assert error["loc"] == ["body", "age"] and error["type"] == "greater_than_equal"
+
+    response = client.post("/predict", content=b'{"smoker": true,', headers={"content-type": "application/json"})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
+
+    response = client.post("/api/users/create", json={"name": "Serialization", "email": "not-an-email", "age": 1})
+    assert response.status_code == 422 and response.json()["detail"][0]["loc"] == ["body", "email"]
+
+
+def test_request_bodies_documented(client: TestClient):
+    """Test that the request bodies read from bytes are still described in the OpenAPI schema."""
+    paths = client.get("/openapi.json").json()["paths"]
+
+    for path, method, field in [("/predict", "post", "bmi"), ("/predict/batch", "post", "columns"),
+                                ("/api/users/create", "post", "email"), ("/api/users/{user_id}", "put", "age")]:
+        body = paths[path][method]["requestBody"]
+        assert field in body["content"]["application/json"]["schema"]["properties"]
+    assert "PredictResponse" in json.dumps(paths["/predict"]["post"]["responses"]["200"])
+
+
+@pytest.mark.benchmark
+def test_serialization_benchmark():
+    """Benchmark the per-request cost of parsing a /predict body and serializing its response, before and after."""
+    body = json.dumps(PAYLOAD).encode()
+    app = FastAPI()
+
+    @app.post("/predict", response_model=PredictResponse)
+    async def predict():
+        pass
+
+    field = app.routes[-1].response_field
+
+    async def before() -> float:
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            data = PredictRequest.model_validate(json.loads(body))
+            content = await serialize_response(field=field, response_content=PredictResponse(
+                cost_prediction=float(data.age), model_version="default"))
+            JSONResponse(content)
+        return (time.perf_counter() - start) / CALLS
+
+    async def after() -> float:
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            data = PredictRequest.model_validate_json(body)
+            ModelJSONResponse(PredictResponse(cost_prediction=float(data.age), model_version="default"))
+        return (time.perf_counter() - start) / CALLS
+
+    timings = {before: [], after: []}
+    for _ in range(3):
+        for variant in timings:
+            timings[variant].append(asyncio.run(variant()))
+    old, new = min(timings[before]), min(timings[after])
+    print(f"\n/predict serialization: {old * 1e6:.1f} us -> {new * 1e6:.1f} us per request ({old / new:.1f}x)")
@@ -0,0 +1,102 @@
+import importlib.util
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.config import Settings
+from app.server import uvicorn_options
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROW = {"smoker": True, "bmi": 28.5, "age": 40, "children": 2}
+
+
+def test_uvicorn_options():
+    """Test that the worker options come from the settings, with uvloop and httptools only when installed."""
+    options = uvicorn_options(Settings(server_backlog=512, server_keep_alive_seconds=75,
+                                       server_graceful_timeout_seconds=12))
+
+    assert (options["backlog"], options["timeout_keep_alive"], options["timeout_graceful_shutdown"]) == (512, 75, 12)
+    assert options["loop"] == ("uvloop" if importlib.util.find_spec("uvloop") else "asyncio")
+    assert options["http"] == ("httptools" if importlib.util.find_spec("httptools") else "h11")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _workers(pid: int) -> set:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return set(map(int, f.read().split()))
+
+
+def _wait_for(condition, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.1)
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/task"), reason="Reads worker processes from /proc")
+def test_multi_worker_restart_and_graceful_drain(tmp_path):
+    """Test that workers are forked and restarted, and that SIGTERM lets an in-flight request finish."""
+    port = _free_port()
+    env = {**os.environ, "ML_SERVICE_DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path / 'server.db'}"}
+    server = subprocess.Popen([sys.executable, "-m", "app.server", "--workers", "2", "--host", "127.0.0.1",
+                               "--port", str(port)], cwd=ROOT, env=env)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        def healthy():
+            try:
+                return httpx.get(f"{url}/api/healthcheck").status_code == 200
+            except httpx.TransportError:
+                return False
+
+        _wait_for(healthy)
+        workers = _workers(server.pid)
+        assert len(workers) == 2
+
+        # A worker that dies is replaced.
+        killed = workers.pop()
+        os.kill(killed, signal.SIGKILL)
+        _wait_for(lambda: killed not in _workers(server.pid) and len(_workers(server.pid)) == 2)
+        _wait_for(healthy)
+
+        # Upload a stream to score, and ask the server to stop while the upload is still in progress.
+        sent_first_half = threading.Event()
+
+        def body():
+            for i in range(10):
+                if i == 5:
+                    sent_first_half.set()
+                    time.sleep(1.0)
+                yield (json.dumps(ROW) + "\n").encode()
+
+        result = {}
+
+        def upload():
+            result["response"] = httpx.post(f"{url}/predict/stream", content=body(), timeout=30)
+
+        uploader = threading.Thread(target=upload)
+        uploader.start()
+        sent_first_half.wait(timeout=10)
+        time.sleep(0.2)
+        server.send_signal(signal.SIGTERM)
+        uploader.join(timeout=30)
+
+        lines = [json.loads(line) for line in result["response"].text.splitlines()]
+        assert lines[-1]["summary"]["scored"] == 10
+        assert server.wait(timeout=30) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.wait()
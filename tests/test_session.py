@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+from app.config import Settings
+from app.db_control.models import User
+from app.db_control.session import Base, create_engine_from_settings
+
+WRITERS = 8
+WRITES = 50
+
+
+def test_engine_pool_from_settings():
+    """Test that the pool options are taken from the settings."""
+    config = Settings(database_url="sqlite+aiosqlite:////tmp/pool-settings.db", database_pool_size=7,
+                      database_max_overflow=3, database_pool_pre_ping=False)
+    engine = create_engine_from_settings(config)
+
+    pool = engine.pool
+    assert isinstance(pool, AsyncAdaptedQueuePool)
+    assert pool.size() == 7
+    assert pool._max_overflow == 3
+    assert pool._pre_ping is False
+    assert engine.echo is False
+
+
+def test_engine_in_memory_sqlite():
+    """Test that an in-memory SQLite database keeps its single connection."""
+    engine = create_engine_from_settings(Settings(database_url="sqlite+aiosqlite://", database_echo=True))
+
+    assert isinstance(engine.pool, StaticPool)
+    assert engine.echo is True
+
+
+async def _pragmas(config: Settings) -> dict:
+    engine = create_engine_from_settings(config)
+    try:
+        async with engine.connect() as connection:
+            return {name: (await connection.execute(text(f"PRAGMA {name}"))).scalar()
+                    for name in ("journal_mode", "synchronous", "mmap_size", "busy_timeout")}
+    finally:
+        await engine.dispose()
+
+
+def test_sqlite_profiles(tmp_path):
+    """Test that the opt-in tuned profile sets its pragmas on every connection, and the default leaves SQLite's."""
+    tuned = asyncio.run(_pragmas(Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'tuned.db'}",
+                                          database_sqlite_profile="tuned", database_sqlite_busy_timeout_ms=1234)))
+    assert tuned == {"journal_mode": "wal", "synchronous": 1, "mmap_size": 268_435_456, "busy_timeout": 1234}
+
+    default = asyncio.run(_pragmas(Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'default.db'}")))
+    assert default["journal_mode"] == "delete" and default["synchronous"] == 2
+
+
+async def _concurrent_writes(config: Settings) -> float:
+    """Inserts WRITERS x WRITES users from concurrent writers, one transaction per user; returns writes/sec."""
+    engine = create_engine_from_settings(config)
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+        async def writer(index: int):
+            for i in range(WRITES):
+                async with engine.begin() as connection:
+                    await connection.execute(insert(User).values(name=f"Writer {index}", age=i,
+                                                                 email=f"writer-{index}-{i}@example.com"))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(writer(index) for index in range(WRITERS)))
+        seconds = time.perf_counter() - start
+
+        async with engine.connect() as connection:
+            assert (await connection.execute(text("SELECT count(*) FROM users"))).scalar() == WRITERS * WRITES
+        return WRITERS * WRITES / seconds
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.benchmark
+def test_sqlite_write_concurrency_benchmark(tmp_path):
+    """Benchmark concurrent single-row write transactions with SQLite's defaults and with the tuned profile."""
+    rates = {}
+    for profile in ("default", "tuned"):
+        config = Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / f'{profile}.db'}",
+                          database_sqlite_profile=profile)
+        rates[profile] = asyncio.run(_concurrent_writes(config))
+
+    print(f"\nSQLite, {WRITERS} concurrent writers: default {rates['default']:.0f} writes/sec, "
+          f"tuned {rates['tuned']:.0f} writes/sec ({rates['tuned'] / rates['default']:.1f}x)")
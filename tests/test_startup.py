@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from unittest.mock import patch
+
+import pytest
+from starlette.testclient import TestClient
+
+from app import startup
+from app.api.endpoints import predict
+from app.main import app
+from app.models.registry import ModelRegistry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAYLOAD = {"smoker": True, "bmi": 28.5, "age": 40, "children": 2}
+
+# Packages only needed once the model is loaded, at start-up, if at all.
+DEFERRED_PACKAGES = ("sklearn", "pandas", "scipy", "joblib")
+
+
+def test_ready_after_startup(client: TestClient):
+    """Test that the application reports ready, with the time each start-up step took."""
+    response = client.get("/api/ready")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True and body["status"] == "ready" and body["error"] is None
+    assert {"tables", "model", "warm_up"} <= set(body["steps"])
+    assert body["ready_seconds"] >= sum(body["steps"].values())
+
+
+def test_failed_startup_is_not_ready(db):
+    """Test that a model failing to load leaves the application alive but not ready, and predictions unavailable."""
+    def fail():
+        raise FileNotFoundError("polynomial_regression_model.pkl")
+
+    with patch.object(predict, "registry", ModelRegistry(predict.load_version)), \
+            patch.object(predict, "load_default_version", fail), TestClient(app) as client:
+        while startup.state.status == startup.STARTING:
+            time.sleep(0.01)
+
+        response = client.get("/api/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "failed"
+        assert response.json()["error"] == "FileNotFoundError: polynomial_regression_model.pkl"
+        assert client.get("/api/healthcheck").status_code == 200
+        assert client.post("/predict", json=PAYLOAD).status_code == 503
+
+
+def test_import_defers_model_dependencies():
+    """Test that importing the application does not load the packages only the model needs."""
+    result = subprocess.run([sys.executable, "-c", "import sys, app.main; print(' '.join(sys.modules))"], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+
+    loaded = {module.split(".")[0] for module in result.stdout.split()}
+    assert not loaded & set(DEFERRED_PACKAGES)
+
+
+@pytest.mark.benchmark
+def test_import_time_benchmark():
+    """Benchmark importing the application (`python -X importtime`)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+
+    # Lines read "import time: <self us> | <cumulative us> | <indented module name>".
+    cumulative = {}
+    by_package = defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        cumulative[module] = int(cumulative_us)
+        by_package[module.split(".")[0]] += int(self_us)
+
+    heaviest = sorted(by_package.items(), key=lambda item: -item[1])[:5]
+    print(f"\nimport app.main: {cumulative['app.main'] / 1000:.0f} ms; heaviest packages: "
+          + ", ".join(f"{package} {us / 1000:.0f} ms" for package, us in heaviest))
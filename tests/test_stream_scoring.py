@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from starlette.testclient import TestClient
+
+from app.models.stream_scoring import aiter_lines, main, score_stream
+
+ROWS = [
+    {"smoker": True, "bmi": 28.5, "age": 40, "children": 2},
+    {"smoker": False, "bmi": 20.0, "age": 30, "children": 0},
+    {"smoker": False, "bmi": 35.2, "age": 58, "children": 3},
+]
+
+
+async def collect(iterator) -> list:
+    return [item async for item in iterator]
+
+
+async def from_list(items):
+    for item in items:
+        yield item
+
+
+def parse_ndjson(text: str) -> list:
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_aiter_lines_across_chunks():
+    """Test that lines split across byte chunks are reassembled, with CRLF endings and no trailing newline."""
+    chunks = [b'{"a": 1}\r\n{"b"', b': 2}\n', b'\n{"c": 3}']
+    lines = asyncio.run(collect(aiter_lines(from_list(chunks))))
+    assert lines == ['{"a": 1}', '{"b": 2}', '', '{"c": 3}']
+
+
+def test_aiter_lines_drops_long_lines():
+    """Test that a line longer than the limit, across chunks or with no newline, is replaced by None unbuffered."""
+    chunks = [b'{"a": 1}\n' + b"x" * 6, b"x" * 6, b"x" * 6 + b'\n{"b": 2}\n0123456789', b"\n", b"y" * 11]
+    lines = asyncio.run(collect(aiter_lines(from_list(chunks), max_line_bytes=10)))
+    assert lines == ['{"a": 1}', None, '{"b": 2}', "0123456789", None]
+
+    async def endless_line(chunk_count):
+        for _ in range(chunk_count):
+            yield b"z" * 65536
+
+    # 128 MiB without a newline: only the first 64 KiB are ever held.
+    assert asyncio.run(collect(aiter_lines(endless_line(2000), max_line_bytes=65536))) == [None]
+
+
+def test_score_stream_chunks_and_errors():
+    """Test that inputs are scored in chunks of at most chunk_size, with per-line errors and a final summary."""
+    batch_sizes = []
+
+    async def predict_rows(rows):
+        batch_sizes.append(len(rows))
+        return np.array([float(row["age"]) for row in rows])
+
+    lines = [json.dumps(row) for row in ROWS] + ["not json", "", json.dumps({"age": 200}), json.dumps(ROWS[0]), None]
+    output = asyncio.run(collect(score_stream(from_list(lines), predict_rows, chunk_size=2)))
+    results = parse_ndjson("".join(output))
+
+    assert batch_sizes == [2, 1, 1]
+    assert [result.get("line") for result in results[:-1]] == [1, 2, 3, 4, 6, 7, 8]
+    assert [result.get("cost_prediction") for result in results[:-1]] == [40.0, 30.0, 58.0, None, None, 40.0, None]
+    assert results[3]["errors"][0]["type"] == "parse_error"
+    assert {error["loc"][0] for error in results[4]["errors"]} == {"smoker", "bmi", "age", "children"}
+    assert results[6]["errors"] == [{"type": "parse_error", "msg": "Line is too long"}]
+
+    summary = results[-1]["summary"]
+    assert (summary["rows"], summary["scored"], summary["errors"]) == (7, 4, 3)
+    assert summary["rows_per_second"] > 0
+
+
+def test_score_stream_csv():
+    """Test that CSV input is read by header name and a short row is reported as an error."""
+    async def predict_rows(rows):
+        return np.array([row["bmi"] for row in rows])
+
+    lines = ["bmi,age,smoker,children", "28.5,40,yes,2", "20,30", "33.1,55,false,1"]
+    results = parse_ndjson("".join(asyncio.run(collect(score_stream(from_list(lines), predict_rows, fmt="csv")))))
+
+    assert results[0] == {"line": 2, "cost_prediction": 28.5}
+    assert results[1]["line"] == 3 and results[1]["errors"][0]["type"] == "parse_error"
+    assert results[2] == {"line": 4, "cost_prediction": 33.1}
+
+
+def test_predict_stream_endpoint(client: TestClient):
+    """Test that the streaming endpoint scores NDJSON and CSV bodies like /predict."""
+    expected = [client.post("/predict", json=row).json()["cost_prediction"] for row in ROWS]
+
+    ndjson = "\n".join(json.dumps(row) for row in ROWS) + "\n"
+    response = client.post("/predict/stream", content=ndjson)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = parse_ndjson(response.text)
+    assert [result["cost_prediction"] for result in results[:-1]] == pytest.approx(expected)
+    assert results[-1]["summary"]["scored"] == len(ROWS)
+
+    csv_body = "age,bmi,children,smoker\n" + "".join(
+        f"{row['age']},{row['bmi']},{row['children']},{row['smoker']}\n" for row in ROWS
+    )
+    response = client.post("/predict/stream", content=csv_body, headers={"Content-Type": "text/csv"})
+    results = parse_ndjson(response.text)
+    assert [result["cost_prediction"] for result in results[:-1]] == pytest.approx(expected)
+
+    assert client.post("/predict/stream?format=xml", content=ndjson).status_code == 422
+    assert client.post("/predict/stream?model_version=missing", content=ndjson).status_code == 404
+
+
+def test_stream_scoring_cli(tmp_path):
+    """Test that the command line scorer writes one result per input line and a summary."""
+    input_path = tmp_path / "inputs.ndjson"
+    output_path = tmp_path / "predictions.ndjson"
+    input_path.write_text("\n".join(json.dumps(row) for row in ROWS * 5) + "\n")
+
+    main([str(input_path), "--output_path", str(output_path), "--chunk_size", "4"])
+
+    results = parse_ndjson(output_path.read_text())
+    assert len(results) == len(ROWS) * 5 + 1
+    assert results[-1]["summary"]["scored"] == len(ROWS) * 5
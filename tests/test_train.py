@@ -0,0 +1,115 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import PolynomialFeatures
+
+from model.train import FEATURE_COLUMNS, train_incremental
+
+ROWS = 3000
+BENCHMARK_ROWS = 200000
+
+
+def make_dataset(path, rows: int, seed: int = 0) -> str:
+    """Writes a CSV in the training data layout whose charges follow a degree-2 polynomial plus noise."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "age": rng.integers(18, 65, rows),
+        "sex": rng.choice(["male", "female"], rows),
+        "bmi": rng.uniform(15, 45, rows).round(1),
+        "children": rng.integers(0, 6, rows),
+        "smoker": rng.choice(["yes", "no"], rows),
+        "region": "southeast",
+    })
+    smoker = (df["smoker"] == "yes").to_numpy()
+    df["charges"] = (2000 + 3 * df["age"] ** 2 + 400 * df["bmi"] + 500 * df["children"]
+                     + 600 * df["bmi"] * smoker + rng.normal(0, 1000, rows))
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def features(df: pd.DataFrame) -> pd.DataFrame:
+    return df[FEATURE_COLUMNS].assign(smoker=(df["smoker"] == "yes").astype(float))
+
+
+def test_incremental_fit_matches_in_memory_fit(tmp_path):
+    """Test that the chunked fit on a process pool is the least-squares fit of the whole dataset."""
+    data_path = make_dataset(tmp_path / "insurance.csv", ROWS)
+    model_path, transformer_path = str(tmp_path / "model.pkl"), str(tmp_path / "poly.pkl")
+    stats = train_incremental(data_path, degrees=[2], chunk_size=700, workers=2, model_output_path=model_path,
+                              transformer_output_path=transformer_path)
+
+    df = pd.read_csv(data_path)
+    poly = PolynomialFeatures(degree=2)
+    reference = LinearRegression().fit(poly.fit_transform(features(df)), df["charges"])
+    model, saved_poly = joblib.load(model_path), joblib.load(transformer_path)
+
+    assert stats["rows"] == ROWS and stats["degree"] == 2
+    assert list(saved_poly.feature_names_in_) == FEATURE_COLUMNS
+    predictions = model.predict(saved_poly.transform(features(df)))
+    np.testing.assert_allclose(predictions, reference.predict(poly.transform(features(df))), rtol=1e-6)
+
+
+def test_cross_validated_degree_search(tmp_path):
+    """Test that k-fold cross-validation prefers the degree the data was generated with over a simpler model."""
+    data_path = make_dataset(tmp_path / "insurance.csv", ROWS)
+    stats = train_incremental(data_path, degrees=[1, 2, 3], folds=4, chunk_size=1000, workers=2,
+                              model_output_path=str(tmp_path / "model.pkl"),
+                              transformer_output_path=str(tmp_path / "poly.pkl"))
+
+    assert set(stats["cv"]) == {1, 2, 3}
+    assert stats["degree"] in (2, 3)
+    assert stats["cv"][2]["rmse"] < stats["cv"][1]["rmse"]
+    # The noise has a standard deviation of 1000.
+    assert stats["cv"][2]["rmse"] == pytest.approx(1000, rel=0.1) and stats["cv"][2]["r2"] > 0.9
+
+
+def test_fine_tuning_continues_from_state(tmp_path):
+    """Test that a run continuing from a training state fits the rows of both runs."""
+    first = make_dataset(tmp_path / "first.csv", ROWS, seed=1)
+    second = make_dataset(tmp_path / "second.csv", ROWS, seed=2)
+    state_path = str(tmp_path / "state.npz")
+    outputs = {"model_output_path": str(tmp_path / "model.pkl"), "transformer_output_path": str(tmp_path / "p.pkl")}
+
+    train_incremental(first, chunk_size=1000, workers=1, state_path=state_path, **outputs)
+    stats = train_incremental(second, chunk_size=1000, workers=1, state_path=state_path, **outputs)
+
+    df = pd.concat([pd.read_csv(first), pd.read_csv(second)])
+    poly = PolynomialFeatures(degree=2)
+    reference = LinearRegression().fit(poly.fit_transform(features(df)), df["charges"])
+    model = joblib.load(outputs["model_output_path"])
+    assert stats["rows"] == 2 * ROWS
+    np.testing.assert_allclose(model.intercept_, reference.intercept_, rtol=1e-6)
+    np.testing.assert_allclose(model.coef_, reference.coef_, rtol=1e-6, atol=1e-6)
+
+    with pytest.raises(ValueError):
+        train_incremental(second, degrees=[3], state_path=state_path, **outputs)
+
+
+def test_state_path_without_suffix(tmp_path):
+    """Test that a training state is saved to and continued from the given path, even without the .npz suffix."""
+    data_path = make_dataset(tmp_path / "insurance.csv", ROWS)
+    state_path = str(tmp_path / "training_state")
+    outputs = {"model_output_path": str(tmp_path / "model.pkl"), "transformer_output_path": str(tmp_path / "p.pkl")}
+
+    train_incremental(data_path, chunk_size=1000, workers=1, state_path=state_path, **outputs)
+    stats = train_incremental(data_path, chunk_size=1000, workers=1, state_path=state_path, **outputs)
+
+    assert stats["rows"] == 2 * ROWS
+    assert sorted(os.listdir(tmp_path)) == ["insurance.csv", "model.pkl", "p.pkl", "training_state"]
+
+
+@pytest.mark.benchmark
+def test_incremental_training_benchmark(tmp_path):
+    """Benchmark streaming training throughput, with cross-validation of degrees 1 to 4 in the same pass."""
+    data_path = make_dataset(tmp_path / "insurance.csv", BENCHMARK_ROWS)
+    stats = train_incremental(data_path, degrees=[1, 2, 3, 4], chunk_size=50000,
+                              model_output_path=str(tmp_path / "model.pkl"),
+                              transformer_output_path=str(tmp_path / "poly.pkl"))
+
+    print(f"\nincremental training: {stats['rows']} rows, degrees 1-4 x 5 folds, {stats['seconds']:.2f} s "
+          f"({stats['rows_per_second']:.0f} rows/sec), selected degree {stats['degree']}")
+    assert stats["rows"] == BENCHMARK_ROWS
@@ -0,0 +1,135 @@
+import asyncio
+import random
+from unittest.mock import patch
+
+import pytest
+from starlette.testclient import TestClient
+
+from app.cache import LRUCache
+from app.config import settings
+from app.db_control import crud_user
+from app.db_control.crud_user import create_user, get_user_by_id, update_user, delete_user, bulk_update_users
+from app.db_control.user_cache import UserCache
+
+
+@pytest.fixture(autouse=True)
+def user_cache():
+    """Enables the user cache, off by default, for the duration of a test."""
+    cache = UserCache(LRUCache(max_entries=settings.user_cache_max_entries,
+                               ttl_seconds=settings.user_cache_ttl_seconds))
+    with patch.object(crud_user, "user_cache", cache):
+        yield cache
+
+
+def test_reads_are_served_from_cache(query_counter):
+    """
+    Test that repeated reads of a user, and of a missing ID, only query the database once.
+    """
+    user = asyncio.run(create_user(name="Cached", email="cached@example.com", age=30))
+    before = crud_user.user_cache.stats()
+    query_counter.reset()
+
+    for _ in range(3):
+        assert asyncio.run(get_user_by_id(user.id)).name == "Cached"
+        assert asyncio.run(get_user_by_id(99999)) is None
+
+    assert query_counter.count == 2
+    stats = crud_user.user_cache.stats()
+    assert stats["hits"] - before["hits"] == 4
+    assert stats["misses"] - before["misses"] == 2
+
+
+def test_writes_invalidate_cached_users(db):
+    """
+    Test that updates, bulk updates and deletes are visible to the next read.
+    """
+    user = asyncio.run(create_user(name="Before", email="before@example.com", age=30))
+    assert asyncio.run(get_user_by_id(user.id)).name == "Before"
+
+    asyncio.run(update_user(user.id, name="After"))
+    assert asyncio.run(get_user_by_id(user.id)).name == "After"
+
+    asyncio.run(bulk_update_users([{"id": user.id, "age": 31}]))
+    assert asyncio.run(get_user_by_id(user.id)).age == 31
+
+    asyncio.run(delete_user(user.id))
+    assert asyncio.run(get_user_by_id(user.id)) is None
+
+
+def test_create_clears_negative_entry(db):
+    """
+    Test that an ID cached as not found becomes visible once a user is created with it.
+    """
+    next_id = asyncio.run(create_user(name="Probe", email="probe@example.com", age=1)).id + 1
+    assert asyncio.run(get_user_by_id(next_id)) is None
+
+    user = asyncio.run(create_user(name="Created", email="created@example.com", age=2))
+
+    assert user.id == next_id
+    assert asyncio.run(get_user_by_id(next_id)).name == "Created"
+
+
+def test_stale_read_is_not_cached():
+    """
+    Test that a read which started before a write cannot cache the value it read.
+    """
+    cache = UserCache(LRUCache())
+    version = cache.version  # a reader starts its database query
+    cache.invalidate([1])  # a writer commits and invalidates meanwhile
+    cache.fill(1, "stale", version)  # the reader finishes with the pre-write row
+
+    assert cache.lookup(1) == (False, None)
+
+
+def test_concurrent_updates_and_reads(db):
+    """
+    Test that after interleaved concurrent reads and updates, reads return the last written value.
+    """
+    user = asyncio.run(create_user(name="Race", email="race@example.com", age=0))
+    rng = random.Random(0)
+
+    async def writer():
+        for age in range(1, 21):
+            await update_user(user.id, age=age)
+            await asyncio.sleep(rng.random() / 1000)
+
+    async def reader():
+        ages = []
+        for _ in range(40):
+            ages.append((await get_user_by_id(user.id)).age)
+            await asyncio.sleep(rng.random() / 1000)
+        return ages
+
+    async def run():
+        results = await asyncio.gather(writer(), *(reader() for _ in range(4)))
+        return results[1:]
+
+    for ages in asyncio.run(run()):
+        # A reader never sees a value going back in time
+        assert ages == sorted(ages)
+    assert asyncio.run(get_user_by_id(user.id)).age == 20
+    assert crud_user.user_cache.lookup(user.id)[1].age == 20
+
+
+def test_user_cache_stats_endpoint(db, admin_client: TestClient):
+    """
+    Test that the user cache counters are exposed over the API.
+    """
+    user = {"name": "Stats", "email": "stats@example.com", "age": 5}
+    user_id = admin_client.post("/api/users/create", json=user).json()["id"]
+    before = admin_client.get("/api/users/cache/stats").json()
+    admin_client.get(f"/api/users/{user_id}")
+    admin_client.get(f"/api/users/{user_id}")
+
+    stats = admin_client.get("/api/users/cache/stats").json()
+    assert stats["hits"] - before["hits"] == 1
+    assert stats["misses"] - before["misses"] == 1
+    assert 0.0 <= stats["hit_ratio"] <= 1.0
+
+
+def test_user_cache_stats_requires_admin(db, client: TestClient):
+    """
+    Test that the user cache counters are not exposed without the admin token.
+    """
+    assert client.get("/api/users/cache/stats").status_code == 403
+    assert client.get("/api/users/cache/stats", headers={"X-Admin-Token": "anything"}).status_code == 403
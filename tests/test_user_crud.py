@@ -1,19 +1,44 @@
-from app.db_control.crud_user import create_user, get_user_by_id, update_user, delete_user
+import asyncio
+import itertools
+import sys
+from datetime import datetime
+
+from sqlalchemy import select, text
+
+from app.db_control.crud_user import (
+    create_user,
+    get_user_by_id,
+    update_user,
+    delete_user,
+    bulk_create_users,
+    bulk_update_users,
+    bulk_delete_users,
+    stream_users,
+    listing_orders,
+    _listing_statement,
+    _match_inserted,
+)
 from app.db_control.models import User
 
 
+async def _find_user_by_email(db, email):
+    async with db() as session:
+        result = await session.execute(select(User).filter_by(email=email))
+        return result.scalars().first()
+
+
 def test_create_user(db):
     """
     Test that a new user is successfully created.
     """
-    user = create_user(name="Test User", email="test@example.com", age=25)
+    user = asyncio.run(create_user(name="Test User", email="test@example.com", age=25))
 
     assert user.name == "Test User"
     assert user.email == "test@example.com"
     assert user.age == 25
 
     # Verify the user exists in the database
-    db_user = db.query(User).filter_by(email="test@example.com").first()
+    db_user = asyncio.run(_find_user_by_email(db, "test@example.com"))
     assert db_user is not None
     assert db_user.name == "Test User"
     assert db_user.age == 25
@@ -24,10 +49,10 @@ def test_get_user_by_id(db):
     Test retrieving a user by ID.
     """
     # Create a test user
-    user = create_user(name="Test User", email="testuser@example.com", age=30)
+    user = asyncio.run(create_user(name="Test User", email="testuser@example.com", age=30))
 
     # Retrieve the user by ID
-    retrieved_user = get_user_by_id(user.id)
+    retrieved_user = asyncio.run(get_user_by_id(user.id))
 
     # Verify the retrieved user matches the created user
     assert retrieved_user is not None
@@ -37,7 +62,7 @@ def test_get_user_by_id(db):
     assert retrieved_user.age == 30
 
     # Test non-existent ID returns None
-    non_existent_user = get_user_by_id(9999)
+    non_existent_user = asyncio.run(get_user_by_id(9999))
     assert non_existent_user is None
 
 
@@ -46,10 +71,10 @@ def test_update_user(db):
     Test updating a user's details.
     """
     # Create a test user
-    user = create_user(name="Old Name", email="oldemail@example.com", age=40)
+    user = asyncio.run(create_user(name="Old Name", email="oldemail@example.com", age=40))
 
     # Update the user's details
-    updated_user = update_user(user.id, name="New Name", email="newemail@example.com", age=45)
+    updated_user = asyncio.run(update_user(user.id, name="New Name", email="newemail@example.com", age=45))
 
     # Verify the user is updated correctly
     assert updated_user is not None
@@ -59,14 +84,14 @@ def test_update_user(db):
     assert updated_user.age == 45
 
     # Retrieve user from the database to confirm changes
-    db_user = get_user_by_id(user.id)
+    db_user = asyncio.run(get_user_by_id(user.id))
     assert db_user is not None
     assert db_user.name == "New Name"
     assert db_user.email == "newemail@example.com"
     assert db_user.age == 45
 
     # Test updating non-existent user returns None
-    non_existent_update = update_user(9999, name="Non Existent")
+    non_existent_update = asyncio.run(update_user(9999, name="Non Existent"))
     assert non_existent_update is None
 
 
@@ -75,19 +100,164 @@ def test_delete_user(db):
     Test deleting a user by ID.
     """
     # Create a test user
-    user = create_user(name="Delete Test", email="deletetest@example.com", age=30)
+    user = asyncio.run(create_user(name="Delete Test", email="deletetest@example.com", age=30))
 
     # Delete the user
-    delete_result = delete_user(user.id)
+    delete_result = asyncio.run(delete_user(user.id))
 
     # Verify deletion succeeded
     assert delete_result is True
 
     # Confirm user no longer exists in the database
-    db_user = get_user_by_id(user.id)
+    db_user = asyncio.run(get_user_by_id(user.id))
     assert db_user is None
 
     # Test deleting a non-existent user returns False
-    delete_non_existent = delete_user(9999)
+    delete_non_existent = asyncio.run(delete_user(9999))
     assert delete_non_existent is False
 
+
+def test_concurrent_creates(db):
+    """
+    Test that many users can be created concurrently from one event loop.
+    """
+    async def create_many():
+        return await asyncio.gather(*(
+            create_user(name=f"Concurrent {i}", email=f"concurrent{i}@example.com", age=20 + i) for i in range(10)
+        ))
+
+    users = asyncio.run(create_many())
+
+    assert len({user.id for user in users}) == 10
+
+
+def test_bulk_create_users_in_chunks(db):
+    """
+    Test that bulk creation spanning several chunks returns every user keyed by position.
+    """
+    rows = [{"name": f"Chunk {i}", "email": f"chunk{i}@example.com", "age": i} for i in range(7)]
+
+    created, errors = asyncio.run(bulk_create_users(rows, chunk_size=3))
+
+    assert errors == {}
+    assert sorted(created) == list(range(7))
+    assert [created[i].name for i in range(7)] == [row["name"] for row in rows]
+    assert len({user.id for user in created.values()}) == 7
+
+
+def test_bulk_created_users_matched_to_rows():
+    """
+    Test that users returned out of row order by a multi-row INSERT are matched back to their rows.
+    """
+    rows = [{"name": "Same", "email": "same@example.com", "age": 1}, {"name": "Other", "email": "other@example.com"},
+            {"name": "Same", "email": "same@example.com", "age": 1}, {"name": "Same", "email": "same@example.com"}]
+    returned = [User(id=14, name="Same", email="same@example.com", age=None),
+                User(id=13, name="Same", email="same@example.com", age=1),
+                User(id=12, name="Other", email="other@example.com", age=None),
+                User(id=11, name="Same", email="same@example.com", age=1)]
+
+    created = _match_inserted(rows, 10, returned)
+
+    assert {index: user.id for index, user in created.items()} == {10: 13, 11: 12, 12: 11, 13: 14}
+
+
+def test_bulk_create_users_reports_rejected_rows(db):
+    """
+    Test that a row rejected by the database does not prevent the rest of its chunk from being created.
+    """
+    rows = [
+        {"name": "Good One", "email": "goodone@example.com", "age": 1},
+        {"name": None, "email": "noname@example.com", "age": 2},  # name is NOT NULL
+        {"name": "Good Two", "email": "goodtwo@example.com", "age": 3},
+    ]
+
+    created, errors = asyncio.run(bulk_create_users(rows, chunk_size=10))
+
+    assert sorted(created) == [0, 2]
+    assert list(errors) == [1]
+    assert asyncio.run(_find_user_by_email(db, "goodtwo@example.com")) is not None
+    assert asyncio.run(_find_user_by_email(db, "noname@example.com")) is None
+
+
+def test_bulk_update_and_delete_users(db):
+    """
+    Test bulk updates and deletes, including ids that do not exist.
+    """
+    created, _ = asyncio.run(bulk_create_users(
+        [{"name": f"Bulk {i}", "email": f"bulkcrud{i}@example.com", "age": 50} for i in range(4)]
+    ))
+    ids = [created[i].id for i in range(4)]
+
+    updated, errors = asyncio.run(bulk_update_users(
+        [{"id": user_id, "age": 51} for user_id in ids] + [{"id": 99999, "age": 1}], chunk_size=2
+    ))
+    assert sorted(updated) == sorted(ids)
+    assert errors == {4: "User not found"}
+    assert asyncio.run(get_user_by_id(ids[0])).age == 51
+
+    deleted, not_found = asyncio.run(bulk_delete_users(ids[:3] + [99999], chunk_size=2))
+    assert sorted(deleted) == sorted(ids[:3])
+    assert not_found == [99999]
+    assert asyncio.run(get_user_by_id(ids[3])) is not None
+
+
+async def _query_plan(db, statement):
+    async with db() as session:
+        compiled = statement.compile(dialect=session.bind.dialect, compile_kwargs={"literal_binds": True})
+        result = await session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+        return " ".join(row[-1] for row in result)
+
+
+def test_listing_queries_use_indexes(db):
+    """
+    Test that the listing queries are served by indexes without a sort step, for every filter and order.
+    """
+    after = {"id": (5,), "created_at": (datetime(2024, 1, 1), 5), "name": ("Abc", 5), "age": (25, 5)}
+    for email, name_prefix, (min_age, max_age) in itertools.product(
+            (None, "x@example.com"), (None, "Ab"), ((None, None), (20, None), (20, 30))):
+        filters = {"email": email, "name_prefix": name_prefix, "min_age": min_age, "max_age": max_age}
+        for order_by in listing_orders(**filters):
+            for keyset in (None, after[order_by]):
+                plan = asyncio.run(_query_plan(db, _listing_statement(10, order_by, keyset, **filters)))
+                assert "TEMP B-TREE" not in plan, plan
+                if any(value is not None for value in filters.values()):
+                    assert "USING INDEX" in plan, plan
+
+
+def test_name_prefix_upper_bound(db):
+    """
+    Test that a name prefix ending with the last code point is listed instead of failing.
+    """
+    last = chr(sys.maxunicode)
+    asyncio.run(create_user(name=f"Prefix{last}{last}", email="prefixlast@example.com"))
+    asyncio.run(create_user(name=f"{last}z", email="lastz@example.com"))
+
+    async def names(name_prefix):
+        return [row.name async for row in stream_users(10, order_by="name", name_prefix=name_prefix)]
+
+    assert asyncio.run(names(f"Prefix{last}")) == [f"Prefix{last}{last}"]
+    assert asyncio.run(names(last)) == [f"{last}z"]
+
+
+def test_stream_users_yields_rows(db):
+    """
+    Test that the listing yields plain rows in keyset order and resumes after a given key.
+    """
+    created, _ = asyncio.run(bulk_create_users(
+        [{"name": f"Stream {i}", "email": "stream@example.com", "age": i} for i in range(3)]
+    ))
+    ids = [created[i].id for i in range(3)]
+
+    async def collect(**kwargs):
+        return [row async for row in stream_users(10, **kwargs)]
+
+    rows = asyncio.run(collect(email="stream@example.com"))
+    assert [row.id for row in rows] == ids
+    assert not isinstance(rows[0], User)
+
+    assert [row.id for row in asyncio.run(collect(email="stream@example.com", after=(ids[0],)))] == ids[1:]
+    rows = asyncio.run(collect(email="stream@example.com", order_by="created_at",
+                               after=(rows[0].created_at, rows[0].id)))
+    assert [row.id for row in rows] == ids[1:]
+    rows = asyncio.run(collect(name_prefix="Stream", order_by="name", after=("Stream 0", ids[0])))
+    assert [row.id for row in rows] == ids[1:]